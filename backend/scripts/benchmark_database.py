@@ -0,0 +1,140 @@
+import sys
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import click
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from src.models.database import Base, MarketData, create_database_engine
+from src.models.bulk_writer import BulkWriter
+from src.models.chunked_reader import ChunkedReader
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+SYMBOL = 'BTCUSDT'
+INTERVAL = '1m'
+START = datetime(2024, 1, 1)
+
+
+def make_bars(offset: int, count: int) -> pd.DataFrame:
+    """生成从第 offset 根开始的 count 根 1m K线"""
+    index = pd.DatetimeIndex(
+        [START + timedelta(minutes=offset + i) for i in range(count)], name='timestamp'
+    )
+    close = 100 + np.cumsum(np.random.randn(count))
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': 10.0, 'quote_volume': 1000.0, 'trades_count': 5,
+        'taker_buy_volume': 5.0, 'taker_buy_quote_volume': 500.0
+    }, index=index)
+
+
+def run_profile(db_path: Path, profile: str, preload: int, batch: int, readers: int, seconds: float):
+    """一个写线程持续追加K线，readers 个读线程持续查询随机区间"""
+    pragmas = {} if profile == 'default' else None
+    engine = create_database_engine(f'sqlite:///{db_path}', pragmas=pragmas)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    writer = BulkWriter(chunk_size=batch)
+
+    session = Session()
+    writer.write(MarketData, make_bars(0, preload), ['symbol', 'interval', 'timestamp'],
+                 constants={'symbol': SYMBOL, 'interval': INTERVAL}, index_column='timestamp', session=session)
+    session.commit()
+    session.close()
+
+    stop = threading.Event()
+    stats = {'rows': 0, 'queries': 0, 'read_rows': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def write_loop():
+        offset = preload
+        while not stop.is_set():
+            session = Session()
+            try:
+                writer.write(MarketData, make_bars(offset, batch), ['symbol', 'interval', 'timestamp'],
+                             constants={'symbol': SYMBOL, 'interval': INTERVAL},
+                             index_column='timestamp', session=session)
+                session.commit()
+                offset += batch
+                with lock:
+                    stats['rows'] += batch
+            except OperationalError:
+                session.rollback()
+                with lock:
+                    stats['locked'] += 1
+            finally:
+                session.close()
+
+    def read_loop():
+        while not stop.is_set():
+            start = START + timedelta(minutes=random.randint(0, preload - 1000))
+            query = ChunkedReader.range_query(MarketData, SYMBOL, INTERVAL, start, start + timedelta(minutes=999))
+            session = Session()
+            try:
+                rows = session.execute(query).fetchall()
+                with lock:
+                    stats['queries'] += 1
+                    stats['read_rows'] += len(rows)
+            except OperationalError:
+                with lock:
+                    stats['locked'] += 1
+            finally:
+                session.close()
+
+    threads = [threading.Thread(target=write_loop)] + [threading.Thread(target=read_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        'profile': profile,
+        'write_rows_per_second': stats['rows'] / seconds,
+        'queries_per_second': stats['queries'] / seconds,
+        'read_rows_per_second': stats['read_rows'] / seconds,
+        'locked_errors': stats['locked']
+    }
+
+
+@click.command()
+@click.option('--preload', default=200000, help='预先写入的K线数')
+@click.option('--batch', default=1000, help='每次写事务的K线数')
+@click.option('--readers', default=4, help='并发读线程数')
+@click.option('--seconds', default=10.0, help='每种配置的测试时长')
+def benchmark(preload, batch, readers, seconds):
+    """对比默认 SQLite 连接与调优后（WAL 等）的并发读写吞吐"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in ('default', 'tuned'):
+            db_path = Path(directory) / f'{profile}.db'
+            logger.info(f"测试配置: {profile}")
+            results.append(run_profile(db_path, profile, preload, batch, readers, seconds))
+
+    print(f"{'配置':<10}{'写入行/秒':>14}{'查询/秒':>12}{'读取行/秒':>14}{'锁等待失败':>12}")
+    for result in results:
+        print(
+            f"{result['profile']:<10}"
+            f"{result['write_rows_per_second']:>14.0f}"
+            f"{result['queries_per_second']:>12.1f}"
+            f"{result['read_rows_per_second']:>14.0f}"
+            f"{result['locked_errors']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
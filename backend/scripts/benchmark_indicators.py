@@ -0,0 +1,95 @@
+import sys
+import time
+from pathlib import Path
+import click
+import numpy as np
+import pandas as pd
+from ta.trend import SMAIndicator, EMAIndicator, MACD
+from ta.momentum import RSIIndicator, StochasticOscillator
+from ta.volatility import BollingerBands, AverageTrueRange
+from ta.volume import VolumeWeightedAveragePrice, OnBalanceVolumeIndicator
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from benchmark_layout import make_bars
+from src.ml.features.feature_generator import FeatureGenerator
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+def ta_features(df: pd.DataFrame) -> pd.DataFrame:
+    """改用 kernels 之前基于 ta 包的 FeatureGenerator.generate_features（对照组）"""
+    df = df.copy()
+    close, high, low, volume = df['close'], df['high'], df['low'], df['volume']
+    for period in [5, 10, 20, 50, 200]:
+        df[f'sma_{period}'] = SMAIndicator(close=close, window=period).sma_indicator()
+    for period in [5, 10, 20, 50, 200]:
+        df[f'ema_{period}'] = EMAIndicator(close=close, window=period).ema_indicator()
+    macd = MACD(close=close)
+    df['macd'] = macd.macd()
+    df['macd_signal'] = macd.macd_signal()
+    df['macd_diff'] = macd.macd_diff()
+    for period in [6, 12, 24]:
+        df[f'rsi_{period}'] = RSIIndicator(close=close, window=period).rsi()
+    stoch = StochasticOscillator(high=high, low=low, close=close)
+    df['stoch_k'] = stoch.stoch()
+    df['stoch_d'] = stoch.stoch_signal()
+    bb = BollingerBands(close=close)
+    df['bb_high'] = bb.bollinger_hband()
+    df['bb_mid'] = bb.bollinger_mavg()
+    df['bb_low'] = bb.bollinger_lband()
+    df['atr'] = AverageTrueRange(high=high, low=low, close=close).average_true_range()
+    df['vwap'] = VolumeWeightedAveragePrice(
+        high=high, low=low, close=close, volume=volume
+    ).volume_weighted_average_price()
+    df['obv'] = OnBalanceVolumeIndicator(close=close, volume=volume).on_balance_volume()
+    return df.dropna()
+
+
+def best_of(function, repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+@click.command()
+@click.option('--bars', default=525600, help='K线数（默认一年的 1m K线）')
+@click.option('--repeat', default=3, help='每种实现的运行次数（取最短耗时）')
+def benchmark(bars, repeat):
+    """对比基于 ta 的特征生成与 kernels 向量化实现（float64 / float32）的耗时与数值差异"""
+    np.random.seed(0)
+    df = make_bars(0, bars)[['open', 'high', 'low', 'close', 'volume']]
+    df32 = df.astype(np.float32)
+    generator = FeatureGenerator()
+
+    logger.info(f"生成特征: {bars} 根K线, 每种实现运行 {repeat} 次")
+    results = [
+        ('ta', best_of(lambda: ta_features(df), repeat)),
+        ('kernels float64', best_of(lambda: generator.generate_features(df), repeat)),
+        ('kernels float32', best_of(lambda: generator.generate_features(df32), repeat)),
+    ]
+
+    baseline = results[0][1]
+    print(f"{'实现':<18}{'耗时(毫秒)':>12}{'加速比':>10}")
+    for name, seconds in results:
+        print(f"{name:<18}{seconds * 1000:>12.1f}{baseline / seconds:>10.1f}")
+
+    # 定义不同的列（RSI 初值、OBV 平盘处理、布林带 ddof）会有差异，其余应只有舍入误差
+    expected = ta_features(df)
+    actual = generator.generate_features(df).reindex(expected.index)
+    print(f"\n{'列':<14}{'与 ta 的最大相对差':>20}")
+    for column in expected.columns.difference(df.columns, sort=False):
+        scale = np.maximum(np.abs(expected[column].to_numpy()), 1.0)
+        difference = np.nanmax(np.abs(actual[column].to_numpy() - expected[column].to_numpy()) / scale)
+        print(f"{column:<14}{difference:>20.2e}")
+
+
+if __name__ == "__main__":
+    benchmark()
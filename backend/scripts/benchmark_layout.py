@@ -0,0 +1,132 @@
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import click
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from sqlalchemy.orm import sessionmaker
+from src.models.database import Base, MarketData, create_database_engine
+from src.models.bulk_writer import BulkWriter
+from src.models.chunked_reader import ChunkedReader
+from src.models.compact_store import CompactBarStore
+from src.models.partitioned_store import PartitionedBarStore
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+INTERVAL = '1m'
+START = datetime(2024, 1, 1)
+LAYOUTS = ('row', 'compact', 'partitioned')
+
+
+class BenchmarkDatabase:
+    """指向临时 SQLite 文件的数据库（提供 ChunkedReader 与各K线存储所需的接口）"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.engine = create_database_engine(f'sqlite:///{path}')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def get_session(self):
+        return self.Session()
+
+    def size(self) -> int:
+        self.engine.dispose()
+        return sum(p.stat().st_size for p in self.path.parent.glob(f'{self.path.name}*'))
+
+
+def make_bars(offset: int, count: int) -> pd.DataFrame:
+    """生成 count 根 1m K线（价格 2 位小数，数量 5 位小数，与交易所精度一致）"""
+    index = pd.DatetimeIndex(
+        START + pd.to_timedelta(np.arange(offset, offset + count), unit='min'), name='timestamp'
+    )
+    close = np.round(30000 + np.cumsum(np.random.randn(count) * 10), 2)
+    volume = np.round(np.random.rand(count) * 100, 5)
+    return pd.DataFrame({
+        'open': close, 'high': np.round(close + 5, 2), 'low': np.round(close - 5, 2), 'close': close,
+        'volume': volume, 'quote_volume': np.round(volume * close, 8),
+        'trades_count': np.random.randint(1, 1000, count),
+        'taker_buy_volume': np.round(volume / 2, 5), 'taker_buy_quote_volume': np.round(volume * close / 2, 8)
+    }, index=index)
+
+
+def open_store(layout: str, db: BenchmarkDatabase):
+    if layout == 'compact':
+        return CompactBarStore(db)
+    if layout == 'partitioned':
+        return PartitionedBarStore(db)
+    return None
+
+
+def load(layout: str, db: BenchmarkDatabase, symbols: int, bars: int, batch: int):
+    writer = BulkWriter(chunk_size=batch)
+    store = open_store(layout, db)
+    started = time.perf_counter()
+    for i in range(symbols):
+        symbol = f'SYM{i}USDT'
+        for offset in range(0, bars, batch):
+            data = make_bars(offset, min(batch, bars - offset))
+            session = db.get_session()
+            if store:
+                store.write(symbol, INTERVAL, data, session=session)
+            else:
+                writer.write(MarketData, data, ['symbol', 'interval', 'timestamp'],
+                             constants={'symbol': symbol, 'interval': INTERVAL},
+                             index_column='timestamp', session=session)
+            session.commit()
+            session.close()
+    return time.perf_counter() - started
+
+
+def scan(layout: str, db: BenchmarkDatabase, symbols: int, bars: int, scans: int, window: int):
+    reader = ChunkedReader(db=db)
+    store = open_store(layout, db)
+    random.seed(0)
+    rows = 0
+    started = time.perf_counter()
+    for _ in range(scans):
+        symbol = f'SYM{random.randrange(symbols)}USDT'
+        start = START + timedelta(minutes=random.randrange(bars - window))
+        end = start + timedelta(minutes=window - 1)
+        if store:
+            df = store.read(symbol, INTERVAL, start, end)
+        else:
+            df = reader.read(ChunkedReader.range_query(MarketData, symbol, INTERVAL, start, end, CompactBarStore.COLUMNS))
+        rows += len(df)
+    return time.perf_counter() - started, rows
+
+
+@click.command()
+@click.option('--symbols', default=5, help='交易对数量')
+@click.option('--bars', default=200000, help='每个交易对的K线数')
+@click.option('--batch', default=10000, help='每次写入的K线数')
+@click.option('--scans', default=200, help='随机区间查询次数')
+@click.option('--window', default=1440, help='每次查询的K线数')
+def benchmark(symbols, bars, batch, scans, window):
+    """对比行布局、紧凑布局与按月分区布局的文件大小、写入与区间查询耗时"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for layout in LAYOUTS:
+            db = BenchmarkDatabase(Path(directory) / f'{layout}.db')
+            logger.info(f"写入 {layout} 布局: {symbols} × {bars} 条")
+            load_seconds = load(layout, db, symbols, bars, batch)
+            scan_seconds, rows = scan(layout, db, symbols, bars, scans, window)
+            results.append((layout, db.size(), load_seconds, scan_seconds, rows))
+
+    print(f"{'布局':<10}{'文件大小(MB)':>14}{'写入(秒)':>12}{'查询(毫秒/次)':>16}{'查询行数':>12}")
+    for layout, size, load_seconds, scan_seconds, rows in results:
+        print(f"{layout:<10}{size / 1024 / 1024:>14.1f}{load_seconds:>12.1f}"
+              f"{scan_seconds / scans * 1000:>16.2f}{rows:>12}")
+
+
+if __name__ == "__main__":
+    benchmark()
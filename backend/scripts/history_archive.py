@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+import click
+import pandas as pd
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.data.storage.history_archive import HistoryArchiveReader
+from src.services.history_archive_service import HistoryArchiveService
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S']
+
+
+def report(summary, action):
+    for failed in summary['failed']:
+        logger.error(f"{action}失败: {failed['file']} - {failed['error']}")
+    logger.info(f"共{action} {summary['rows']} 条, {summary['bytes'] / 1024 / 1024:.1f} MB, "
+                f"{summary['seconds']:.1f}s, {summary['rows_per_second']:.0f} 条/秒")
+
+
+@click.group()
+def cli():
+    """K线与技术指标的压缩历史归档（每个交易对一个 .hist 文件）"""
+
+
+@cli.command()
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--symbol', 'symbols', multiple=True, help='只导出指定交易对（可多次指定）')
+@click.option('--start', type=click.DateTime(DATE_FORMATS), help='开始时间（UTC）')
+@click.option('--end', type=click.DateTime(DATE_FORMATS), help='结束时间（UTC）')
+@click.option('--workers', default=4, help='并行导出的交易对数')
+@click.option('--block-rows', default=65536, help='每个列块的行数')
+@click.option('--level', default=3, help='zstd 压缩级别')
+def export(directory, symbols, start, end, workers, block_rows, level):
+    """导出数据库中的K线与技术指标到目录"""
+    service = HistoryArchiveService(max_workers=workers, block_rows=block_rows, level=level)
+    report(service.export(directory, list(symbols) or None, start, end), '导出')
+
+
+@cli.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--symbol', 'symbols', multiple=True, help='只恢复指定交易对（可多次指定）')
+@click.option('--start', type=click.DateTime(DATE_FORMATS), help='开始时间（UTC）')
+@click.option('--end', type=click.DateTime(DATE_FORMATS), help='结束时间（UTC）')
+@click.option('--workers', default=4, help='并行解码的文件数')
+@click.option('--force', is_flag=True, help='覆盖已存在的数据')
+def restore(directory, symbols, start, end, workers, force):
+    """从目录恢复K线与技术指标（K线按当前 database.layout 写入）"""
+    service = HistoryArchiveService(max_workers=workers)
+    report(service.restore(directory, list(symbols) or None, start, end, force_update=force), '恢复')
+
+
+@cli.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--symbol', 'symbols', multiple=True, help='只显示指定交易对（可多次指定）')
+def info(directory, symbols):
+    """显示归档文件中的表、周期、时间范围与行数"""
+    for path in HistoryArchiveReader.discover(directory, list(symbols) or None):
+        reader = HistoryArchiveReader(path)
+        logger.info(f"{path.name}: {reader.symbol}, {reader.rows()} 条, "
+                    f"{path.stat().st_size / 1024 / 1024:.1f} MB, 创建于 {reader.created_at}")
+        for table, interval in reader.series():
+            blocks = reader.select(table, interval)
+            start, end = (pd.Timestamp(ms, unit='ms') for ms in (blocks[0]['start'], blocks[-1]['end']))
+            logger.info(f"  {table} {interval}: {sum(block['rows'] for block in blocks)} 条, "
+                        f"{len(blocks)} 块, {start} ~ {end}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,46 @@
+import sys
+import asyncio
+from pathlib import Path
+import click
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.services.archive_import_service import ArchiveImportService
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+@click.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--symbol', 'symbols', multiple=True, help='只导入指定交易对（可多次指定）')
+@click.option('--interval', 'intervals', multiple=True, help='只导入指定周期（可多次指定）')
+@click.option('--workers', default=4, help='并行导入的文件数')
+@click.option('--chunk-rows', default=100000, help='每块读取/写入的行数')
+@click.option('--force', is_flag=True, help='覆盖已存在的数据')
+@click.option('--no-verify', is_flag=True, help='跳过 .CHECKSUM 校验')
+@click.option('--sync-tail', is_flag=True, help='导入后从交易所补齐到当前时间')
+def import_archive(directory, symbols, intervals, workers, chunk_rows, force, no_verify, sync_tail):
+    """从本地目录导入币安公开K线归档（data.binance.vision）"""
+    service = ArchiveImportService(max_workers=workers, chunk_rows=chunk_rows)
+    symbols = list(symbols) or None
+    intervals = list(intervals) or None
+
+    if sync_tail:
+        summary = asyncio.run(service.import_and_sync(
+            directory, symbols, intervals, force_update=force, verify=not no_verify
+        ))
+    else:
+        summary = asyncio.run(service.import_directory(
+            directory, symbols, intervals, force_update=force, verify=not no_verify
+        ))
+
+    for (symbol, interval), (start, end) in sorted(summary['ranges'].items()):
+        logger.info(f"{symbol} {interval}: {start} ~ {end}")
+    for failed in summary['failed']:
+        logger.error(f"导入失败: {failed['file']} - {failed['error']}")
+    logger.info(f"共导入 {summary['rows']} 条, {summary['rows_per_second']:.0f} 条/秒")
+
+if __name__ == "__main__":
+    import_archive()
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+import click
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.models.database import DatabaseManager
+from src.models.compact_store import CompactBarStore
+from src.models.partitioned_store import PartitionedBarStore
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+@click.command()
+@click.option('--layout', type=click.Choice(['compact', 'partitioned']), default='compact', help='目标存储布局')
+@click.option('--chunk-size', default=100000, help='每块迁移的行数')
+@click.option('--drop-source', is_flag=True, help='校验行数后删除 market_data 中的原始数据')
+@click.option('--vacuum', is_flag=True, help='删除原始数据后整理数据库文件（SQLite VACUUM / PostgreSQL CLUSTER）')
+@click.option('--view-only', is_flag=True, help='只创建兼容视图，不迁移数据（compact）')
+def migrate(layout, chunk_size, drop_source, vacuum, view_only):
+    """将 market_data 迁移到紧凑布局 market_bars（并创建兼容视图 market_data_view）或月度分区表"""
+    db = DatabaseManager()
+    store = CompactBarStore(db) if layout == 'compact' else PartitionedBarStore(db)
+
+    if not view_only:
+        migrated = store.migrate(chunk_size=chunk_size, drop_source=drop_source)
+        for (symbol, interval), rows in sorted(migrated.items()):
+            logger.info(f"{symbol} {interval}: {rows} 条")
+        logger.info(f"迁移完成，共 {sum(migrated.values())} 条")
+
+    if layout == 'compact':
+        store.create_view()
+
+    if vacuum:
+        dialect = db.engine.dialect.name
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            if dialect == 'sqlite':
+                connection.exec_driver_sql('VACUUM')
+            elif dialect == 'postgresql':
+                if layout == 'compact':
+                    # 按聚簇主键重排 market_bars
+                    connection.exec_driver_sql('CLUSTER market_bars USING market_bars_pkey')
+                connection.exec_driver_sql('VACUUM ANALYZE market_data')
+        logger.info("数据库整理完成")
+
+    logger.info(f"在配置中设置 database.layout: {layout} 以使用该布局读写")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+import click
+import duckdb
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.services.analytics_service import AnalyticsService
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+@click.group()
+def cli():
+    """用 DuckDB SQL 分析K线与技术指标（视图 market_data、technical_indicators）"""
+
+
+@cli.command()
+@click.option('--symbol', 'symbols', multiple=True, help='只刷新指定交易对（可多次指定）')
+@click.option('--interval', 'intervals', multiple=True, help='只刷新指定周期（可多次指定）')
+@click.option('--rebuild', is_flag=True, help='重写全部月份（镜像文件损坏或被手动修改后使用）')
+@click.option('--workers', default=4, help='并行刷新的序列数')
+def refresh(symbols, intervals, rebuild, workers):
+    """把数据库中的K线与指标同步到列式分析镜像"""
+    service = AnalyticsService(max_workers=workers)
+    summary = service.refresh(list(symbols) or None, list(intervals) or None, rebuild=rebuild)
+    logger.info(f"{summary['series']} 个序列, 重写 {summary['months']} 个月, {summary['rows']} 条")
+
+
+@cli.command()
+@click.argument('sql', required=False)
+@click.option('--file', 'sql_file', type=click.Path(exists=True, dir_okay=False), help='从文件读取 SQL')
+@click.option('--output', type=click.Path(dir_okay=False), help='结果写入 .csv 或 .parquet 文件')
+@click.option('--max-rows', default=50, help='终端显示的最大行数')
+@click.option('--refresh', 'refresh_first', is_flag=True, help='查询前先刷新分析镜像')
+def query(sql, sql_file, output, max_rows, refresh_first):
+    """执行 SQL，例如：
+
+    \b
+    SELECT symbol, hour(timestamp) AS hour, avg(volume) AS volume
+    FROM market_data WHERE "interval" = '1h' GROUP BY ALL ORDER BY ALL
+    """
+    if sql_file:
+        sql = Path(sql_file).read_text()
+    if not sql:
+        raise click.UsageError('需要 SQL 参数或 --file')
+
+    service = AnalyticsService()
+    if refresh_first:
+        service.refresh()
+
+    connection = service.connect()
+    try:
+        try:
+            relation = connection.sql(sql)
+        except duckdb.Error as e:
+            raise click.ClickException(str(e))
+        if relation is None:
+            return
+        if output and output.endswith('.parquet'):
+            relation.write_parquet(output)
+            logger.info(f"结果已写入 {output}")
+        elif output:
+            relation.write_csv(output)
+            logger.info(f"结果已写入 {output}")
+        else:
+            relation.show(max_rows=max_rows)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    cli()
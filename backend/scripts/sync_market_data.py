@@ -9,6 +9,7 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from src.services.market_data_service import MarketDataService
+from src.services.sync_scheduler import SyncScheduler
 from src.utils.logger import Logger
 from src.config.config import Config
 
@@ -21,11 +22,22 @@ async def sync_all_market_data():
     symbols = config.get('api.binance.symbols', ['BTCUSDT'])
     intervals = config.get('api.binance.intervals', ['1m', '5m', '15m'])
     
-    for symbol in symbols:
-        for interval in intervals:
-            logger.info(f"开始同步数据: {symbol} {interval}")
-            await service.sync_market_data(symbol, interval)
-            logger.info(f"完成同步数据: {symbol} {interval}")
+    scheduler = SyncScheduler(
+        service,
+        max_concurrency=config.get('api.binance.sync_concurrency', 4)
+    )
+    scheduler.plan(
+        symbols,
+        intervals,
+        history_days=config.get('data.history_days', 30),
+        recent_days=config.get('data.recent_days', 1)
+    )
+    try:
+        await scheduler.run()
+        if service.retention.policies:
+            await service.retention.apply(symbols)
+    finally:
+        await service.close()
 
 if __name__ == "__main__":
     asyncio.run(sync_all_market_data()) 
\ No newline at end of file
@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 import jwt
 from datetime import datetime, timedelta
+from sqlalchemy import select
 from ..models.database import DatabaseManager, Trade, Position
 from ..utils.logger import Logger
 from ..config.config import Config
@@ -68,24 +69,20 @@ async def get_trades(
     limit: int = 100
 ) -> List[Trade]:
     """获取交易记录"""
-    session = db.get_session()
-    try:
-        trades = session.query(Trade).order_by(Trade.timestamp.desc()).limit(limit).all()
-        return trades
-    finally:
-        session.close()
+    async with db.get_async_session() as session:
+        result = await session.execute(
+            select(Trade).order_by(Trade.timestamp.desc()).limit(limit)
+        )
+        return result.scalars().all()
 
 @app.get("/api/positions")
 async def get_positions(
     current_user: str = Depends(get_current_user)
 ) -> List[Position]:
     """获取当前持仓"""
-    session = db.get_session()
-    try:
-        positions = session.query(Position).all()
-        return positions
-    finally:
-        session.close()
+    async with db.get_async_session() as session:
+        result = await session.execute(select(Position))
+        return result.scalars().all()
 
 @app.get("/api/equity-curve")
 async def get_equity_curve(
@@ -93,12 +90,12 @@ async def get_equity_curve(
     days: Optional[int] = 30
 ):
     """获取权益曲线数据"""
-    session = db.get_session()
-    try:
+    async with db.get_async_session() as session:
         start_date = datetime.utcnow() - timedelta(days=days)
-        trades = session.query(Trade).filter(
-            Trade.timestamp >= start_date
-        ).order_by(Trade.timestamp).all()
+        result = await session.execute(
+            select(Trade).where(Trade.timestamp >= start_date).order_by(Trade.timestamp)
+        )
+        trades = result.scalars().all()
         
         equity_curve = []
         current_equity = config.get('trading.initial_capital', 100000)
@@ -112,17 +109,15 @@ async def get_equity_curve(
             })
             
         return equity_curve
-    finally:
-        session.close()
 
 @app.get("/api/statistics")
 async def get_statistics(
     current_user: str = Depends(get_current_user)
 ):
     """获取交易统计数据"""
-    session = db.get_session()
-    try:
-        trades = session.query(Trade).filter(Trade.type == 'sell').all()
+    async with db.get_async_session() as session:
+        result = await session.execute(select(Trade).where(Trade.type == 'sell'))
+        trades = result.scalars().all()
         
         total_trades = len(trades)
         winning_trades = len([t for t in trades if t.pnl > 0])
@@ -134,6 +129,4 @@ async def get_statistics(
             'win_rate': winning_trades / total_trades if total_trades > 0 else 0,
             'total_pnl': total_pnl,
             'average_pnl': total_pnl / total_trades if total_trades > 0 else 0
-        }
-    finally:
-        session.close() 
\ No newline at end of file
+        } 
\ No newline at end of file
@@ -2,10 +2,12 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
+from sqlalchemy import select
 
 from ...services.market_data_service import MarketDataService
 from ...services.technical_analysis_service import TechnicalAnalysisService
-from ...models.database import DatabaseManager
+from ...data.processors.resampler import OHLCVResampler
+from ...models.database import DatabaseManager, Trade, Position, EquityCurve
 
 router = APIRouter()
 
@@ -37,32 +39,28 @@ async def get_trades(
 ):
     """获取交易记录"""
     db = DatabaseManager()
-    session = db.get_session()
-    try:
+    async with db.get_async_session() as session:
         if not start_time:
             start_time = datetime.utcnow() - timedelta(days=7)
         if not end_time:
             end_time = datetime.utcnow()
             
-        trades = session.query(Trade).filter(
-            Trade.symbol == symbol,
-            Trade.timestamp.between(start_time, end_time)
-        ).order_by(Trade.timestamp.desc()).all()
+        result = await session.execute(
+            select(Trade).where(
+                Trade.symbol == symbol,
+                Trade.timestamp.between(start_time, end_time)
+            ).order_by(Trade.timestamp.desc())
+        )
         
-        return [TradeResponse(**trade.__dict__) for trade in trades]
-    finally:
-        session.close()
+        return [TradeResponse(**trade.__dict__) for trade in result.scalars().all()]
 
 @router.get("/positions", response_model=List[PositionResponse])
 async def get_positions():
     """获取当前持仓"""
     db = DatabaseManager()
-    session = db.get_session()
-    try:
-        positions = session.query(Position).all()
-        return [PositionResponse(**pos.__dict__) for pos in positions]
-    finally:
-        session.close()
+    async with db.get_async_session() as session:
+        result = await session.execute(select(Position))
+        return [PositionResponse(**pos.__dict__) for pos in result.scalars().all()]
 
 @router.get("/equity-curve", response_model=List[EquityResponse])
 async def get_equity_curve(
@@ -71,40 +69,51 @@ async def get_equity_curve(
 ):
     """获取权益曲线"""
     db = DatabaseManager()
-    session = db.get_session()
-    try:
+    async with db.get_async_session() as session:
         if not start_time:
             start_time = datetime.utcnow() - timedelta(days=30)
         if not end_time:
             end_time = datetime.utcnow()
             
-        equity_data = session.query(EquityCurve).filter(
-            EquityCurve.timestamp.between(start_time, end_time)
-        ).order_by(EquityCurve.timestamp.asc()).all()
+        result = await session.execute(
+            select(EquityCurve).where(
+                EquityCurve.timestamp.between(start_time, end_time)
+            ).order_by(EquityCurve.timestamp.asc())
+        )
         
-        return [EquityResponse(**data.__dict__) for data in equity_data]
-    finally:
-        session.close()
+        return [EquityResponse(**data.__dict__) for data in result.scalars().all()]
 
 @router.get("/market-data")
 async def get_market_data(
     symbol: str = "BTCUSDT",
     interval: str = "1m",
-    limit: int = 1000
+    limit: int = 1000,
+    bucket: Optional[str] = None
 ):
-    """获取市场数据"""
+    """获取市场数据，bucket 指定时返回在数据库内聚合的高周期K线
+
+    返回最近 limit 根K线（或时间桶），每条记录含开盘时间 timestamp。
+    """
+    interval_ms = OHLCVResampler.INTERVAL_MS.get(bucket or interval)
+    if interval_ms is None:
+        raise HTTPException(status_code=400, detail=f"不支持的周期: {bucket or interval}")
+    
     service = MarketDataService()
     end_time = datetime.utcnow()
-    start_time = end_time - timedelta(minutes=limit)
+    start_time = end_time - timedelta(milliseconds=limit * interval_ms)
     
-    data = await service.get_market_data(
-        symbol=symbol,
-        interval=interval,
-        start_time=start_time,
-        end_time=end_time
-    )
+    try:
+        data = await service.get_market_data(
+            symbol=symbol,
+            interval=interval,
+            start_time=start_time,
+            end_time=end_time,
+            bucket=bucket
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return data.to_dict(orient='records')
+    return data.reset_index().to_dict(orient='records')
 
 @router.get("/technical-indicators")
 async def get_technical_indicators(
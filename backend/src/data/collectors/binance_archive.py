@@ -0,0 +1,133 @@
+import hashlib
+import io
+import re
+import zipfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class ArchiveFile:
+    """一个币安公开K线归档文件（data.binance.vision 的日/月 ZIP 或解压后的 CSV）"""
+
+    def __init__(self, path: Path, symbol: str, interval: str, period: str):
+        self.path = path
+        self.symbol = symbol
+        self.interval = interval
+        # YYYY-MM（月文件）或 YYYY-MM-DD（日文件）
+        self.period = period
+
+    @property
+    def daily(self) -> bool:
+        return len(self.period) == 10
+
+    def __repr__(self) -> str:
+        return f"ArchiveFile({self.path.name})"
+
+
+class BinanceArchiveReader:
+    """币安K线归档读取器
+
+    文件名格式为 {SYMBOL}-{interval}-{YYYY-MM[-DD]}.zip/.csv，可按官方目录结构
+    或任意层级存放。CSV 按块读取，用 pandas 的 C 解析器整列解码，
+    不逐行处理；2025 年起现货归档的时间戳为微秒，读取时统一换算为毫秒。
+    """
+
+    FILE_PATTERN = re.compile(
+        r'^(?P<symbol>[A-Z0-9]+)-(?P<interval>\d+[smhdwM])-(?P<period>\d{4}-\d{2}(?:-\d{2})?)\.(?:zip|csv)$'
+    )
+
+    COLUMNS = [
+        'timestamp', 'open', 'high', 'low', 'close',
+        'volume', 'close_time', 'quote_volume', 'trades',
+        'taker_buy_base', 'taker_buy_quote', 'ignore'
+    ]
+
+    # 微秒时间戳的下限（毫秒时间戳在 5138 年之前都小于该值）
+    MICROSECOND_THRESHOLD = 10 ** 14
+
+    def __init__(self, chunk_rows: int = 100000):
+        self.chunk_rows = chunk_rows
+
+    def discover(
+        self,
+        directory: Union[str, Path],
+        symbols: Optional[List[str]] = None,
+        intervals: Optional[List[str]] = None
+    ) -> List[ArchiveFile]:
+        """递归查找归档文件，按交易对/周期/时间排序"""
+        files = []
+        for path in Path(directory).rglob('*'):
+            match = self.FILE_PATTERN.match(path.name)
+            if not match or not path.is_file():
+                continue
+            if symbols and match['symbol'] not in symbols:
+                continue
+            if intervals and match['interval'] not in intervals:
+                continue
+            files.append(ArchiveFile(path, match['symbol'], match['interval'], match['period']))
+        return sorted(files, key=lambda f: (f.symbol, f.interval, f.period, f.daily))
+
+    @staticmethod
+    def verify_checksum(path: Path) -> Optional[bool]:
+        """校验同目录下的 .CHECKSUM 文件（sha256），没有校验文件时返回 None"""
+        checksum_path = path.with_name(path.name + '.CHECKSUM')
+        if not checksum_path.exists():
+            return None
+        expected = checksum_path.read_text().split()[0].lower()
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest() == expected
+
+    @staticmethod
+    def _open(path: Path):
+        """打开 CSV 文本流（ZIP 内取第一个 CSV）"""
+        if path.suffix == '.zip':
+            archive = zipfile.ZipFile(path)
+            name = next(n for n in archive.namelist() if n.endswith('.csv'))
+            return io.TextIOWrapper(archive.open(name), encoding='utf-8')
+        return open(path, 'r', encoding='utf-8')
+
+    @classmethod
+    def _decode(cls, chunk: pd.DataFrame) -> pd.DataFrame:
+        """整块解码为与采集器一致的列：UTC 时间索引 + 浮点数值列"""
+        open_time = chunk['timestamp'].to_numpy(dtype=np.int64)
+        open_time = np.where(open_time >= cls.MICROSECOND_THRESHOLD, open_time // 1000, open_time)
+        chunk.index = pd.DatetimeIndex(pd.to_datetime(open_time, unit='ms', utc=True), name='timestamp')
+        return chunk.drop(columns=['timestamp'])
+
+    def iter_chunks(self, archive_file: ArchiveFile) -> Iterator[pd.DataFrame]:
+        """按块读取一个归档文件"""
+        with self._open(archive_file.path) as stream:
+            # 期货等归档带表头，现货归档没有
+            first_line = stream.readline()
+            has_header = not first_line[:1].isdigit()
+            if not has_header:
+                stream.seek(0)
+
+            reader = pd.read_csv(
+                stream,
+                header=None,
+                names=self.COLUMNS,
+                usecols=[c for c in self.COLUMNS if c not in ('close_time', 'ignore')],
+                dtype={c: np.float64 for c in self.COLUMNS if c not in ('timestamp', 'close_time', 'ignore')},
+                chunksize=self.chunk_rows
+            )
+            for chunk in reader:
+                if not chunk.empty:
+                    yield self._decode(chunk)
+
+    def read(self, archive_file: ArchiveFile) -> pd.DataFrame:
+        """读取整个归档文件"""
+        chunks = list(self.iter_chunks(archive_file))
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks)
@@ -0,0 +1,471 @@
+from typing import AsyncIterator, Callable, Dict, Optional, List, Tuple, Union
+import asyncio
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from .base_collector import BaseDataCollector
+from .binance_stream import BinanceStream, parse_kline, parse_agg_trade, parse_depth
+from ..order_book import LocalOrderBook, OrderBookSyncError
+import pytz
+from ...utils.logger import Logger
+from ...utils.http_client import BinanceRestClient, BinanceAPIError
+
+logger = Logger(__name__)
+
+class BinanceDataCollector(BaseDataCollector):
+    """币安数据采集器"""
+    
+    INTERVALS = {
+        '1m': '1m',
+        '5m': '5m',
+        '15m': '15m',
+        '30m': '30m',
+        '1h': '1h',
+        '4h': '4h',
+        '1d': '1d',
+    }
+    
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        weight_limit: int = 6000,
+        max_concurrency: int = 8,
+        testnet: bool = False,
+        stream_url: Optional[str] = None
+    ):
+        super().__init__(api_key, api_secret)
+        # 异步REST客户端（连接池 + 签名 + 重试 + 权重令牌桶）
+        self.client = BinanceRestClient(
+            api_key,
+            api_secret,
+            testnet=testnet,
+            weight_limit=weight_limit
+        )
+        
+        # 时间间隔映射到毫秒
+        self.interval_ms = {
+            '1m': 60 * 1000,
+            '5m': 5 * 60 * 1000,
+            '15m': 15 * 60 * 1000,
+            '30m': 30 * 60 * 1000,
+            '1h': 60 * 60 * 1000,
+            '4h': 4 * 60 * 60 * 1000,
+            '1d': 24 * 60 * 60 * 1000,
+        }
+        
+        # 每个间隔的最大数据点数量
+        self.max_limit = 1000
+        
+        # 并发回补的最大并发请求数，权重预算由 client 的令牌桶控制
+        self.rate_limiter = self.client.rate_limiter
+        self.max_concurrency = max_concurrency
+        
+        # WebSocket 行情地址（测试时可指向本地回放服务器）
+        self.stream_url = stream_url
+    
+    def _format_kline_data(self, klines: List) -> pd.DataFrame:
+        """格式化K线数据"""
+        df = pd.DataFrame(klines, columns=[
+            'timestamp', 'open', 'high', 'low', 'close', 
+            'volume', 'close_time', 'quote_volume', 'trades',
+            'taker_buy_base', 'taker_buy_quote', 'ignore'
+        ])
+        
+        # 转换数据类型
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        numeric_columns = ['open', 'high', 'low', 'close', 'volume', 
+                         'quote_volume', 'trades', 'taker_buy_base', 
+                         'taker_buy_quote']
+        
+        for col in numeric_columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+            
+        return df.set_index('timestamp')
+        
+    def _split_windows(
+        self,
+        start_ts: int,
+        end_ts: int,
+        interval_ms: int
+    ) -> List[Tuple[int, int]]:
+        """按单页最大条数将时间范围切分为请求窗口（闭区间）"""
+        page_ms = self.max_limit * interval_ms
+        return [
+            (window_start, min(window_start + page_ms - 1, end_ts))
+            for window_start in range(start_ts, end_ts + 1, page_ms)
+        ]
+    
+    async def _fetch_window(
+        self,
+        symbol: str,
+        interval: str,
+        window_start: int,
+        window_end: int,
+        semaphore: asyncio.Semaphore
+    ) -> List:
+        """在权重预算内获取单个窗口的K线"""
+        async with semaphore:
+            return await self.client.get_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=self.max_limit,
+                startTime=window_start,
+                endTime=window_end
+            )
+    
+    async def _fetch_klines_concurrent(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int
+    ) -> List:
+        """预先切分窗口并发获取，按时间顺序重组"""
+        windows = self._split_windows(start_ts, end_ts, self.interval_ms[interval])
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        logger.debug(f"并发获取 {len(windows)} 个窗口, 最大并发 {self.max_concurrency}")
+        
+        pages = await asyncio.gather(*[
+            self._fetch_window(symbol, interval, window_start, window_end, semaphore)
+            for window_start, window_end in windows
+        ])
+        
+        # gather 保持窗口顺序，窗口互不重叠，直接拼接即为有序结果
+        return [kline for page in pages for kline in page]
+    
+    async def _fetch_klines_sequential(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int
+    ) -> List:
+        """逐页顺序获取"""
+        interval_ms = self.interval_ms[interval]
+        all_klines = []
+        current_start = start_ts
+        
+        while current_start < end_ts:
+            # 计算当前批次的结束时间
+            batch_end = min(
+                current_start + (self.max_limit * interval_ms),
+                end_ts
+            )
+            
+            logger.debug(f"获取数据批次: {datetime.fromtimestamp(current_start/1000, pytz.UTC)} "
+                       f"到 {datetime.fromtimestamp(batch_end/1000, pytz.UTC)}")
+            
+            klines = await self.client.get_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=self.max_limit,
+                startTime=current_start,
+                endTime=batch_end
+            )
+            
+            if not klines:
+                break
+                
+            all_klines.extend(klines)
+            current_start = int(klines[-1][0]) + interval_ms
+            
+            logger.debug(f"已获取 {len(all_klines)} 条数据")
+        
+        return all_klines
+        
+    async def fetch_historical_data(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime = None,
+        concurrent: bool = True
+    ) -> pd.DataFrame:
+        """获取历史K线数据
+        
+        concurrent 为 True 时预先按页切分时间范围，在请求权重预算内并发获取；
+        否则逐页顺序获取。
+        """
+        try:
+            if not end_time:
+                end_time = datetime.now(pytz.UTC)
+            
+            # 确保时间戳是UTC时间
+            if not start_time.tzinfo:
+                start_time = pytz.UTC.localize(start_time)
+            if not end_time.tzinfo:
+                end_time = pytz.UTC.localize(end_time)
+            
+            # 转换为毫秒时间戳
+            start_ts = int(start_time.timestamp() * 1000)
+            end_ts = int(end_time.timestamp() * 1000)
+            
+            # 计算需要获取的数据点数量
+            interval_ms = self.interval_ms[interval]
+            total_points = (end_ts - start_ts) // interval_ms
+            
+            logger.info(f"开始获取数据: {symbol} {interval}")
+            logger.info(f"时间范围: {start_time} 到 {end_time}")
+            logger.info(f"预计数据点数: {total_points}")
+            
+            if concurrent and total_points > self.max_limit:
+                all_klines = await self._fetch_klines_concurrent(symbol, interval, start_ts, end_ts)
+            else:
+                all_klines = await self._fetch_klines_sequential(symbol, interval, start_ts, end_ts)
+            
+            if not all_klines:
+                logger.warning(f"未获取到数据: {symbol} {interval}")
+                return pd.DataFrame()
+            
+            # 转换为DataFrame
+            df = pd.DataFrame(all_klines, columns=[
+                'timestamp', 'open', 'high', 'low', 'close',
+                'volume', 'close_time', 'quote_volume', 'trades',
+                'taker_buy_base', 'taker_buy_quote', 'ignore'
+            ])
+            
+            # 转换时间戳
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+            df.set_index('timestamp', inplace=True)
+            
+            # 转换数据类型
+            numeric_columns = ['open', 'high', 'low', 'close', 'volume',
+                             'quote_volume', 'trades', 'taker_buy_base',
+                             'taker_buy_quote']
+            df[numeric_columns] = df[numeric_columns].astype(float)
+            
+            # 删除不需要的列
+            df.drop(['close_time', 'ignore'], axis=1, inplace=True)
+            
+            logger.info(f"成功获取 {len(df)} 条数据")
+            return df
+            
+        except BinanceAPIError as e:
+            logger.error(f"获取数据失败: {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"处理数据失败: {e}")
+            raise e
+            
+    async def fetch_realtime_data(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 1
+    ) -> pd.DataFrame:
+        """获取实时K线数据"""
+        try:
+            klines = await self.client.get_klines(
+                symbol=symbol,
+                interval=self.INTERVALS[interval],
+                limit=limit
+            )
+            return self._format_kline_data(klines)
+            
+        except BinanceAPIError as e:
+            logger.error(f"获取实时数据失败: {e}")
+            return pd.DataFrame()
+            
+    @staticmethod
+    def _format_agg_trades(trades: List[Dict]) -> Dict[str, np.ndarray]:
+        """归集成交转换为列数组"""
+        return {
+            'timestamp': np.array([t['T'] for t in trades], dtype=np.int64),
+            'trade_id': np.array([t['a'] for t in trades], dtype=np.int64),
+            'price': np.array([t['p'] for t in trades], dtype=np.float64),
+            'quantity': np.array([t['q'] for t in trades], dtype=np.float64),
+            'is_buyer_maker': np.array([t['m'] for t in trades], dtype=bool),
+        }
+    
+    async def fetch_agg_trades(
+        self,
+        symbol: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        from_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> Dict[str, np.ndarray]:
+        """获取归集成交，返回 timestamp/trade_id/price/quantity/is_buyer_maker 列数组"""
+        trades = await self.client.get_agg_trades(
+            symbol=symbol,
+            fromId=from_id,
+            startTime=int(start_time.timestamp() * 1000) if start_time else None,
+            endTime=int(end_time.timestamp() * 1000) if end_time else None,
+            limit=limit
+        )
+        return self._format_agg_trades(trades)
+    
+    async def iter_agg_trades(
+        self,
+        symbol: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        from_id: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """按成交ID翻页回补归集成交，逐页返回
+        
+        未指定 from_id 时先按一小时的时间窗口定位起始成交（跳过无成交的时段），
+        此时必须指定 start_time。
+        """
+        if from_id is None and start_time is None:
+            raise ValueError("未指定 from_id 时需要指定 start_time")
+        if not end_time:
+            end_time = datetime.now(pytz.UTC)
+        elif not end_time.tzinfo:
+            end_time = pytz.UTC.localize(end_time)
+        end_ms = int(end_time.timestamp() * 1000)
+        
+        if from_id is None:
+            if not start_time.tzinfo:
+                start_time = pytz.UTC.localize(start_time)
+            window_start = start_time
+            page = None
+            while window_start <= end_time:
+                window_end = min(window_start + timedelta(hours=1) - timedelta(milliseconds=1), end_time)
+                page = await self.fetch_agg_trades(symbol, window_start, window_end, limit=self.max_limit)
+                if len(page['trade_id']):
+                    break
+                window_start = window_end + timedelta(milliseconds=1)
+            if page is None or not len(page['trade_id']):
+                return
+        else:
+            page = await self.fetch_agg_trades(symbol, from_id=from_id, limit=self.max_limit)
+        
+        while len(page['trade_id']):
+            in_range = page['timestamp'] <= end_ms
+            if not in_range.all():
+                yield {name: values[in_range] for name, values in page.items()}
+                return
+            yield page
+            # 按ID翻页不足一页说明已到最新成交；首页按时间窗口获取，需继续翻页
+            if from_id is not None and len(page['trade_id']) < self.max_limit:
+                return
+            from_id = int(page['trade_id'][-1]) + 1
+            page = await self.fetch_agg_trades(symbol, from_id=from_id, limit=self.max_limit)
+    
+    async def fetch_orderbook(
+        self,
+        symbol: str,
+        depth: int = 10,
+        as_book: bool = False
+    ) -> Union[Dict, LocalOrderBook]:
+        """获取订单簿数据
+        
+        as_book 为 True 时直接返回 LocalOrderBook，不构建 DataFrame。
+        """
+        try:
+            orderbook = await self.client.get_order_book(
+                symbol=symbol,
+                limit=depth
+            )
+            
+            if as_book:
+                return LocalOrderBook.from_snapshot(
+                    orderbook['bids'],
+                    orderbook['asks'],
+                    last_update_id=orderbook['lastUpdateId'],
+                    symbol=symbol
+                )
+            
+            result = {
+                'bids': pd.DataFrame(orderbook['bids'], columns=['price', 'quantity']).astype(float),
+                'asks': pd.DataFrame(orderbook['asks'], columns=['price', 'quantity']).astype(float),
+                'timestamp': pd.Timestamp.now()
+            }
+            
+            # 计算累计量
+            result['bids']['cumulative'] = result['bids']['quantity'].cumsum()
+            result['asks']['cumulative'] = result['asks']['quantity'].cumsum()
+            
+            return result
+            
+        except BinanceAPIError as e:
+            logger.error(f"获取订单簿失败: {e}")
+            return {'bids': pd.DataFrame(), 'asks': pd.DataFrame()}
+            
+    async def fetch_ticker(self, symbol: str) -> Dict:
+        """获取24小时价格变动统计"""
+        try:
+            ticker = await self.client.get_ticker(symbol=symbol)
+            return {
+                'price': float(ticker['lastPrice']),
+                'volume': float(ticker['volume']),
+                'high': float(ticker['highPrice']),
+                'low': float(ticker['lowPrice']),
+                'price_change': float(ticker['priceChange']),
+                'price_change_percent': float(ticker['priceChangePercent'])
+            }
+        except BinanceAPIError as e:
+            logger.error(f"获取Ticker失败: {e}")
+            return {}
+            
+    def stream_klines(
+        self,
+        symbol: str,
+        interval: str,
+        on_gap: Optional[Callable[[str, int, int], None]] = None
+    ) -> BinanceStream:
+        """订阅K线推送"""
+        return BinanceStream(
+            f"{symbol.lower()}@kline_{self.INTERVALS[interval]}",
+            parse_kline,
+            base_url=self.stream_url,
+            on_gap=on_gap
+        )
+        
+    def stream_agg_trades(
+        self,
+        symbol: str,
+        on_gap: Optional[Callable[[str, int, int], None]] = None
+    ) -> BinanceStream:
+        """订阅归集成交推送"""
+        return BinanceStream(
+            f"{symbol.lower()}@aggTrade",
+            parse_agg_trade,
+            base_url=self.stream_url,
+            on_gap=on_gap
+        )
+        
+    def stream_depth(
+        self,
+        symbol: str,
+        on_gap: Optional[Callable[[str, int, int], None]] = None
+    ) -> BinanceStream:
+        """订阅增量深度推送（100ms）"""
+        return BinanceStream(
+            f"{symbol.lower()}@depth@100ms",
+            parse_depth,
+            base_url=self.stream_url,
+            on_gap=on_gap
+        )
+        
+    async def stream_order_book(
+        self,
+        symbol: str,
+        snapshot_limit: int = 1000
+    ) -> AsyncIterator[LocalOrderBook]:
+        """维护本地订单簿，每应用一条增量深度产出一次
+        
+        按币安规则同步：先订阅增量，再取快照，丢弃早于快照的增量；
+        出现序号缺口时重新获取快照。产出的始终是同一个订单簿对象。
+        """
+        book = LocalOrderBook(symbol)
+        stream = self.stream_depth(symbol, on_gap=book.invalidate)
+        
+        async for event in stream:
+            if not book.synced:
+                snapshot = await self.client.get_order_book(symbol=symbol, limit=snapshot_limit)
+                book.load_snapshot(snapshot['lastUpdateId'], snapshot['bids'], snapshot['asks'])
+                logger.info(f"订单簿快照已加载: {symbol} lastUpdateId={snapshot['lastUpdateId']}")
+            
+            try:
+                if book.apply_diff(event):
+                    yield book
+            except OrderBookSyncError as e:
+                logger.warning(f"{e}, 重新获取快照")
+        
+    async def close(self):
+        """关闭HTTP连接池"""
+        await self.client.close()
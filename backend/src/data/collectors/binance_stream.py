@@ -0,0 +1,169 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import aiohttp
+import numpy as np
+
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class BinanceStream:
+    """币安 WebSocket 行情订阅
+
+    作为异步迭代器逐条产出解析后的消息；连接断开时按指数退避自动重连，
+    并按消息类型检查序号连续性，发现缺口时回调 on_gap。
+    """
+
+    BASE_URL = 'wss://stream.binance.com:9443'
+
+    def __init__(
+        self,
+        stream: str,
+        parser: Callable[[Dict], Dict],
+        base_url: Optional[str] = None,
+        on_gap: Optional[Callable[[str, int, int], None]] = None,
+        max_reconnects: Optional[int] = None,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        heartbeat: float = 20.0
+    ):
+        self.stream = stream
+        self.parser = parser
+        self.url = f"{(base_url or self.BASE_URL).rstrip('/')}/ws/{stream}"
+        self.on_gap = on_gap
+        self.max_reconnects = max_reconnects
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.heartbeat = heartbeat
+
+        self.reconnects = 0
+        self.gaps = 0
+        self._last_seq: Optional[int] = None
+        self._closed = False
+
+    def _check_sequence(self, message: Dict):
+        """检查序号连续性（parser 给出 seq_first/seq_last/seq_step）"""
+        first = message.get('seq_first')
+        if first is None:
+            return
+        last = message.get('seq_last', first)
+        step = message.get('seq_step', 1)
+
+        if self._last_seq is not None:
+            expected = self._last_seq + step
+            if first > expected:
+                self.gaps += 1
+                logger.warning(f"行情序号缺口: {self.stream} 期望 {expected} 实际 {first}")
+                if self.on_gap:
+                    self.on_gap(self.stream, expected, first)
+            elif last <= self._last_seq:
+                # 重连后重复推送的旧消息
+                message['duplicate'] = True
+                return
+
+        self._last_seq = last
+
+    async def __aiter__(self) -> AsyncIterator[Dict]:
+        delay = self.backoff
+        while not self._closed:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+                        logger.info(f"行情订阅已连接: {self.stream}")
+                        delay = self.backoff
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                message = self.parser(json.loads(msg.data))
+                                if message is None:
+                                    continue
+                                self._check_sequence(message)
+                                if message.pop('duplicate', False):
+                                    continue
+                                yield message
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                            if self._closed:
+                                return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"行情订阅异常: {self.stream} - {e!r}")
+
+            if self._closed:
+                return
+            if self.max_reconnects is not None and self.reconnects >= self.max_reconnects:
+                logger.error(f"行情订阅重连次数超限: {self.stream}")
+                return
+
+            self.reconnects += 1
+            logger.info(f"行情订阅断开, {delay:.1f}s 后重连: {self.stream}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    async def run(self, callback: Callable[[Dict], None]):
+        """以回调方式消费订阅（回调可为普通函数或协程函数）"""
+        async for message in self:
+            result = callback(message)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def close(self):
+        """停止订阅（当前消息处理完后退出）"""
+        self._closed = True
+
+
+def parse_kline(data: Dict) -> Dict:
+    """解析K线推送，以K线开盘时间为序号（仅已收盘K线参与连续性检查）"""
+    k = data['k']
+    message = {
+        'symbol': data['s'],
+        'interval': k['i'],
+        'event_time': data['E'],
+        'open_time': k['t'],
+        'close_time': k['T'],
+        'open': float(k['o']),
+        'high': float(k['h']),
+        'low': float(k['l']),
+        'close': float(k['c']),
+        'volume': float(k['v']),
+        'quote_volume': float(k['q']),
+        'trades': k['n'],
+        'taker_buy_base': float(k['V']),
+        'taker_buy_quote': float(k['Q']),
+        'closed': k['x'],
+    }
+    if k['x']:
+        message['seq_first'] = k['t']
+        message['seq_step'] = k['T'] + 1 - k['t']
+    return message
+
+
+def parse_agg_trade(data: Dict) -> Dict:
+    """解析归集成交推送，归集成交ID连续递增"""
+    return {
+        'symbol': data['s'],
+        'event_time': data['E'],
+        'trade_id': data['a'],
+        'price': float(data['p']),
+        'quantity': float(data['q']),
+        'first_trade_id': data['f'],
+        'last_trade_id': data['l'],
+        'timestamp': data['T'],
+        'is_buyer_maker': data['m'],
+        'seq_first': data['a'],
+    }
+
+
+def parse_depth(data: Dict) -> Dict:
+    """解析增量深度推送，相邻消息满足 U == 上一条 u + 1"""
+    return {
+        'symbol': data['s'],
+        'event_time': data['E'],
+        'first_update_id': data['U'],
+        'final_update_id': data['u'],
+        'bids': np.array(data['b'], dtype=float).reshape(-1, 2),
+        'asks': np.array(data['a'], dtype=float).reshape(-1, 2),
+        'seq_first': data['U'],
+        'seq_last': data['u'],
+    }
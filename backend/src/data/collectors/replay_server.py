@@ -0,0 +1,129 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class RecordedStreamServer:
+    """本地行情回放服务器
+
+    按录制文件在 /ws/<stream> 上回放 WebSocket 推送，用于在测试中替代交易所。
+    每个流维护独立的回放游标：disconnect_after 条消息后主动断开连接，
+    客户端重连后从断点继续推送；skip 中的序号会被跳过，用于模拟序号缺口。
+    """
+
+    def __init__(
+        self,
+        recordings: Dict[str, List[Dict]],
+        host: str = '127.0.0.1',
+        port: int = 0,
+        interval: float = 0.0,
+        disconnect_after: Optional[int] = None,
+        skip: Optional[Set[int]] = None
+    ):
+        self.recordings = recordings
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.disconnect_after = disconnect_after
+        self.skip = skip or set()
+
+        self.cursors = {stream: 0 for stream in recordings}
+        self.connections = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'RecordedStreamServer':
+        """从 JSONL 录制文件加载（每行 {"stream": ..., "data": ...}）"""
+        recordings: Dict[str, List[Dict]] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                recordings.setdefault(record['stream'], []).append(record['data'])
+        return cls(recordings, **kwargs)
+
+    @property
+    def base_url(self) -> str:
+        """供采集器使用的 stream_url"""
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        stream = request.match_info['stream']
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        messages = self.recordings.get(stream, [])
+        sent = 0
+        while self.cursors.get(stream, 0) < len(messages):
+            index = self.cursors[stream]
+            self.cursors[stream] = index + 1
+            if index in self.skip:
+                continue
+
+            await ws.send_str(json.dumps(messages[index]))
+            sent += 1
+            if self.interval:
+                await asyncio.sleep(self.interval)
+            if self.disconnect_after and sent >= self.disconnect_after:
+                break
+
+        await ws.close()
+        return ws
+
+    async def start(self) -> str:
+        """启动服务器，返回 base_url"""
+        app = web.Application()
+        app.router.add_get('/ws/{stream}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # 端口为 0 时取系统分配的实际端口
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"行情回放服务器已启动: {self.base_url}")
+        return self.base_url
+
+    async def stop(self):
+        """停止服务器"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'RecordedStreamServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+
+async def record_stream(
+    stream: str,
+    path: str,
+    count: int,
+    base_url: str = 'wss://stream.binance.com:9443'
+):
+    """从交易所录制指定条数的原始推送，追加写入 JSONL 文件"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(f"{base_url.rstrip('/')}/ws/{stream}") as ws:
+            with open(path, 'a', encoding='utf-8') as f:
+                recorded = 0
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    f.write(json.dumps({'stream': stream, 'data': json.loads(msg.data)}) + '\n')
+                    recorded += 1
+                    if recorded >= count:
+                        break
+    logger.info(f"录制完成: {stream} {recorded} 条 -> {path}")
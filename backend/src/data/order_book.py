@@ -0,0 +1,223 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class OrderBookSyncError(Exception):
+    """增量深度与本地订单簿不连续，需要重新获取快照"""
+    pass
+
+
+class _BookSide:
+    """订单簿单边
+
+    价位以升序 key 存放在预分配的 numpy 数组中，最优价位始终位于末尾：
+    买盘 key = price，卖盘 key = -price。靠近最优价的增删只移动尾部少量元素，
+    查询最优价 O(1)，按价位查询 O(log n)。
+    """
+
+    def __init__(self, is_bid: bool, capacity: int = 1024):
+        self.sign = 1.0 if is_bid else -1.0
+        self.keys = np.empty(capacity, dtype=np.float64)
+        self.qtys = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        # 从最优价位向外的累计量缓存，变更时失效
+        self._cumulative: Optional[np.ndarray] = None
+
+    def clear(self):
+        self.size = 0
+        self._cumulative = None
+
+    def _grow(self):
+        capacity = len(self.keys) * 2
+        keys = np.empty(capacity, dtype=np.float64)
+        qtys = np.empty(capacity, dtype=np.float64)
+        keys[:self.size] = self.keys[:self.size]
+        qtys[:self.size] = self.qtys[:self.size]
+        self.keys, self.qtys = keys, qtys
+
+    def load(self, levels: np.ndarray):
+        """用快照价位整体替换"""
+        levels = levels[levels[:, 1] > 0]
+        keys = levels[:, 0] * self.sign
+        order = np.argsort(keys, kind='stable')
+        n = len(order)
+        while len(self.keys) < n:
+            self._grow()
+        self.keys[:n] = keys[order]
+        self.qtys[:n] = levels[order, 1]
+        self.size = n
+        self._cumulative = None
+
+    def update(self, price: float, qty: float):
+        """设置价位数量，数量为 0 时删除价位"""
+        key = price * self.sign
+        n = self.size
+        i = int(np.searchsorted(self.keys[:n], key))
+        self._cumulative = None
+
+        if i < n and self.keys[i] == key:
+            if qty > 0:
+                self.qtys[i] = qty
+            else:
+                self.keys[i:n - 1] = self.keys[i + 1:n]
+                self.qtys[i:n - 1] = self.qtys[i + 1:n]
+                self.size = n - 1
+        elif qty > 0:
+            if n == len(self.keys):
+                self._grow()
+            self.keys[i + 1:n + 1] = self.keys[i:n]
+            self.qtys[i + 1:n + 1] = self.qtys[i:n]
+            self.keys[i] = key
+            self.qtys[i] = qty
+            self.size = n + 1
+
+    def best(self) -> Tuple[float, float]:
+        """最优价位 (price, qty)，空盘口返回 (nan, 0)"""
+        if self.size == 0:
+            return np.nan, 0.0
+        return float(self.keys[self.size - 1] * self.sign), float(self.qtys[self.size - 1])
+
+    def quantity_at(self, price: float) -> float:
+        """指定价位的挂单量"""
+        key = price * self.sign
+        i = int(np.searchsorted(self.keys[:self.size], key))
+        if i < self.size and self.keys[i] == key:
+            return float(self.qtys[i])
+        return 0.0
+
+    def cumulative(self) -> np.ndarray:
+        """从最优价位向外的累计量"""
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.qtys[:self.size][::-1])
+        return self._cumulative
+
+    def levels(self, depth: Optional[int] = None) -> np.ndarray:
+        """从最优价位向外的 (price, qty) 数组"""
+        n = self.size if depth is None else min(depth, self.size)
+        result = np.empty((n, 2), dtype=np.float64)
+        result[:, 0] = self.keys[self.size - n:self.size][::-1] * self.sign
+        result[:, 1] = self.qtys[self.size - n:self.size][::-1]
+        return result
+
+
+class LocalOrderBook:
+    """本地 L2 订单簿
+
+    由 REST 快照初始化，随后按币安规则应用增量深度（U/u 更新ID）。
+    所有查询直接读取 numpy 数组，不创建 DataFrame。
+    """
+
+    def __init__(self, symbol: str = '', capacity: int = 1024):
+        self.symbol = symbol
+        self.bids = _BookSide(is_bid=True, capacity=capacity)
+        self.asks = _BookSide(is_bid=False, capacity=capacity)
+        self.last_update_id: Optional[int] = None
+        self.event_time: Optional[int] = None
+        self.synced = False
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        bids: Sequence,
+        asks: Sequence,
+        last_update_id: int = 0,
+        symbol: str = ''
+    ) -> 'LocalOrderBook':
+        """由快照价位创建订单簿"""
+        book = cls(symbol)
+        book.load_snapshot(last_update_id, bids, asks)
+        return book
+
+    def load_snapshot(self, last_update_id: int, bids: Sequence, asks: Sequence):
+        """加载快照（价位为 [price, qty] 序列，可为字符串）"""
+        self.bids.load(np.asarray(bids, dtype=np.float64).reshape(-1, 2))
+        self.asks.load(np.asarray(asks, dtype=np.float64).reshape(-1, 2))
+        self.last_update_id = last_update_id
+        self.synced = True
+
+    def invalidate(self, *args):
+        """标记为失步（可直接作为 on_gap 回调），下次需重新加载快照"""
+        self.synced = False
+
+    def apply_diff(self, event: dict) -> bool:
+        """应用一条增量深度，返回是否被应用
+
+        早于快照的旧消息被忽略（返回 False），出现序号缺口时抛出 OrderBookSyncError。
+        """
+        if not self.synced:
+            raise OrderBookSyncError(f"订单簿未同步: {self.symbol}")
+
+        first_id = event['first_update_id']
+        final_id = event['final_update_id']
+        if final_id <= self.last_update_id:
+            return False
+        if first_id > self.last_update_id + 1:
+            self.synced = False
+            raise OrderBookSyncError(
+                f"增量深度不连续: {self.symbol} 期望 {self.last_update_id + 1} 实际 {first_id}"
+            )
+
+        for price, qty in event['bids']:
+            self.bids.update(price, qty)
+        for price, qty in event['asks']:
+            self.asks.update(price, qty)
+
+        self.last_update_id = final_id
+        self.event_time = event.get('event_time')
+        return True
+
+    @property
+    def empty(self) -> bool:
+        return self.bids.size == 0 or self.asks.size == 0
+
+    def best_bid(self) -> Tuple[float, float]:
+        """最优买价 (price, qty)"""
+        return self.bids.best()
+
+    def best_ask(self) -> Tuple[float, float]:
+        """最优卖价 (price, qty)"""
+        return self.asks.best()
+
+    def spread(self) -> float:
+        """买卖价差"""
+        return self.asks.best()[0] - self.bids.best()[0]
+
+    def mid_price(self) -> float:
+        """中间价"""
+        return (self.asks.best()[0] + self.bids.best()[0]) / 2
+
+    def microprice(self) -> float:
+        """按最优档挂单量加权的微观价格"""
+        bid, bid_qty = self.bids.best()
+        ask, ask_qty = self.asks.best()
+        total = bid_qty + ask_qty
+        if total == 0:
+            return (bid + ask) / 2
+        return (bid * ask_qty + ask * bid_qty) / total
+
+    def depth_at(self, side: str, price: float) -> float:
+        """指定价位的挂单量"""
+        return (self.bids if side == 'bid' else self.asks).quantity_at(price)
+
+    def cumulative_depth(self, side: str, levels: int) -> float:
+        """最优价起前 levels 档的累计挂单量"""
+        cumulative = (self.bids if side == 'bid' else self.asks).cumulative()
+        if len(cumulative) == 0 or levels <= 0:
+            return 0.0
+        return float(cumulative[min(levels, len(cumulative)) - 1])
+
+    def cumulative_depth_to_price(self, side: str, price: float) -> float:
+        """从最优价到指定价格（含）的累计挂单量"""
+        book_side = self.bids if side == 'bid' else self.asks
+        n = book_side.size
+        # 价格不劣于 price 的价位即 key >= price * sign 的尾部
+        i = int(np.searchsorted(book_side.keys[:n], price * book_side.sign))
+        count = n - i
+        if count <= 0:
+            return 0.0
+        return float(book_side.cumulative()[count - 1])
+
+    def levels(self, side: str, depth: Optional[int] = None) -> np.ndarray:
+        """从最优价向外的 (price, qty) 数组"""
+        return (self.bids if side == 'bid' else self.asks).levels(depth)
@@ -0,0 +1,126 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+class OHLCVResampler:
+    """OHLCV 聚合器
+
+    将低周期K线按 UTC 纪元对齐的时间桶聚合为高周期K线（与币安K线边界一致），
+    全部使用 numpy 的 reduceat 向量化计算。
+    """
+
+    INTERVAL_MS = {
+        '1m': 60 * 1000,
+        '3m': 3 * 60 * 1000,
+        '5m': 5 * 60 * 1000,
+        '15m': 15 * 60 * 1000,
+        '30m': 30 * 60 * 1000,
+        '1h': 60 * 60 * 1000,
+        '2h': 2 * 60 * 60 * 1000,
+        '4h': 4 * 60 * 60 * 1000,
+        '6h': 6 * 60 * 60 * 1000,
+        '12h': 12 * 60 * 60 * 1000,
+        '1d': 24 * 60 * 60 * 1000,
+    }
+
+    # 聚合方式：first/max/min/last/sum
+    AGGREGATIONS = {
+        'open': 'first',
+        'high': 'max',
+        'low': 'min',
+        'close': 'last',
+        'volume': 'sum',
+        'quote_volume': 'sum',
+        'trades_count': 'sum',
+        'taker_buy_volume': 'sum',
+        'taker_buy_quote_volume': 'sum',
+    }
+
+    @classmethod
+    def can_resample(cls, source_interval: str, target_interval: str) -> bool:
+        """目标周期是否可由源周期整除聚合得到"""
+        source = cls.INTERVAL_MS.get(source_interval)
+        target = cls.INTERVAL_MS.get(target_interval)
+        return bool(source and target and target > source and target % source == 0)
+
+    @staticmethod
+    def bucket_start(timestamps_ms: np.ndarray, bucket_ms: int) -> np.ndarray:
+        """时间戳向下取整到时间桶起点"""
+        return timestamps_ms - timestamps_ms % bucket_ms
+
+    @classmethod
+    def resample_arrays(
+        cls,
+        timestamps_ms: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        bucket_ms: int
+    ) -> Dict[str, np.ndarray]:
+        """按时间桶聚合数组（时间戳需升序）
+
+        返回包含 timestamp（桶起点, ms）、count（桶内源K线数）及各聚合列的字典。
+        """
+        n = len(timestamps_ms)
+        if n == 0:
+            result = {'timestamp': np.empty(0, dtype=np.int64), 'count': np.empty(0, dtype=np.int64)}
+            result.update({name: np.empty(0) for name in columns})
+            return result
+
+        buckets = cls.bucket_start(timestamps_ms, bucket_ms)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.append(starts[1:], n)
+
+        result = {
+            'timestamp': buckets[starts],
+            'count': ends - starts,
+        }
+        for name, values in columns.items():
+            how = cls.AGGREGATIONS.get(name, 'sum')
+            if how == 'first':
+                result[name] = values[starts]
+            elif how == 'last':
+                result[name] = values[ends - 1]
+            elif how == 'max':
+                result[name] = np.maximum.reduceat(values, starts)
+            elif how == 'min':
+                result[name] = np.minimum.reduceat(values, starts)
+            else:
+                result[name] = np.add.reduceat(values, starts)
+        return result
+
+    @classmethod
+    def aggregate(cls, timestamps_ms: np.ndarray, columns: Dict[str, np.ndarray], bucket_ms: int) -> pd.DataFrame:
+        """按时间桶聚合数组，返回以桶起点为索引的 DataFrame（保留各列 dtype，不含 count 列）"""
+        result = cls.resample_arrays(timestamps_ms, columns, bucket_ms)
+        result.pop('count')
+        index = pd.DatetimeIndex(
+            result.pop('timestamp').astype('datetime64[ms]').astype('datetime64[us]'), name='timestamp'
+        )
+        return pd.DataFrame(result, index=index)
+
+    @classmethod
+    def resample(cls, df: pd.DataFrame, target_interval: str) -> pd.DataFrame:
+        """聚合以时间戳为索引的 OHLCV DataFrame
+
+        结果以桶起点为索引，并附带 count 列（桶内源K线数量）。
+        """
+        bucket_ms = cls.INTERVAL_MS[target_interval]
+        index = pd.DatetimeIndex(df.index)
+        timestamps_ms = cls.to_epoch_ms(index)
+        columns = {
+            name: df[name].to_numpy(dtype=np.float64)
+            for name in cls.AGGREGATIONS
+            if name in df.columns
+        }
+        result = cls.resample_arrays(timestamps_ms, columns, bucket_ms)
+        timestamps = pd.to_datetime(result.pop('timestamp'), unit='ms', utc=index.tz is not None)
+        return pd.DataFrame(result, index=pd.Index(timestamps, name='timestamp'))
+
+    @staticmethod
+    def to_epoch_ms(timestamps) -> np.ndarray:
+        """时间戳（DatetimeIndex/Series/datetime64 数组）转换为 int64 毫秒"""
+        index = pd.DatetimeIndex(timestamps)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        return index.values.astype('datetime64[ms]').astype(np.int64)
@@ -0,0 +1,240 @@
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ..processors.resampler import OHLCVResampler
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class ColumnarBarCache:
+    """按 交易对/周期/日 分区的 Arrow IPC K线缓存
+
+    每个已结束的 UTC 自然日保存为一个未压缩的 Arrow IPC 文件，读取时内存映射并只取
+    需要的列。未结束的当天数据不缓存，始终从数据库读取；写入 market_data 的路径
+    负责刷新（refresh）或失效（invalidate）受影响的分区，缓存文件因此始终与数据库一致。
+    缓存在磁盘上，同步进程与 API 进程共享。
+    """
+
+    COLUMNS = [
+        'open', 'high', 'low', 'close', 'volume', 'quote_volume',
+        'trades_count', 'taker_buy_volume', 'taker_buy_quote_volume'
+    ]
+    FILE_SUFFIX = '.arrow'
+
+    def __init__(self, root: Union[str, Path] = 'data/cache/bars'):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config) -> Optional['ColumnarBarCache']:
+        """按配置创建缓存，data.cache_enabled 为 false 时返回 None"""
+        if not config.get('data.cache_enabled', True):
+            return None
+        return cls(config.get('data.cache_path', 'data/cache/bars'))
+
+    # ---- 分区 ----
+
+    def _path(self, symbol: str, interval: str, day: date) -> Path:
+        return self.root / symbol / interval / f'{day.isoformat()}{self.FILE_SUFFIX}'
+
+    @staticmethod
+    def _days(start_time: datetime, end_time: datetime) -> List[date]:
+        days = []
+        day = start_time.date()
+        while day <= end_time.date():
+            days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    @staticmethod
+    def _day_bounds(day: date):
+        """自然日的起止时间（闭区间）"""
+        start = datetime(day.year, day.month, day.day)
+        return start, start + timedelta(days=1) - timedelta(microseconds=1)
+
+    @staticmethod
+    def is_closed(day: date, now: Optional[datetime] = None) -> bool:
+        """该日是否已结束（只有已结束的日才会缓存）"""
+        now = now or datetime.utcnow()
+        return datetime(day.year, day.month, day.day) + timedelta(days=1) <= now
+
+    def _read_table(self, symbol: str, interval: str, day: date) -> Optional[pa.Table]:
+        path = self._path(symbol, interval, day)
+        try:
+            with pa.memory_map(str(path), 'r') as source:
+                return pa.ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            return None
+
+    def read_day(self, symbol: str, interval: str, day: date, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """读取一个分区，不存在时返回 None"""
+        table = self._read_table(symbol, interval, day)
+        if table is None:
+            return None
+        if columns is not None:
+            table = table.select(['timestamp'] + list(columns))
+        df = table.to_pandas(split_blocks=True)
+        return df.set_index('timestamp')
+
+    def write_day(self, symbol: str, interval: str, day: date, df: pd.DataFrame):
+        """写入一个分区（先写临时文件再原子替换，读者不会看到半个文件）"""
+        path = self._path(symbol, interval, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = df[self.COLUMNS].reset_index()
+        frame['timestamp'] = frame['timestamp'].astype('datetime64[ms]')
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, symbol: str, interval: str, start_time: datetime, end_time: datetime) -> int:
+        """删除时间范围覆盖的分区，返回删除数量"""
+        removed = 0
+        for day in self._days(start_time, end_time):
+            path = self._path(symbol, interval, day)
+            if path.exists():
+                path.unlink()
+                removed += 1
+        return removed
+
+    # ---- 读写入口 ----
+
+    def _store_days(self, symbol: str, interval: str, df: pd.DataFrame, now: datetime):
+        """将数据库读出的数据按日切分，写入已结束的日"""
+        if df.empty:
+            return
+        day_keys = df.index.values.astype('datetime64[D]')
+        bounds = np.concatenate(([0], np.flatnonzero(day_keys[1:] != day_keys[:-1]) + 1, [len(df)]))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            day = pd.Timestamp(day_keys[lo]).date()
+            if self.is_closed(day, now):
+                self.write_day(symbol, interval, day, df.iloc[lo:hi])
+
+    def refresh(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        loader: Callable[[datetime, datetime], pd.DataFrame]
+    ):
+        """数据写入后，从数据库重新生成受影响的已结束分区"""
+        now = datetime.utcnow()
+        days = [day for day in self._days(start_time, end_time) if self.is_closed(day, now)]
+        if not days:
+            return
+        self.invalidate(symbol, interval, start_time, end_time)
+        df = loader(self._day_bounds(days[0])[0], self._day_bounds(days[-1])[1])
+        self._store_days(symbol, interval, df, now)
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        loader: Callable[[datetime, datetime], pd.DataFrame],
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """读取 [start_time, end_time]，缺失的分区由 loader 从数据库读取并补写
+
+        loader(start, end) 返回以时间戳为索引、包含 COLUMNS 的 DataFrame（闭区间）。
+        """
+        now = datetime.utcnow()
+        frames = []
+        missing: List[date] = []
+        open_days: List[date] = []
+
+        for day in self._days(start_time, end_time):
+            if not self.is_closed(day, now):
+                open_days.append(day)
+                continue
+            df = self.read_day(symbol, interval, day, columns)
+            if df is None:
+                missing.append(day)
+            else:
+                frames.append(df)
+
+        # 缺失的已结束日按连续区段各查询一次
+        runs = []
+        for day in missing:
+            if runs and runs[-1][1] + timedelta(days=1) == day:
+                runs[-1][1] = day
+            else:
+                runs.append([day, day])
+        for first, last in runs:
+            df = loader(self._day_bounds(first)[0], self._day_bounds(last)[1])
+            self._store_days(symbol, interval, df, now)
+            frames.append(df if columns is None else df[list(columns)])
+
+        if open_days:
+            df = loader(self._day_bounds(open_days[0])[0], end_time)
+            frames.append(df if columns is None else df[list(columns)])
+
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames).sort_index()
+        if missing:
+            logger.debug(f"K线缓存未命中 {len(missing)} 天: {symbol} {interval}")
+        return result.loc[start_time:end_time]
+
+    def read_resampled(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        bucket_ms: int,
+        loader: Callable[[datetime, datetime], pd.DataFrame],
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """按时间桶聚合 [start_time, end_time]，返回以桶起点为索引的 DataFrame
+
+        已缓存的日直接在 Arrow 列上聚合；未缓存或未结束的日按连续区段交给
+        loader(start, end)，由它在数据库内聚合。时间桶整除一天时不会跨日，
+        逐日聚合与整体聚合的结果相同。未缓存的日不补写（补写需要原始K线）。
+        """
+        columns = list(columns or self.COLUMNS)
+        if DAY_MS % bucket_ms:
+            return loader(start_time, end_time)
+
+        now = datetime.utcnow()
+        frames = []
+        pending = None
+        for day in self._days(start_time, end_time):
+            day_start, day_end = self._day_bounds(day)
+            day_start, day_end = max(day_start, start_time), min(day_end, end_time)
+            table = self._read_table(symbol, interval, day) if self.is_closed(day, now) else None
+            if table is None:
+                pending = [pending[0] if pending else day_start, day_end]
+                continue
+            if pending:
+                frames.append(loader(*pending))
+                pending = None
+
+            timestamps = table.column('timestamp').to_numpy().astype('datetime64[ms]').astype(np.int64)
+            start_ms, end_ms = OHLCVResampler.to_epoch_ms([day_start, day_end])
+            lo = np.searchsorted(timestamps, start_ms, side='left')
+            hi = np.searchsorted(timestamps, end_ms, side='right')
+            values = {name: table.column(name).to_numpy()[lo:hi] for name in columns}
+            frames.append(OHLCVResampler.aggregate(timestamps[lo:hi], values, bucket_ms))
+        if pending:
+            frames.append(loader(*pending))
+
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
@@ -0,0 +1,296 @@
+import json
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+MAGIC = b'HAWKHIST'
+VERSION = 1
+# 文件末尾：索引长度（uint64）+ MAGIC
+TRAILER = struct.Struct('<Q8s')
+
+
+class HistoryArchiveWriter:
+    """单个交易对的历史归档文件（.hist）写入器
+
+    文件由若干列块组成，每块是同一张表、同一周期的一段按时间升序的行，
+    各列独立编码后用 zstd 压缩：
+    - int：int64，可选差分（时间戳差分后几乎全为同一个周期值）
+    - fixed：能以不超过 8 位小数无损表示的浮点列转为定点 int64，可选差分（价格）
+    - float：其余浮点列（含 NaN）按 IEEE 位模式与前一个值异或（可选），再按字节拆分
+    文件末尾是 JSON 索引，记录每块的表、周期、时间范围和各列的偏移，
+    读取时按时间范围只解压相交的块和需要的列。
+    写入到临时文件，close 时原子替换。
+    """
+
+    FILE_SUFFIX = '.hist'
+    MAX_DECIMALS = 8
+    MAX_FIXED = 2 ** 53
+
+    def __init__(self, path: Union[str, Path], symbol: str, level: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.symbol = symbol
+        self.codec = pa.Codec('zstd', compression_level=level)
+        self.blocks: List[Dict] = []
+        self._temp = self.path.with_name(self.path.name + '.tmp')
+        self._file = open(self._temp, 'wb')
+        self._file.write(MAGIC)
+
+    def __enter__(self) -> 'HistoryArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # ---- 编码 ----
+
+    @classmethod
+    def _decimals(cls, values: np.ndarray) -> Optional[int]:
+        """无损表示 values 所需的最少小数位数，超过 8 位或含 NaN/inf 时返回 None"""
+        if not np.isfinite(values).all():
+            return None
+        for decimals in range(cls.MAX_DECIMALS + 1):
+            scale = 10 ** decimals
+            scaled = values * scale
+            if np.abs(scaled).max(initial=0.0) >= cls.MAX_FIXED:
+                return None
+            if np.array_equal(np.rint(scaled) / scale, values):
+                return decimals
+        return None
+
+    @classmethod
+    def encode_column(cls, values: np.ndarray, delta: bool) -> Tuple[Dict, bytes]:
+        """编码一列，返回 (列描述, 未压缩字节)"""
+        values = np.asarray(values)
+        if values.dtype.kind in 'iu':
+            encoding, scale, data = 'int', 1, values.astype('<i8')
+        else:
+            values = values.astype(np.float64)
+            decimals = cls._decimals(values)
+            if decimals is not None:
+                scale = 10 ** decimals
+                encoding, data = 'fixed', np.rint(values * scale).astype('<i8')
+            else:
+                encoding, scale, data = 'float', 1, values.astype('<f8').view('<u8')
+
+        if delta and len(data):
+            if encoding == 'float':
+                data = np.bitwise_xor(data, np.concatenate((data[:1] * 0, data[:-1])))
+            else:
+                data = np.diff(data, prepend=data.dtype.type(0))
+        if encoding == 'float':
+            # 按字节拆分：同一字节位置的值放在一起，符号/指数字节高度重复
+            data = np.ascontiguousarray(data.view(np.uint8).reshape(-1, 8).T)
+        return {'encoding': encoding, 'scale': scale, 'delta': bool(delta)}, data.tobytes()
+
+    def write_block(
+        self,
+        table: str,
+        interval: str,
+        columns: Dict[str, np.ndarray],
+        delta_columns: Optional[Set[str]] = None
+    ) -> int:
+        """写入一块，columns 必须包含按升序排列的 int64 毫秒 timestamp 列，返回压缩后字节数"""
+        timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+        rows = len(timestamps)
+        if rows == 0:
+            return 0
+
+        delta_columns = (delta_columns or set()) | {'timestamp'}
+        block = {
+            'table': table,
+            'interval': interval,
+            'start': int(timestamps[0]),
+            'end': int(timestamps[-1]),
+            'rows': rows,
+            'columns': []
+        }
+        written = 0
+        for name, values in columns.items():
+            if len(values) != rows:
+                raise ValueError(f"列长度不一致: {name} {len(values)} != {rows}")
+            description, raw = self.encode_column(timestamps if name == 'timestamp' else values, name in delta_columns)
+            compressed = self.codec.compress(raw, asbytes=True)
+            description.update({
+                'name': name,
+                'offset': self._file.tell(),
+                'length': len(compressed),
+                'size': len(raw)
+            })
+            self._file.write(compressed)
+            block['columns'].append(description)
+            written += len(compressed)
+        self.blocks.append(block)
+        return written
+
+    def close(self):
+        """写入索引并替换目标文件"""
+        if self._file.closed:
+            return
+        footer = json.dumps({
+            'version': VERSION,
+            'symbol': self.symbol,
+            'created_at': datetime.utcnow().isoformat(),
+            'blocks': self.blocks
+        }).encode('utf-8')
+        self._file.write(footer)
+        self._file.write(TRAILER.pack(len(footer), MAGIC))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._temp, self.path)
+
+    def abort(self):
+        """放弃写入，删除临时文件"""
+        if not self._file.closed:
+            self._file.close()
+        if self._temp.exists():
+            self._temp.unlink()
+
+
+class HistoryArchiveReader:
+    """.hist 归档文件读取：按表/周期/时间范围只解压相交的块"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.codec = pa.Codec('zstd')
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是历史归档文件: {self.path}")
+            f.seek(-TRAILER.size, os.SEEK_END)
+            length, magic = TRAILER.unpack(f.read(TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"归档文件不完整: {self.path}")
+            f.seek(-TRAILER.size - length, os.SEEK_END)
+            footer = json.loads(f.read(length).decode('utf-8'))
+        if footer['version'] > VERSION:
+            raise ValueError(f"不支持的归档版本: {footer['version']}")
+        self.symbol = footer['symbol']
+        self.created_at = footer['created_at']
+        self.blocks = footer['blocks']
+
+    @classmethod
+    def discover(cls, directory: Union[str, Path], symbols: Optional[List[str]] = None) -> List[Path]:
+        """目录下的归档文件，可按交易对筛选"""
+        paths = sorted(Path(directory).glob(f'*{HistoryArchiveWriter.FILE_SUFFIX}'))
+        if symbols:
+            wanted = {symbol.upper() for symbol in symbols}
+            paths = [path for path in paths if path.stem.upper() in wanted]
+        return paths
+
+    def series(self) -> List[Tuple[str, str]]:
+        """归档中的 (表, 周期)，按首次出现的顺序"""
+        return list(dict.fromkeys((block['table'], block['interval']) for block in self.blocks))
+
+    def rows(self) -> int:
+        return sum(block['rows'] for block in self.blocks)
+
+    def select(
+        self,
+        table: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> List[Dict]:
+        """与 [start_ms, end_ms] 相交的块，按时间升序"""
+        blocks = [
+            block for block in self.blocks
+            if block['table'] == table and block['interval'] == interval
+            and (start_ms is None or block['end'] >= start_ms)
+            and (end_ms is None or block['start'] <= end_ms)
+        ]
+        return sorted(blocks, key=lambda block: block['start'])
+
+    def decode_column(self, description: Dict, raw: bytes, rows: int) -> np.ndarray:
+        data = np.frombuffer(
+            self.codec.decompress(raw, decompressed_size=description['size'], asbytes=True),
+            dtype=np.uint8
+        )
+        if description['encoding'] == 'float':
+            data = np.ascontiguousarray(data.reshape(8, rows).T).view('<u8').ravel()
+            if description['delta']:
+                data = np.bitwise_xor.accumulate(data)
+            return data.view('<f8')
+
+        data = data.view('<i8')
+        if description['delta']:
+            data = np.cumsum(data)
+        if description['encoding'] == 'fixed':
+            return data.astype(np.float64) / description['scale']
+        return data
+
+    def read_block(self, block: Dict, columns: Optional[List[str]] = None, file=None) -> Dict[str, np.ndarray]:
+        """解压一块，返回 {列名: 数组}（timestamp 为 int64 毫秒）"""
+        wanted = None if columns is None else set(columns) | {'timestamp'}
+        own_file = file is None
+        file = file or open(self.path, 'rb')
+        try:
+            arrays = {}
+            for description in block['columns']:
+                if wanted is not None and description['name'] not in wanted:
+                    continue
+                file.seek(description['offset'])
+                arrays[description['name']] = self.decode_column(
+                    description, file.read(description['length']), block['rows']
+                )
+            return arrays
+        finally:
+            if own_file:
+                file.close()
+
+    def iter_blocks(
+        self,
+        table: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """按时间顺序逐块返回 [start_ms, end_ms] 内的行"""
+        with open(self.path, 'rb') as file:
+            for block in self.select(table, interval, start_ms, end_ms):
+                arrays = self.read_block(block, columns, file)
+                timestamps = arrays['timestamp']
+                lo = 0 if start_ms is None else np.searchsorted(timestamps, start_ms, side='left')
+                hi = len(timestamps) if end_ms is None else np.searchsorted(timestamps, end_ms, side='right')
+                if lo >= hi:
+                    continue
+                if lo > 0 or hi < len(timestamps):
+                    arrays = {name: values[lo:hi] for name, values in arrays.items()}
+                yield arrays
+
+    @staticmethod
+    def to_frame(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """块转为以时间戳为索引的 DataFrame"""
+        arrays = dict(arrays)
+        index = pd.DatetimeIndex(
+            arrays.pop('timestamp').astype('datetime64[ms]').astype('datetime64[us]'), name='timestamp'
+        )
+        return pd.DataFrame(arrays, index=index)
+
+    def read(
+        self,
+        table: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """读取 [start_ms, end_ms] 为一个 DataFrame"""
+        frames = [self.to_frame(arrays) for arrays in self.iter_blocks(table, interval, start_ms, end_ms, columns)]
+        if not frames:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='timestamp'))
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
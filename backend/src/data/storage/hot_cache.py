@@ -0,0 +1,312 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bar_cache import ColumnarBarCache
+from ..processors.resampler import OHLCVResampler
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class BarWindow:
+    """单个交易对/周期最近一段K线的内存窗口
+
+    数据保存在容量为 2 × capacity 的定长数组中，有效区间为 [head, tail)。
+    追加写到尾部，写满时把最后 capacity 条搬到数组开头（均摊 O(1)），
+    有效数据始终连续，可以直接对时间戳做二分查找和切片。
+
+    covered_from/covered_to 表示窗口与数据库一致的时间范围（毫秒，闭区间），
+    该范围内数据库中的全部K线都在窗口里。
+    """
+
+    def __init__(self, capacity: int, columns: List[str]):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.timestamps = np.empty(2 * capacity, dtype=np.int64)
+        self.values = np.empty((2 * capacity, len(self.columns)), dtype=np.float64)
+        self.head = 0
+        self.tail = 0
+        self.covered_from = 0
+        self.covered_to = -1
+        self.checked_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[self.tail - 1]) if self.tail > self.head else None
+
+    def _compact(self, keep: int):
+        """只保留最后 keep 条并移到数组开头，丢弃的K线移出覆盖范围"""
+        keep = min(keep, len(self))
+        start = self.tail - keep
+        if start > self.head:
+            self.covered_from = int(self.timestamps[start]) if keep else self.covered_to + 1
+        self.timestamps[:keep] = self.timestamps[start:self.tail]
+        self.values[:keep] = self.values[start:self.tail]
+        self.head, self.tail = 0, keep
+
+    def _trim(self):
+        """超出容量时丢弃最早的K线，并收缩覆盖范围"""
+        if len(self) > self.capacity:
+            self.head = self.tail - self.capacity
+            self.covered_from = int(self.timestamps[self.head])
+
+    def merge(self, timestamps: np.ndarray, values: np.ndarray, range_start: int, range_end: int) -> bool:
+        """合并数据库中 [range_start, range_end] 的全部K线（已按时间升序）
+
+        返回 False 表示新范围与覆盖范围之间有空档，窗口无法保持连续，应当丢弃。
+        """
+        if self.covered_to >= self.covered_from:
+            if range_start > self.covered_to + 1:
+                return False
+            if range_end < self.covered_from:
+                # 完全早于窗口，与窗口无关
+                return True
+            if range_start < self.covered_from:
+                mask = timestamps >= self.covered_from
+                timestamps, values = timestamps[mask], values[mask]
+                range_start = self.covered_from
+        else:
+            self.covered_from = range_start
+
+        current = self.timestamps[self.head:self.tail]
+        pos = int(np.searchsorted(current, range_start, side='left'))
+        if pos == len(current) or range_end >= current[-1]:
+            # 常见情况：范围覆盖到窗口尾部，截掉范围内的旧K线后追加
+            self.tail = self.head + pos
+            count = len(timestamps)
+            if count > self.capacity:
+                timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+                count = self.capacity
+                self.tail = self.head
+                self.covered_from = int(timestamps[0])
+            if self.tail + count > len(self.timestamps):
+                self._compact(self.capacity - count)
+            self.timestamps[self.tail:self.tail + count] = timestamps
+            self.values[self.tail:self.tail + count] = values
+            self.tail += count
+        else:
+            # 范围落在窗口中间：替换范围内的K线
+            hi = int(np.searchsorted(current, range_end, side='right'))
+            merged_ts = np.concatenate((current[:pos], timestamps, current[hi:]))
+            merged_values = np.concatenate((
+                self.values[self.head:self.head + pos], values, self.values[self.head + hi:self.tail]
+            ))
+            if len(merged_ts) > self.capacity:
+                merged_ts, merged_values = merged_ts[-self.capacity:], merged_values[-self.capacity:]
+                self.covered_from = int(merged_ts[0])
+            count = len(merged_ts)
+            self.timestamps[:count] = merged_ts
+            self.values[:count] = merged_values
+            self.head, self.tail = 0, count
+
+        self.covered_to = max(self.covered_to, range_end)
+        self._trim()
+        return True
+
+    def slice(self, start_ms: int, end_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """二分查找 [start_ms, end_ms] 内的K线"""
+        timestamps = self.timestamps[self.head:self.tail]
+        lo = np.searchsorted(timestamps, start_ms, side='left')
+        hi = np.searchsorted(timestamps, end_ms, side='right')
+        return timestamps[lo:hi], self.values[self.head + lo:self.head + hi]
+
+
+class HotBarCache:
+    """进程内最近K线缓存（单例）
+
+    每个交易对/周期一个 BarWindow，按最近使用顺序在内存预算内淘汰（LRU）。
+    本进程写入数据库后调用 update/refresh 同步窗口；读取超出覆盖范围时按
+    refresh_seconds 节流地从数据库补读窗口尾部，其他进程追加的新K线因此也能读到
+    （其他进程对窗口中间的修改不可见，需调用 invalidate）。
+    """
+
+    _instance: Optional['HotBarCache'] = None
+
+    COLUMNS = ColumnarBarCache.COLUMNS
+    INTEGER_COLUMNS = {'trades_count'}
+    _positions = {name: i for i, name in enumerate(COLUMNS)}
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        memory_budget: int = 64 * 1024 * 1024,
+        refresh_seconds: float = 1.0
+    ):
+        if not hasattr(self, 'initialized'):
+            self.capacity = capacity
+            self.memory_budget = memory_budget
+            self.refresh_seconds = refresh_seconds
+            self._windows: 'OrderedDict[Tuple[str, str], BarWindow]' = OrderedDict()
+            self._lock = threading.RLock()
+            self.hits = 0
+            self.misses = 0
+            self.initialized = True
+
+    @classmethod
+    def from_config(cls, config) -> Optional['HotBarCache']:
+        """按配置创建缓存，data.hot_cache_bars 为 0 时返回 None"""
+        capacity = config.get('data.hot_cache_bars', 10000)
+        if not capacity:
+            return None
+        return cls(
+            capacity=capacity,
+            memory_budget=int(config.get('data.hot_cache_mb', 64)) * 1024 * 1024,
+            refresh_seconds=config.get('data.hot_cache_refresh', 1.0)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(window.nbytes for window in self._windows.values())
+
+    def _evict(self, keep: Tuple[str, str]):
+        """按 LRU 淘汰窗口直到不超出内存预算（不淘汰刚使用的窗口）"""
+        while self.nbytes > self.memory_budget and len(self._windows) > 1:
+            key = next(iter(self._windows))
+            if key == keep:
+                self._windows.move_to_end(key)
+                key = next(iter(self._windows))
+            del self._windows[key]
+            logger.debug(f"淘汰K线窗口: {key}")
+
+    def _to_arrays(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        if df.empty:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(self.COLUMNS)), dtype=np.float64)
+        timestamps = OHLCVResampler.to_epoch_ms(df.index)
+        values = df[self.COLUMNS].to_numpy(dtype=np.float64)
+        return timestamps, values
+
+    @staticmethod
+    def _to_ms(value: datetime) -> int:
+        return (value - EPOCH) // timedelta(milliseconds=1)
+
+    def _frame(self, timestamps: np.ndarray, values: np.ndarray, columns: Optional[List[str]]) -> pd.DataFrame:
+        """切片转换为 DataFrame，只构造需要的列"""
+        index = pd.DatetimeIndex(timestamps.astype('datetime64[ms]').astype('datetime64[us]'), name='timestamp')
+        data = {}
+        for name in (columns or self.COLUMNS):
+            column = values[:, self._positions[name]]
+            # 整数列含缺失值时保留为 NaN 浮点（与 ChunkedReader 读取数据库的结果一致）
+            if name in self.INTEGER_COLUMNS and not np.isnan(column).any():
+                column = column.astype(np.int64)
+            data[name] = column
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def update(
+        self,
+        symbol: str,
+        interval: str,
+        df: pd.DataFrame,
+        range_start: datetime,
+        range_end: datetime
+    ):
+        """数据库中 [range_start, range_end] 被写入 df 后同步到已有窗口"""
+        key = (symbol, interval)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return
+            timestamps, values = self._to_arrays(df)
+            if not window.merge(timestamps, values, self._to_ms(range_start), self._to_ms(range_end)):
+                del self._windows[key]
+
+    def refresh(
+        self,
+        symbol: str,
+        interval: str,
+        range_start: datetime,
+        range_end: datetime,
+        loader: Callable[[datetime, datetime], pd.DataFrame]
+    ):
+        """数据库中 [range_start, range_end] 被写入后，从数据库重新读取该范围同步到已有窗口
+
+        用于写入可能跳过已存在行（不覆盖）的路径，窗口始终与数据库一致。
+        """
+        if (symbol, interval) not in self._windows:
+            return
+        self.update(symbol, interval, loader(range_start, range_end), range_start, range_end)
+
+    def seed(self, symbol: str, interval: str, df: pd.DataFrame, range_start: datetime, range_end: datetime):
+        """用数据库读出的 [range_start, range_end] 建立窗口"""
+        key = (symbol, interval)
+        with self._lock:
+            window = BarWindow(self.capacity, self.COLUMNS)
+            timestamps, values = self._to_arrays(df)
+            window.merge(timestamps, values, self._to_ms(range_start), self._to_ms(range_end))
+            self._windows[key] = window
+            self._windows.move_to_end(key)
+            self._evict(key)
+
+    def invalidate(self, symbol: str, interval: Optional[str] = None):
+        with self._lock:
+            for key in [k for k in self._windows if k[0] == symbol and (interval is None or k[1] == interval)]:
+                del self._windows[key]
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        loader: Optional[Callable[[datetime, datetime], pd.DataFrame]],
+        columns: Optional[List[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """从窗口读取 [start_time, end_time]，窗口不覆盖起点时返回 None
+
+        loader(start, end) 用于补读窗口尾部之后的新K线；loader 为 None 时
+        只读内存，需要补读时同样返回 None。
+        """
+        key = (symbol, interval)
+        start_ms, end_ms = self._to_ms(start_time), self._to_ms(end_time)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or start_ms < window.covered_from:
+                if loader is not None:
+                    self.misses += 1
+                return None
+
+            # 请求超出覆盖范围：节流地补读尾部（含最后一根，可能尚未走完），
+            # 因此其他进程写入的新K线最多延迟 refresh_seconds 可见
+            if end_ms > window.covered_to:
+                now = time.monotonic()
+                if now - window.checked_at >= self.refresh_seconds:
+                    if loader is None:
+                        return None
+                    last = window.last_timestamp
+                    tail_start = min(last, window.covered_to + 1) if last is not None else window.covered_to + 1
+                    tail = loader(pd.Timestamp(tail_start, unit='ms').to_pydatetime(), end_time)
+                    timestamps, values = self._to_arrays(tail)
+                    window.merge(timestamps, values, tail_start, end_ms)
+                    window.checked_at = now
+
+            self._windows.move_to_end(key)
+            self.hits += 1
+            timestamps, values = window.slice(start_ms, end_ms)
+            return self._frame(timestamps, values, columns)
+
+    def stats(self) -> Dict:
+        return {
+            'windows': len(self._windows),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
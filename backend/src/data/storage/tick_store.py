@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from ...utils.logger import Logger
+
+logger = Logger(__name__)
+
+# 单条成交记录：毫秒时间戳、归集成交ID、定点价格、定点数量、标志位，共 33 字节
+TICK_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('trade_id', '<i8'),
+    ('price', '<i8'),
+    ('quantity', '<i8'),
+    ('flags', 'u1'),
+])
+
+# flags 第 0 位：买方为挂单方（即主动卖出）
+FLAG_BUYER_MAKER = 1
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class TickStore:
+    """逐笔成交（aggTrade）紧凑存储
+
+    按 交易对/日期 分区的只追加二进制文件，每个文件是 TICK_DTYPE 记录的连续数组，
+    读取时用 np.memmap 映射，按时间戳二分定位，不需要加载整天的数据。
+    价格与数量以定点整数保存（默认 1e-8 精度，与交易所报价精度一致），
+    缩放系数记录在每个交易对目录下的 meta.json 中。
+
+    写入按归集成交ID去重：ID 不大于已存储最大ID的记录被丢弃，
+    因此回补与实时推送重叠时可以直接重复写入。
+    """
+
+    FILE_SUFFIX = '.ticks'
+    DEFAULT_SCALE = 10 ** 8
+
+    def __init__(self, root: Union[str, Path] = 'data/ticks', scale: int = DEFAULT_SCALE):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.default_scale = scale
+
+        self._meta: Dict[str, Dict] = {}
+        self._last_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ---- 元数据 ----
+
+    def _symbol_dir(self, symbol: str) -> Path:
+        return self.root / symbol.upper()
+
+    def meta(self, symbol: str) -> Dict:
+        """交易对的定点缩放系数，首次写入时创建"""
+        symbol = symbol.upper()
+        if symbol not in self._meta:
+            path = self._symbol_dir(symbol) / 'meta.json'
+            if path.exists():
+                self._meta[symbol] = json.loads(path.read_text())
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                meta = {
+                    'version': 1,
+                    'price_scale': self.default_scale,
+                    'quantity_scale': self.default_scale
+                }
+                path.write_text(json.dumps(meta))
+                self._meta[symbol] = meta
+        return self._meta[symbol]
+
+    def days(self, symbol: str) -> List[str]:
+        """已存储的日期（YYYY-MM-DD），升序"""
+        directory = self._symbol_dir(symbol)
+        if not directory.exists():
+            return []
+        return sorted(p.stem for p in directory.glob(f'*{self.FILE_SUFFIX}'))
+
+    def _day_path(self, symbol: str, day: str) -> Path:
+        return self._symbol_dir(symbol) / f'{day}{self.FILE_SUFFIX}'
+
+    @staticmethod
+    def _day_name(day_index: int) -> str:
+        return str(np.datetime64(int(day_index), 'D'))
+
+    def _open_day(self, symbol: str, day: str) -> np.ndarray:
+        """只读映射一天的记录（空文件返回空数组）"""
+        path = self._day_path(symbol, day)
+        count = path.stat().st_size // TICK_DTYPE.itemsize if path.exists() else 0
+        if count == 0:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+    def _repair(self, path: Path):
+        """截掉崩溃时写了一半的尾部记录"""
+        size = path.stat().st_size
+        remainder = size % TICK_DTYPE.itemsize
+        if remainder:
+            logger.warning(f"截断不完整的尾部记录: {path} ({remainder} 字节)")
+            os.truncate(path, size - remainder)
+
+    def last_trade_id(self, symbol: str) -> Optional[int]:
+        """已存储的最大归集成交ID"""
+        symbol = symbol.upper()
+        if symbol not in self._last_ids:
+            last_id = None
+            for day in reversed(self.days(symbol)):
+                self._repair(self._day_path(symbol, day))
+                records = self._open_day(symbol, day)
+                if len(records):
+                    last_id = int(records['trade_id'][-1])
+                    break
+            self._last_ids[symbol] = last_id
+        return self._last_ids[symbol]
+
+    # ---- 写入 ----
+
+    def encode(
+        self,
+        symbol: str,
+        timestamp,
+        trade_id,
+        price,
+        quantity,
+        is_buyer_maker
+    ) -> np.ndarray:
+        """列数组编码为 TICK_DTYPE 记录"""
+        meta = self.meta(symbol)
+        records = np.empty(len(timestamp), dtype=TICK_DTYPE)
+        records['timestamp'] = np.asarray(timestamp, dtype=np.int64)
+        records['trade_id'] = np.asarray(trade_id, dtype=np.int64)
+        records['price'] = np.rint(np.asarray(price, dtype=np.float64) * meta['price_scale'])
+        records['quantity'] = np.rint(np.asarray(quantity, dtype=np.float64) * meta['quantity_scale'])
+        records['flags'] = np.asarray(is_buyer_maker, dtype=bool).astype(np.uint8) * FLAG_BUYER_MAKER
+        return records
+
+    def append(self, symbol: str, trades: Union[pd.DataFrame, Dict[str, np.ndarray]]) -> int:
+        """追加成交，列为 timestamp/trade_id/price/quantity/is_buyer_maker，返回实际写入条数"""
+        if len(trades['trade_id']) == 0:
+            return 0
+        records = self.encode(
+            symbol,
+            trades['timestamp'],
+            trades['trade_id'],
+            trades['price'],
+            trades['quantity'],
+            trades['is_buyer_maker']
+        )
+        return self.append_records(symbol, records)
+
+    def append_records(self, symbol: str, records: np.ndarray) -> int:
+        """追加已编码的记录（需按成交ID升序）"""
+        symbol = symbol.upper()
+        with self._lock:
+            last_id = self.last_trade_id(symbol)
+            if last_id is not None:
+                records = records[records['trade_id'] > last_id]
+            if len(records) == 0:
+                return 0
+
+            # 按自然日切分，每段顺序追加到对应文件
+            day_index = records['timestamp'] // DAY_MS
+            bounds = np.concatenate(([0], np.flatnonzero(np.diff(day_index)) + 1, [len(records)]))
+            directory = self._symbol_dir(symbol)
+            directory.mkdir(parents=True, exist_ok=True)
+
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                path = self._day_path(symbol, self._day_name(day_index[lo]))
+                if path.exists():
+                    self._repair(path)
+                with open(path, 'ab') as f:
+                    records[lo:hi].tofile(f)
+
+            self._last_ids[symbol] = int(records['trade_id'][-1])
+            return len(records)
+
+    # ---- 读取 ----
+
+    @staticmethod
+    def _bisect(records: np.ndarray, value: int, right: bool = False) -> int:
+        """在映射文件上按时间戳二分，只访问 O(log n) 条记录"""
+        lo, hi = 0, len(records)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            ts = records[mid]['timestamp']
+            if ts < value or (right and ts == value):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    @staticmethod
+    def _to_ms(value: Union[datetime, int]) -> int:
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        if value.tzinfo:
+            value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return int(pd.Timestamp(value).value // 10 ** 6)
+
+    def iter_range(
+        self,
+        symbol: str,
+        start_time: Union[datetime, int],
+        end_time: Union[datetime, int]
+    ) -> Iterator[np.ndarray]:
+        """逐日返回 [start_time, end_time] 内记录的只读视图（不复制）"""
+        start_ms, end_ms = self._to_ms(start_time), self._to_ms(end_time)
+        first_day = self._day_name(start_ms // DAY_MS)
+        last_day = self._day_name(end_ms // DAY_MS)
+
+        for day in self.days(symbol):
+            if day < first_day or day > last_day:
+                continue
+            records = self._open_day(symbol, day)
+            lo = self._bisect(records, start_ms)
+            hi = self._bisect(records, end_ms, right=True)
+            if lo < hi:
+                yield records[lo:hi]
+
+    def read(
+        self,
+        symbol: str,
+        start_time: Union[datetime, int],
+        end_time: Union[datetime, int]
+    ) -> np.ndarray:
+        """读取时间范围内的记录（TICK_DTYPE 数组）"""
+        chunks = list(self.iter_range(symbol, start_time, end_time))
+        if not chunks:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.concatenate(chunks)
+
+    def decode(self, symbol: str, records: np.ndarray) -> pd.DataFrame:
+        """记录解码为以 UTC 时间为索引的 DataFrame"""
+        meta = self.meta(symbol)
+        index = pd.DatetimeIndex(pd.to_datetime(records['timestamp'], unit='ms', utc=True), name='timestamp')
+        return pd.DataFrame({
+            'trade_id': records['trade_id'],
+            'price': records['price'] / meta['price_scale'],
+            'quantity': records['quantity'] / meta['quantity_scale'],
+            'is_buyer_maker': (records['flags'] & FLAG_BUYER_MAKER).astype(bool),
+        }, index=index)
+
+    def read_frame(
+        self,
+        symbol: str,
+        start_time: Union[datetime, int],
+        end_time: Union[datetime, int]
+    ) -> pd.DataFrame:
+        """读取时间范围内的成交并解码"""
+        return self.decode(symbol, self.read(symbol, start_time, end_time))
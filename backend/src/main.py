@@ -8,24 +8,34 @@ from backend.src.utils.logger import Logger
 from src.config.config import Config
 from src.models.database import DatabaseManager
 from src.services.market_data_service import MarketDataService
+from src.services.sync_scheduler import SyncScheduler
 
 logger = Logger(__name__)
 config = Config()
 
 async def init_data_collection():
     """初始化数据收集"""
+    service = MarketDataService()
     try:
-        service = MarketDataService()
         symbols = config.get('api.binance.symbols', ['BTCUSDT'])
         intervals = config.get('api.binance.intervals', ['1m', '5m', '15m'])
         
-        for symbol in symbols:
-            for interval in intervals:
-                logger.info(f"初始化 {symbol} {interval} 历史数据")
-                await service.sync_market_data(symbol, interval)
+        scheduler = SyncScheduler(
+            service,
+            max_concurrency=config.get('api.binance.sync_concurrency', 4)
+        )
+        scheduler.plan(
+            symbols,
+            intervals,
+            history_days=config.get('data.history_days', 30),
+            recent_days=config.get('data.recent_days', 1)
+        )
+        await scheduler.run()
                 
     except Exception as e:
         logger.error(f"数据收集初始化失败: {e}")
+    finally:
+        await service.close()
 
 def init_database():
     """初始化数据库"""
@@ -1,14 +1,39 @@
-from typing import List, Dict, Optional
+from typing import List
 import pandas as pd
-import numpy as np
-from ta.trend import SMAIndicator, EMAIndicator, MACD
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice, OnBalanceVolumeIndicator
+
+from ...models.indicators.graph import IndicatorGraph
 
 class FeatureGenerator:
     """特征生成器"""
     
+    # 特征组：{特征列: 指标计算图节点}，同一次 generate_features 中相同节点只计算一次
+    # （sma_20 与 bb_mid、MACD 与 ema_*、各周期 RSI 的涨跌幅等）
+    FEATURE_GROUPS = {
+        'trend': {
+            **{f'sma_{period}': ('sma', 'close', period) for period in [5, 10, 20, 50, 200]},
+            **{f'ema_{period}': ('ema', 'close', period) for period in [5, 10, 20, 50, 200]},
+            'macd': ('macd', 'close', 12, 26),
+            'macd_signal': ('macd_signal', 'close', 12, 26, 9),
+            'macd_diff': ('macd_hist', 'close', 12, 26, 9),
+        },
+        'momentum': {
+            **{f'rsi_{period}': ('rsi', 'close', period) for period in [6, 12, 24]},
+            'stoch_k': ('stoch_k', 14, 3),
+            'stoch_d': ('stoch_d', 14, 3),
+        },
+        'volatility': {
+            'bb_high': ('bb_upper', 'close', 20, 2),
+            'bb_mid': ('sma', 'close', 20),
+            'bb_low': ('bb_lower', 'close', 20, 2),
+            'atr': ('atr', 14),
+        },
+        'volume': {
+            # VWAP（14 期滚动窗口）
+            'vwap': ('vwap', 14),
+            'obv': ('obv',),
+        },
+    }
+    
     def __init__(self, timeframes: List[str] = None):
         self.timeframes = timeframes or ['1m', '5m', '15m']
         
@@ -21,94 +46,14 @@ class FeatureGenerator:
         if feature_groups is None:
             feature_groups = ['trend', 'momentum', 'volatility', 'volume']
         
-        features = df.copy()
+        outputs = {}
+        for group, group_outputs in self.FEATURE_GROUPS.items():
+            if group in feature_groups:
+                outputs.update(group_outputs)
+        features = IndicatorGraph(df).compute(outputs)
         
-        if 'trend' in feature_groups:
-            features = self._add_trend_indicators(features)
-        if 'momentum' in feature_groups:
-            features = self._add_momentum_indicators(features)
-        if 'volatility' in feature_groups:
-            features = self._add_volatility_indicators(features)
-        if 'volume' in feature_groups:
-            features = self._add_volume_indicators(features)
-        
-        # 删除包含NaN的行
+        # 一次拼接全部特征列，删除包含NaN的行
+        features = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
         features = features.dropna()
         
         return features
-    
-    def _add_trend_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """添加趋势指标"""
-        # SMA
-        for period in [5, 10, 20, 50, 200]:
-            df[f'sma_{period}'] = SMAIndicator(
-                close=df['close'], window=period
-            ).sma_indicator()
-        
-        # EMA
-        for period in [5, 10, 20, 50, 200]:
-            df[f'ema_{period}'] = EMAIndicator(
-                close=df['close'], window=period
-            ).ema_indicator()
-        
-        # MACD
-        macd = MACD(close=df['close'])
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-        df['macd_diff'] = macd.macd_diff()
-        
-        return df
-    
-    def _add_momentum_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """添加动量指标"""
-        # RSI
-        for period in [6, 12, 24]:
-            df[f'rsi_{period}'] = RSIIndicator(
-                close=df['close'], window=period
-            ).rsi()
-        
-        # Stochastic
-        stoch = StochasticOscillator(
-            high=df['high'],
-            low=df['low'],
-            close=df['close']
-        )
-        df['stoch_k'] = stoch.stoch()
-        df['stoch_d'] = stoch.stoch_signal()
-        
-        return df
-    
-    def _add_volatility_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """添加波动率指标"""
-        # Bollinger Bands
-        bb = BollingerBands(close=df['close'])
-        df['bb_high'] = bb.bollinger_hband()
-        df['bb_mid'] = bb.bollinger_mavg()
-        df['bb_low'] = bb.bollinger_lband()
-        
-        # ATR
-        df['atr'] = AverageTrueRange(
-            high=df['high'],
-            low=df['low'],
-            close=df['close']
-        ).average_true_range()
-        
-        return df
-    
-    def _add_volume_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """添加成交量指标"""
-        # VWAP
-        df['vwap'] = VolumeWeightedAveragePrice(
-            high=df['high'],
-            low=df['low'],
-            close=df['close'],
-            volume=df['volume']
-        ).volume_weighted_average_price()
-        
-        # OBV
-        df['obv'] = OnBalanceVolumeIndicator(
-            close=df['close'],
-            volume=df['volume']
-        ).on_balance_volume()
-        
-        return df 
\ No newline at end of file
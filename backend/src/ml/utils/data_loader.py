@@ -5,6 +5,11 @@ import torch
 from torch.utils.data import Dataset, DataLoader
 from sklearn.preprocessing import StandardScaler
 
+from src.models.database import MarketData
+from src.models.chunked_reader import ChunkedReader
+from src.models.bar_store import open_bar_store
+from src.config.config import Config
+
 class TimeSeriesDataset(Dataset):
     """时间序列数据集"""
     
@@ -53,19 +58,21 @@ class MarketDataLoader:
         feature_generator = None
     ) -> Tuple[DataLoader, DataLoader, DataLoader]:
         """加载数据"""
-        # 从数据库加载数据
-        session = self.db_manager.get_session()
-        try:
-            query = f"""
-                SELECT * FROM market_data 
-                WHERE symbol = '{symbol}' 
-                AND interval = '{interval}'
-                AND timestamp BETWEEN '{start_time}' AND '{end_time}'
-                ORDER BY timestamp ASC
-            """
-            df = pd.read_sql(query, session.bind)
-        finally:
-            session.close()
+        # 从数据库加载数据（参数化查询，分块读取）
+        store = open_bar_store(Config(), db=self.db_manager)
+        if store:
+            df = store.read(symbol, interval, start_time, end_time).reset_index()
+        else:
+            reader = ChunkedReader(db=self.db_manager)
+            query = ChunkedReader.range_query(
+                MarketData,
+                symbol,
+                interval,
+                start_time,
+                end_time,
+                [column.name for column in MarketData.__table__.columns]
+            )
+            df = reader.read(query, index=None)
         
         # 生成特征
         if feature_generator:
@@ -0,0 +1,21 @@
+from typing import Optional, Union
+
+from .database import DatabaseManager
+from .compact_store import CompactBarStore
+from .partitioned_store import PartitionedBarStore
+
+BarStore = Union[CompactBarStore, PartitionedBarStore]
+
+LAYOUTS = ('row', 'compact', 'partitioned')
+
+
+def open_bar_store(config, db: Optional[DatabaseManager] = None) -> Optional[BarStore]:
+    """按 database.layout 选择K线存储
+
+    row（默认）返回 None，调用方直接读写 market_data；
+    compact 为 market_bars 紧凑布局，partitioned 为按月分区的 market_data_YYYY_MM。
+    """
+    layout = config.get('database.layout', 'row')
+    if layout not in LAYOUTS:
+        raise ValueError(f"未知的存储布局: {layout}，可选 {', '.join(LAYOUTS)}")
+    return CompactBarStore.from_config(config, db) or PartitionedBarStore.from_config(config, db)
@@ -0,0 +1,223 @@
+import csv
+import io
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, Float, Integer
+
+from .database import DatabaseManager
+from ..utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class BulkWriter:
+    """按数据库方言选择最快写入路径的批量 upsert 写入器
+
+    直接接收 DataFrame 或 numpy 数组字典，按列做类型转换，不逐行构造字典：
+    - SQLite：executemany + INSERT ... ON CONFLICT
+    - PostgreSQL：COPY 到临时表，再 INSERT ... SELECT ... ON CONFLICT
+
+    传入 session 时所有分块在该会话的事务内执行，由调用方提交；
+    否则每个分块单独提交，单次事务大小受 chunk_size 限制。
+    """
+
+    SUPPORTED_DIALECTS = ('sqlite', 'postgresql')
+
+    def __init__(self, chunk_size: int = 5000):
+        self.db = DatabaseManager()
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _naive_utc(values) -> np.ndarray:
+        """时间列转换为不带时区的 UTC datetime64[us]"""
+        index = pd.DatetimeIndex(values)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        return index.values.astype('datetime64[us]')
+
+    def _prepare_columns(
+        self,
+        table,
+        data: Union[pd.DataFrame, Dict[str, np.ndarray]],
+        constants: Optional[Dict] = None,
+        index_column: Optional[str] = None
+    ) -> Dict[str, np.ndarray]:
+        """整理为 {列名: 数组}，只保留表中存在的列"""
+        if isinstance(data, pd.DataFrame):
+            columns = {name: data[name].to_numpy() for name in data.columns}
+            if index_column:
+                columns[index_column] = data.index
+        else:
+            columns = dict(data)
+
+        table_columns = table.columns
+        prepared = {name: values for name, values in columns.items() if name in table_columns}
+        length = len(next(iter(prepared.values()))) if prepared else 0
+
+        for name, value in (constants or {}).items():
+            prepared[name] = np.full(length, value, dtype=object)
+
+        # 未提供的列使用 Python 端默认值（原生 SQL 不会触发 ORM 默认值）
+        for column in table_columns:
+            if column.name in prepared or column.primary_key or column.default is None:
+                continue
+            default = column.default
+            if default.is_scalar:
+                value = default.arg
+            elif default.is_callable:
+                value = default.arg(None)
+            else:
+                continue
+            prepared[column.name] = np.full(length, value, dtype=object)
+
+        return prepared
+
+    @staticmethod
+    def _to_python(values, column_type, dialect: str) -> List:
+        """按列类型转换为驱动可接受的 Python 值，NaN/NaT 转为 None"""
+        if isinstance(column_type, DateTime):
+            timestamps = BulkWriter._naive_utc(values)
+            missing = np.isnat(timestamps)
+            if dialect == 'sqlite':
+                # 与 SQLAlchemy 的 SQLite DateTime 存储格式一致，保证唯一约束和范围比较正确
+                text = np.char.replace(np.datetime_as_string(timestamps, unit='us'), 'T', ' ')
+            else:
+                text = np.datetime_as_string(timestamps, unit='us')
+            result = text.astype(object)
+            result[missing] = None
+            return result.tolist()
+
+        if isinstance(column_type, Integer) and np.asarray(values).dtype.kind in 'iu':
+            # 整数数组直接写入，不经 float64 转换（大于 2**53 的值会丢失精度）
+            return np.asarray(values, dtype=np.int64).tolist()
+
+        if isinstance(column_type, (Float, Integer)):
+            numbers = np.asarray(values, dtype=np.float64)
+            missing = np.isnan(numbers)
+            if isinstance(column_type, Integer):
+                numbers = np.where(missing, 0, numbers).astype(np.int64)
+            if not missing.any():
+                return numbers.tolist()
+            result = numbers.astype(object)
+            result[missing] = None
+            return result.tolist()
+
+        result = np.asarray(values, dtype=object)
+        return result.tolist()
+
+    @staticmethod
+    def _conflict_clause(quote, key_columns: List[str], update_columns: List[str]) -> str:
+        keys = ', '.join(quote(name) for name in key_columns)
+        if not update_columns:
+            return f"ON CONFLICT ({keys}) DO NOTHING"
+        assignments = ', '.join(f"{quote(name)} = excluded.{quote(name)}" for name in update_columns)
+        return f"ON CONFLICT ({keys}) DO UPDATE SET {assignments}"
+
+    def _write_sqlite(self, connection, table, column_list: str, rows: List[tuple], conflict: str):
+        placeholders = ', '.join('?' for _ in rows[0])
+        sql = f"INSERT INTO {table.name} ({column_list}) VALUES ({placeholders}) {conflict}"
+        connection.exec_driver_sql(sql, rows)
+
+    def _write_postgresql(self, connection, table, column_list: str, rows: List[tuple], conflict: str):
+        # 每块重建临时表，事务提交时自动删除
+        staging = f"_staging_{table.name}"
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {staging}")
+        connection.exec_driver_sql(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+        )
+
+        buffer = io.StringIO()
+        # CSV 中未加引号的空字段即为 NULL
+        csv.writer(buffer).writerows(
+            tuple('' if value is None else value for value in row) for row in rows
+        )
+        buffer.seek(0)
+
+        copy_sql = f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+        cursor = connection.connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} ({column_list}) "
+            f"SELECT {column_list} FROM {staging} {conflict}"
+        )
+
+    def write(
+        self,
+        model,
+        data: Union[pd.DataFrame, Dict[str, np.ndarray]],
+        key_columns: List[str],
+        update: bool = False,
+        update_columns: Optional[List[str]] = None,
+        constants: Optional[Dict] = None,
+        index_column: Optional[str] = None,
+        session=None
+    ) -> Dict:
+        """批量写入，返回 {'rows', 'seconds', 'rows_per_second'}
+
+        model: ORM 模型或 Table
+        key_columns: 唯一约束列，冲突时按 update 决定覆盖或跳过
+        update_columns: 冲突时覆盖的列，默认为除键以外的全部写入列
+        constants: 所有行相同的列，如 symbol/interval
+        index_column: DataFrame 的索引写入到该列
+        """
+        table = getattr(model, '__table__', model)
+        started = time.perf_counter()
+
+        columns = self._prepare_columns(table, data, constants, index_column)
+        names = list(columns)
+        total = len(columns[names[0]]) if names else 0
+        if total == 0:
+            return {'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            dialect = session.get_bind().dialect.name
+            if dialect not in self.SUPPORTED_DIALECTS:
+                raise ValueError(f"不支持批量写入的数据库类型: {dialect}")
+
+            if update:
+                update_columns = update_columns or [name for name in names if name not in key_columns]
+            else:
+                update_columns = []
+            # interval 等列名在 PostgreSQL 中是关键字，统一加引号
+            quote = session.get_bind().dialect.identifier_preparer.quote
+            column_list = ', '.join(quote(name) for name in names)
+            conflict = self._conflict_clause(quote, key_columns, update_columns)
+            write_chunk = self._write_sqlite if dialect == 'sqlite' else self._write_postgresql
+
+            # 按列转换一次，再按块切片组装元组
+            values = [self._to_python(columns[name], table.columns[name].type, dialect) for name in names]
+            for offset in range(0, total, self.chunk_size):
+                rows = list(zip(*[column[offset:offset + self.chunk_size] for column in values]))
+                write_chunk(session.connection(), table, column_list, rows, conflict)
+                if own_session:
+                    session.commit()
+
+        except Exception as e:
+            if own_session:
+                session.rollback()
+            logger.error(f"批量写入失败: {table.name} - {e}")
+            raise e
+        finally:
+            if own_session:
+                session.close()
+
+        seconds = time.perf_counter() - started
+        rate = total / seconds if seconds > 0 else float('inf')
+        logger.info(f"批量写入 {table.name}: {total} 条, {seconds:.2f}s, {rate:.0f} 条/秒")
+        return {'rows': total, 'seconds': seconds, 'rows_per_second': rate}
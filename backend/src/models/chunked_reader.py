@@ -0,0 +1,223 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import BigInteger, DateTime, Float, Integer, and_, cast, extract, func, literal_column, select
+
+from .database import DatabaseManager
+from ..data.processors.resampler import OHLCVResampler
+from ..utils.logger import Logger
+
+logger = Logger(__name__)
+
+Chunk = Union[pd.DataFrame, Dict[str, np.ndarray]]
+
+
+class ChunkedReader:
+    """分块流式读取查询结果
+
+    查询以 stream_results 执行（PostgreSQL 使用服务端游标，SQLite 逐批 fetch），
+    每次只取 chunk_size 行并按列类型整列转换为 numpy 数组，
+    长时间范围的任务可以在有界内存中处理。
+    异步接口（aiter_query/aread）走 DatabaseManager 的异步引擎。
+    """
+
+    def __init__(self, chunk_size: int = 50000, db: Optional[DatabaseManager] = None):
+        self.db = db or DatabaseManager()
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def range_query(
+        model,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ):
+        """按交易对/周期/时间范围构造参数化查询（按时间升序），model 为 ORM 模型或 Table"""
+        table = getattr(model, '__table__', model)
+        names = columns or [c.name for c in table.columns if c.name not in ('id', 'symbol', 'interval')]
+        if 'timestamp' not in names:
+            names = ['timestamp'] + list(names)
+        return select(*[table.c[name] for name in names]).where(
+            and_(
+                table.c.symbol == symbol,
+                table.c.interval == interval,
+                table.c.timestamp >= start_time,
+                table.c.timestamp <= end_time
+            )
+        ).order_by(table.c.timestamp)
+
+    @staticmethod
+    def epoch_seconds(column, dialect: str):
+        """DateTime 列（不带时区的 UTC）转换为纪元秒的 SQL 表达式"""
+        if dialect == 'sqlite':
+            return cast(func.strftime(literal_column("'%s'"), column), Integer)
+        if dialect == 'postgresql':
+            return cast(extract('epoch', column), BigInteger)
+        raise ValueError(f"不支持在数据库内按时间桶聚合: {dialect}")
+
+    @staticmethod
+    def aggregate_query(table, bucket, time_column: str, where, match, columns: List[str]):
+        """按时间桶聚合 OHLCV 的查询
+
+        bucket 为带标签的桶起点表达式；high/low/成交量等在 GROUP BY 中以 max/min/sum 聚合，
+        open/close 按桶内首/末根的时间戳回表取值（走唯一索引），不需要窗口函数。
+        match(alias) 返回回表时 alias 与 table 属于同一序列的条件。
+        常量以字面量内联，GROUP BY 与 SELECT 中的桶表达式文本一致（PostgreSQL 要求）。
+        """
+        time = table.c[time_column]
+        aggregates = [bucket, func.min(time).label('first_time'), func.max(time).label('last_time')]
+        functions = {'max': func.max, 'min': func.min, 'sum': func.sum}
+        for name in columns:
+            how = OHLCVResampler.AGGREGATIONS.get(name, 'sum')
+            if how in functions:
+                aggregates.append(functions[how](table.c[name]).label(name))
+        buckets = select(*aggregates).where(where).group_by(bucket).subquery('buckets')
+
+        source = buckets
+        outputs = [buckets.c[bucket.name]]
+        aliases = {}
+        for how, reference in (('first', buckets.c.first_time), ('last', buckets.c.last_time)):
+            if any(OHLCVResampler.AGGREGATIONS.get(name) == how for name in columns):
+                alias = aliases[how] = table.alias(f'{how}_bar')
+                source = source.join(alias, and_(match(alias), alias.c[time_column] == reference))
+        for name in columns:
+            how = OHLCVResampler.AGGREGATIONS.get(name, 'sum')
+            outputs.append(aliases[how].c[name].label(name) if how in aliases else buckets.c[name])
+        return select(*outputs).select_from(source).order_by(buckets.c[bucket.name])
+
+    @classmethod
+    def bucket_query(
+        cls,
+        model,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        bucket_ms: int,
+        dialect: str,
+        columns: Optional[List[str]] = None
+    ):
+        """在数据库内把 [start_time, end_time] 的K线按 UTC 对齐的时间桶聚合
+
+        返回 bucket（桶起点，毫秒）与各列，model 为 ORM 模型或 Table。
+        """
+        table = getattr(model, '__table__', model)
+        columns = list(columns or OHLCVResampler.AGGREGATIONS)
+        seconds = cls.epoch_seconds(table.c.timestamp, dialect)
+        step = literal_column(str(bucket_ms // 1000))
+        bucket = ((seconds - seconds % step) * literal_column('1000')).label('bucket')
+        where = and_(
+            table.c.symbol == symbol,
+            table.c.interval == interval,
+            table.c.timestamp >= start_time,
+            table.c.timestamp <= end_time
+        )
+        return cls.aggregate_query(
+            table, bucket, 'timestamp', where,
+            lambda alias: and_(alias.c.symbol == symbol, alias.c.interval == interval),
+            columns
+        )
+
+    @staticmethod
+    def _convert(values: tuple, column_type) -> np.ndarray:
+        """按列类型整列转换，缺失值为 NaN/NaT"""
+        if isinstance(column_type, DateTime):
+            return np.array(values, dtype='datetime64[us]')
+        if isinstance(column_type, Integer):
+            if None in values:
+                return np.array(values, dtype=np.float64)
+            return np.array(values, dtype=np.int64)
+        if isinstance(column_type, Float):
+            return np.array(values, dtype=np.float64)
+        return np.array(values, dtype=object)
+
+    def _to_chunk(
+        self,
+        rows,
+        names: List[str],
+        columns,
+        as_numpy: bool,
+        index: Optional[str]
+    ) -> Chunk:
+        arrays = {
+            name: self._convert(values, column.type)
+            for name, column, values in zip(names, columns, zip(*rows))
+        }
+        if as_numpy:
+            return arrays
+        df = pd.DataFrame(arrays)
+        if index and index in df.columns:
+            df = df.set_index(index)
+        return df
+
+    def iter_query(
+        self,
+        query,
+        chunk_size: Optional[int] = None,
+        as_numpy: bool = False,
+        index: Optional[str] = 'timestamp',
+        session=None
+    ) -> Iterator[Chunk]:
+        """逐块返回查询结果：DataFrame（以 index 列为索引）或 {列名: 数组}
+
+        传入 session 时在该会话中执行，否则使用独立会话。
+        """
+        chunk_size = chunk_size or self.chunk_size
+        columns = list(query.selected_columns)
+        names = [column.name for column in columns]
+
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            result = session.execute(query.execution_options(stream_results=True))
+            for rows in result.partitions(chunk_size):
+                yield self._to_chunk(rows, names, columns, as_numpy, index)
+        finally:
+            if own_session:
+                session.close()
+
+    async def aiter_query(
+        self,
+        query,
+        chunk_size: Optional[int] = None,
+        as_numpy: bool = False,
+        index: Optional[str] = 'timestamp'
+    ) -> AsyncIterator[Chunk]:
+        """iter_query 的异步版本，通过异步引擎流式读取，等待数据库时不阻塞事件循环"""
+        chunk_size = chunk_size or self.chunk_size
+        columns = list(query.selected_columns)
+        names = [column.name for column in columns]
+
+        async with self.db.get_async_session() as session:
+            result = await session.stream(query)
+            async for rows in result.partitions(chunk_size):
+                yield self._to_chunk(rows, names, columns, as_numpy, index)
+
+    def read(self, query, index: Optional[str] = 'timestamp') -> pd.DataFrame:
+        """读取全部结果为一个 DataFrame"""
+        chunks = list(self.iter_query(query, index=index))
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks)
+
+    def read_buckets(self, query, columns: List[str], session=None) -> pd.DataFrame:
+        """执行 bucket_query，返回以桶起点为索引的 DataFrame"""
+        chunks = list(self.iter_query(query, as_numpy=True, session=session))
+        if not chunks:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+        arrays = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+        index = pd.DatetimeIndex(
+            arrays.pop('bucket').astype('datetime64[ms]').astype('datetime64[us]'), name='timestamp'
+        )
+        return pd.DataFrame({name: arrays[name] for name in columns}, index=index)
+
+    async def aread(self, query, index: Optional[str] = 'timestamp') -> pd.DataFrame:
+        """read 的异步版本"""
+        chunks = [chunk async for chunk in self.aiter_query(query, index=index)]
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks)
@@ -0,0 +1,535 @@
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import and_, func, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .database import DatabaseManager, MarketData, MarketBar, SymbolDictionary, IntervalDictionary
+from .bulk_writer import BulkWriter
+from .chunked_reader import ChunkedReader
+from ..utils.logger import Logger
+
+logger = Logger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+Chunk = Union[pd.DataFrame, Dict[str, np.ndarray]]
+
+
+class CompactBarStore:
+    """紧凑布局的K线存储（market_bars）
+
+    与 market_data 相比：时间戳为 int64 毫秒，交易对/周期为字典表中的整数ID，
+    价格和数量为定点整数，只有一个 (symbol_id, interval_id, ts) 聚簇主键，
+    没有自增ID和额外的单列索引。读写接口接收和返回与 market_data 相同的列，
+    调用方不需要关心编码。
+
+    缩放系数在交易对首次写入时按数据量级确定（最大 1e8），保证编码后的整数
+    小于 2**53，解码时 int64 -> float64 的转换是精确的；小数位数不超过
+    缩放精度的值可以无损往返。之后写入的值超出编码范围时（价格上涨超过预留的
+    100 倍、成交量超过 10000 倍），在同一事务中降低缩放系数并重编码该交易对
+    已存储的K线，已存储值的精度随之降低到新的缩放系数。
+    """
+
+    COLUMNS = [
+        'open', 'high', 'low', 'close', 'volume', 'quote_volume',
+        'trades_count', 'taker_buy_volume', 'taker_buy_quote_volume'
+    ]
+    PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+    QUANTITY_COLUMNS = ['volume', 'taker_buy_volume']
+    QUOTE_COLUMNS = ['quote_volume', 'taker_buy_quote_volume']
+    SCALE_COLUMNS = {
+        **{name: 'price_scale' for name in PRICE_COLUMNS},
+        **{name: 'quantity_scale' for name in QUANTITY_COLUMNS},
+        **{name: 'quote_scale' for name in QUOTE_COLUMNS},
+    }
+
+    MAX_SCALE = 10 ** 8
+    MAX_FIXED = 2 ** 53
+    # 选择缩放系数时预留的量级：价格波动，以及成交量随周期增大（1m -> 1d 约 1440 倍）
+    PRICE_HEADROOM = 100
+    VOLUME_HEADROOM = 10000
+
+    KEY_COLUMNS = ['symbol_id', 'interval_id', 'ts']
+    VIEW_NAME = 'market_data_view'
+
+    def __init__(self, db: Optional[DatabaseManager] = None, chunk_size: int = 50000):
+        self.db = db or DatabaseManager()
+        self.writer = BulkWriter()
+        self.reader = ChunkedReader(chunk_size=chunk_size, db=self.db)
+
+    @classmethod
+    def from_config(cls, config, db: Optional[DatabaseManager] = None) -> Optional['CompactBarStore']:
+        """database.layout 为 compact 时返回存储，否则返回 None（使用 market_data）"""
+        if config.get('database.layout', 'row') != 'compact':
+            return None
+        return cls(db)
+
+    # ---- 字典 ----
+
+    @classmethod
+    def choose_scale(cls, max_abs: float, headroom: int) -> int:
+        """max_abs × headroom 编码后仍小于 2**53 的最大 10 的幂"""
+        scale = cls.MAX_SCALE
+        while scale > 1 and max_abs * headroom * scale >= cls.MAX_FIXED:
+            scale //= 10
+        return scale
+
+    @classmethod
+    def scales_for(cls, data: Union[pd.DataFrame, Dict[str, np.ndarray]]) -> Dict[str, int]:
+        """按数据量级确定缩放系数"""
+        def max_abs(names: List[str]) -> float:
+            values = [np.nanmax(np.abs(np.asarray(data[name], dtype=np.float64)), initial=0.0)
+                      for name in names if name in data]
+            return float(max(values, default=0.0))
+
+        return {
+            'price_scale': cls.choose_scale(max_abs(cls.PRICE_COLUMNS), cls.PRICE_HEADROOM),
+            'quantity_scale': cls.choose_scale(max_abs(cls.QUANTITY_COLUMNS), cls.VOLUME_HEADROOM),
+            'quote_scale': cls.choose_scale(max_abs(cls.QUOTE_COLUMNS), cls.VOLUME_HEADROOM),
+        }
+
+    def _insert_ignore(self, session, model, values: Dict):
+        """插入字典项，已存在（含并发写入）时跳过"""
+        dialect = session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        session.execute(insert(model).values(**values).on_conflict_do_nothing())
+
+    def symbol_info(self, session, symbol: str, data=None) -> Optional[Dict]:
+        """交易对的ID与缩放系数；不存在且提供了 data 时按 data 的量级创建
+
+        字典项在调用方的事务中创建，与K线一起提交或回滚，因此不在进程内缓存。
+        """
+        query = select(SymbolDictionary).where(SymbolDictionary.symbol == symbol)
+        row = session.execute(query).scalar_one_or_none()
+        if row is None:
+            if data is None:
+                return None
+            self._insert_ignore(session, SymbolDictionary, {'symbol': symbol, **self.scales_for(data)})
+            row = session.execute(query).scalar_one()
+        return {
+            'id': row.id,
+            'price_scale': row.price_scale,
+            'quantity_scale': row.quantity_scale,
+            'quote_scale': row.quote_scale,
+        }
+
+    def _fit_scales(self, session, symbol: str, info: Dict, data) -> Dict:
+        """data 超出当前缩放系数的编码范围时降低缩放系数，并按比例重编码已存储的K线（不提交）"""
+        required = self.scales_for(data)
+        changes = {}
+        for scale in ('price_scale', 'quantity_scale', 'quote_scale'):
+            columns = [name for name, column_scale in self.SCALE_COLUMNS.items() if column_scale == scale]
+            max_abs = max((np.nanmax(np.abs(np.asarray(data[name], dtype=np.float64)), initial=0.0)
+                           for name in columns if name in data), default=0.0)
+            if max_abs * info[scale] < self.MAX_FIXED:
+                continue
+            if max_abs >= self.MAX_FIXED:
+                raise ValueError(f"{scale} 对应的列最大绝对值 {max_abs} 超出定点编码范围（2**53），无法写入紧凑布局")
+            changes[scale] = required[scale]
+        if not changes:
+            return info
+
+        values = {}
+        for scale, new_scale in changes.items():
+            factor = float(info[scale] // new_scale)
+            for name, column_scale in self.SCALE_COLUMNS.items():
+                if column_scale == scale:
+                    values[name] = func.round(getattr(MarketBar, name) / factor)
+        session.execute(MarketBar.__table__.update().where(MarketBar.symbol_id == info['id']).values(**values))
+        session.execute(
+            SymbolDictionary.__table__.update().where(SymbolDictionary.id == info['id']).values(**changes)
+        )
+        logger.warning(f"缩放系数不足，已重编码 {symbol} 的K线: "
+                       + ', '.join(f"{scale} {info[scale]} -> {changes[scale]}" for scale in changes))
+        return {**info, **changes}
+
+    def interval_id(self, session, interval: str, create: bool = False) -> Optional[int]:
+        query = select(IntervalDictionary.id).where(IntervalDictionary.interval == interval)
+        interval_id = session.execute(query).scalar()
+        if interval_id is None and create:
+            self._insert_ignore(session, IntervalDictionary, {'interval': interval})
+            interval_id = session.execute(query).scalar()
+        return interval_id
+
+    # ---- 编码 ----
+
+    @staticmethod
+    def _to_ms(value: datetime) -> int:
+        if value.tzinfo:
+            value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return (value - EPOCH) // timedelta(milliseconds=1)
+
+    @staticmethod
+    def _index_ms(index) -> np.ndarray:
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        return index.values.astype('datetime64[ms]').astype(np.int64)
+
+    def encode(self, info: Dict, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """DataFrame（以时间戳为索引）编码为 market_bars 列数组"""
+        arrays = {'ts': self._index_ms(data.index)}
+        for name in self.COLUMNS:
+            if name not in data:
+                continue
+            values = np.asarray(data[name], dtype=np.float64)
+            if name == 'trades_count':
+                arrays[name] = values
+                continue
+            fixed = np.rint(values * info[self.SCALE_COLUMNS[name]])
+            if np.nanmax(np.abs(fixed), initial=0.0) >= self.MAX_FIXED:
+                raise ValueError(f"{name} 按缩放系数 {info[self.SCALE_COLUMNS[name]]} 编码后超出 2**53，"
+                                 f"需先通过 write 降低该交易对的缩放系数")
+            # 缺失值保持为 NaN，由写入器转为 NULL
+            arrays[name] = fixed
+        return arrays
+
+    def decode(self, info: Dict, arrays: Dict[str, np.ndarray], as_numpy: bool = False) -> Chunk:
+        """market_bars 列数组解码为以时间戳为索引的 DataFrame（或 {列名: 数组}）"""
+        decoded = {}
+        for name, values in arrays.items():
+            if name in self.SCALE_COLUMNS:
+                decoded[name] = values.astype(np.float64) / info[self.SCALE_COLUMNS[name]]
+            elif name == 'ts':
+                decoded['timestamp'] = values.astype('datetime64[ms]').astype('datetime64[us]')
+            else:
+                decoded[name] = values
+        if as_numpy:
+            return decoded
+        timestamps = decoded.pop('timestamp')
+        return pd.DataFrame(decoded, index=pd.DatetimeIndex(timestamps, name='timestamp'))
+
+    # ---- 写入 ----
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        data: pd.DataFrame,
+        update: bool = False,
+        update_columns: Optional[List[str]] = None,
+        session=None
+    ) -> Dict:
+        """写入以时间戳为索引、列同 market_data 的 DataFrame，冲突时按 update 覆盖或跳过"""
+        if data.empty:
+            return {'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            info = self._fit_scales(session, symbol, self.symbol_info(session, symbol, data), data)
+            interval_id = self.interval_id(session, interval, create=True)
+            stats = self.writer.write(
+                MarketBar,
+                self.encode(info, data),
+                key_columns=self.KEY_COLUMNS,
+                update=update,
+                update_columns=update_columns,
+                constants={'symbol_id': info['id'], 'interval_id': interval_id},
+                session=session
+            )
+            if own_session:
+                session.commit()
+            return stats
+        except Exception:
+            if own_session:
+                session.rollback()
+            raise
+        finally:
+            if own_session:
+                session.close()
+
+    def delete(self, session, symbol: str, interval: str, start_time: datetime, end_time: datetime) -> int:
+        """删除 [start_time, end_time] 的K线（不提交），返回删除行数"""
+        info, interval_id = self._resolve(session, symbol, interval)
+        if interval_id is None:
+            return 0
+        result = session.execute(MarketBar.__table__.delete().where(
+            and_(
+                MarketBar.symbol_id == info['id'],
+                MarketBar.interval_id == interval_id,
+                MarketBar.ts >= self._to_ms(start_time),
+                MarketBar.ts <= self._to_ms(end_time)
+            )
+        ))
+        return result.rowcount
+
+    # ---- 读取 ----
+
+    def _range_query(self, info: Dict, interval_id: int, start_ms: int, end_ms: int, columns: List[str]):
+        return select(*[getattr(MarketBar, name) for name in ['ts'] + columns]).where(
+            and_(
+                MarketBar.symbol_id == info['id'],
+                MarketBar.interval_id == interval_id,
+                MarketBar.ts >= start_ms,
+                MarketBar.ts <= end_ms
+            )
+        ).order_by(MarketBar.ts)
+
+    def _resolve(self, session, symbol: str, interval: str) -> Tuple[Optional[Dict], Optional[int]]:
+        info = self.symbol_info(session, symbol)
+        interval_id = self.interval_id(session, interval) if info else None
+        return info, interval_id
+
+    def _empty(self, columns: List[str]) -> pd.DataFrame:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+
+    def iter_read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None,
+        as_numpy: bool = False,
+        session=None
+    ) -> Iterator[Chunk]:
+        """按时间顺序分块读取 [start_time, end_time] 并解码"""
+        columns = list(columns or self.COLUMNS)
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            info, interval_id = self._resolve(session, symbol, interval)
+            if interval_id is None:
+                return
+            query = self._range_query(info, interval_id, self._to_ms(start_time), self._to_ms(end_time), columns)
+            for arrays in self.reader.iter_query(query, chunk_size, as_numpy=True, session=session):
+                yield self.decode(info, arrays, as_numpy)
+        finally:
+            if own_session:
+                session.close()
+
+    async def aiter_read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None,
+        as_numpy: bool = False
+    ) -> AsyncIterator[Chunk]:
+        """iter_read 的异步版本（通过异步引擎流式读取）"""
+        columns = list(columns or self.COLUMNS)
+        session = self.db.get_session()
+        try:
+            info, interval_id = self._resolve(session, symbol, interval)
+        finally:
+            session.close()
+        if interval_id is None:
+            return
+        query = self._range_query(info, interval_id, self._to_ms(start_time), self._to_ms(end_time), columns)
+        async for arrays in self.reader.aiter_query(query, chunk_size, as_numpy=True):
+            yield self.decode(info, arrays, as_numpy)
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None,
+        session=None
+    ) -> pd.DataFrame:
+        """读取 [start_time, end_time]，返回以时间戳为索引的 DataFrame（无数据时为空表）"""
+        chunks = list(self.iter_read(symbol, interval, start_time, end_time, columns, session=session))
+        if not chunks:
+            return self._empty(list(columns or self.COLUMNS))
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+    def resample(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        bucket_ms: int,
+        columns: Optional[List[str]] = None,
+        session=None
+    ) -> pd.DataFrame:
+        """在数据库内按时间桶聚合 [start_time, end_time]，返回以桶起点为索引的 DataFrame
+
+        定点整数直接求和/取极值后再解码，缩放系数已为聚合到 1d 预留了量级。
+        """
+        columns = list(columns or self.COLUMNS)
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            info, interval_id = self._resolve(session, symbol, interval)
+            if interval_id is None:
+                return self._empty(columns)
+            bucket = (MarketBar.ts - MarketBar.ts % literal_column(str(int(bucket_ms)))).label('bucket')
+            where = and_(
+                MarketBar.symbol_id == info['id'],
+                MarketBar.interval_id == interval_id,
+                MarketBar.ts >= self._to_ms(start_time),
+                MarketBar.ts <= self._to_ms(end_time)
+            )
+            query = ChunkedReader.aggregate_query(
+                MarketBar.__table__, bucket, 'ts', where,
+                lambda alias: and_(alias.c.symbol_id == info['id'], alias.c.interval_id == interval_id),
+                columns
+            )
+            chunks = []
+            for arrays in self.reader.iter_query(query, as_numpy=True, session=session):
+                arrays['ts'] = arrays.pop('bucket')
+                chunks.append(self.decode(info, arrays))
+        finally:
+            if own_session:
+                session.close()
+        if not chunks:
+            return self._empty(columns)
+        result = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+        return result[columns]
+
+    def timestamps(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> np.ndarray:
+        """有序 int64 毫秒时间戳（只扫描主键）"""
+        info, interval_id = self._resolve(session, symbol, interval)
+        if interval_id is None:
+            return np.empty(0, dtype=np.int64)
+        conditions = [MarketBar.symbol_id == info['id'], MarketBar.interval_id == interval_id]
+        if start_ms is not None:
+            conditions.append(MarketBar.ts >= start_ms)
+        if end_ms is not None:
+            conditions.append(MarketBar.ts <= end_ms)
+        rows = session.execute(select(MarketBar.ts).where(and_(*conditions)).order_by(MarketBar.ts)).fetchall()
+        return np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+
+    def series(self, session) -> List[Tuple[str, str]]:
+        """已存储K线的 (交易对, 周期)，按主键逐一探测"""
+        symbols = session.execute(select(SymbolDictionary.id, SymbolDictionary.symbol)).fetchall()
+        intervals = session.execute(select(IntervalDictionary.id, IntervalDictionary.interval)).fetchall()
+        found = []
+        for symbol_id, symbol in symbols:
+            for interval_id, interval in intervals:
+                exists = session.execute(
+                    select(MarketBar.ts).where(
+                        MarketBar.symbol_id == symbol_id,
+                        MarketBar.interval_id == interval_id
+                    ).limit(1)
+                ).first()
+                if exists is not None:
+                    found.append((symbol, interval))
+        return sorted(found)
+
+    def bounds(self, session, symbol: str, interval: str) -> Optional[Tuple[datetime, datetime]]:
+        """已存储的最早、最晚开盘时间（UTC，不带时区）"""
+        info, interval_id = self._resolve(session, symbol, interval)
+        if interval_id is None:
+            return None
+        first, last = session.execute(
+            select(func.min(MarketBar.ts), func.max(MarketBar.ts)).where(
+                MarketBar.symbol_id == info['id'],
+                MarketBar.interval_id == interval_id
+            )
+        ).one()
+        if first is None:
+            return None
+        return (
+            pd.Timestamp(first, unit='ms').to_pydatetime(),
+            pd.Timestamp(last, unit='ms').to_pydatetime()
+        )
+
+    # ---- 迁移 ----
+
+    def migrate(self, chunk_size: int = 100000, drop_source: bool = False) -> Dict[Tuple[str, str], int]:
+        """将 market_data 中的全部K线复制到 market_bars，返回各交易对/周期的行数
+
+        可重复执行（按主键覆盖）；drop_source 为 True 时，校验行数一致后删除 market_data 中的数据。
+        """
+        session = self.db.get_session()
+        try:
+            series = session.execute(
+                select(MarketData.symbol, MarketData.interval, func.count())
+                .group_by(MarketData.symbol, MarketData.interval)
+            ).fetchall()
+
+            # 缩放系数按该交易对全部数据的量级确定
+            for symbol in sorted({row[0] for row in series}):
+                maxima = session.execute(
+                    select(*[func.max(func.abs(getattr(MarketData, name))).label(name)
+                             for name in self.SCALE_COLUMNS])
+                    .where(MarketData.symbol == symbol)
+                ).one()._asdict()
+                self.symbol_info(session, symbol, {name: [value or 0.0] for name, value in maxima.items()})
+            session.commit()
+        finally:
+            session.close()
+
+        migrated = {}
+        for symbol, interval, count in series:
+            query = ChunkedReader.range_query(
+                MarketData, symbol, interval, datetime.min, datetime.max, self.COLUMNS
+            )
+            written = 0
+            for chunk in self.reader.iter_query(query, chunk_size):
+                written += self.write(symbol, interval, chunk, update=True)['rows']
+            migrated[(symbol, interval)] = written
+            logger.info(f"迁移K线: {symbol} {interval} {written}/{count} 条")
+
+        if drop_source:
+            session = self.db.get_session()
+            try:
+                for symbol, interval, count in series:
+                    info, interval_id = self._resolve(session, symbol, interval)
+                    stored = session.execute(
+                        select(func.count()).select_from(MarketBar).where(
+                            MarketBar.symbol_id == info['id'],
+                            MarketBar.interval_id == interval_id
+                        )
+                    ).scalar()
+                    if stored < count:
+                        raise ValueError(f"迁移后行数不一致: {symbol} {interval} {stored} < {count}")
+                session.query(MarketData).delete(synchronize_session=False)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            logger.info("已删除 market_data 中的原始数据")
+
+        return migrated
+
+    def create_view(self):
+        """创建兼容视图 market_data_view，列与 market_data 相同（只读）"""
+        dialect = self.db.engine.dialect.name
+        def column(name: str) -> str:
+            if name not in self.SCALE_COLUMNS:
+                return f"b.{name} AS {name}"
+            scale = self.SCALE_COLUMNS[name]
+            if dialect == 'sqlite':
+                return f"b.{name} * 1.0 / s.{scale} AS {name}"
+            return f"b.{name}::double precision / s.{scale} AS {name}"
+
+        decoded = ',\n'.join(column(name) for name in self.COLUMNS)
+        if dialect == 'sqlite':
+            # 与 SQLAlchemy 的 SQLite DateTime 存储格式一致
+            timestamp = ("strftime('%Y-%m-%d %H:%M:%S', b.ts / 1000, 'unixepoch') "
+                         "|| printf('.%06d', (b.ts % 1000) * 1000)")
+        else:
+            timestamp = "to_timestamp(b.ts / 1000.0) AT TIME ZONE 'UTC'"
+
+        with self.db.engine.begin() as connection:
+            connection.execute(text(f"DROP VIEW IF EXISTS {self.VIEW_NAME}"))
+            connection.execute(text(
+                f"CREATE VIEW {self.VIEW_NAME} AS SELECT "
+                f"s.symbol AS symbol, i.\"interval\" AS \"interval\", {timestamp} AS \"timestamp\",\n"
+                f"{decoded} "
+                f"FROM market_bars b "
+                f"JOIN symbol_dictionary s ON s.id = b.symbol_id "
+                f"JOIN interval_dictionary i ON i.id = b.interval_id"
+            ))
+        logger.info(f"已创建兼容视图: {self.VIEW_NAME}")
@@ -1,9 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, JSON, Enum, UniqueConstraint
+from sqlalchemy import create_engine, event, Column, Integer, BigInteger, Float, String, Text, DateTime, JSON, Enum, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from datetime import datetime
 import enum
-from typing import Optional
+from typing import Dict, Optional
 from ..config.config import Config
 from pathlib import Path
 
@@ -88,6 +90,52 @@ class MarketData(Base):
         UniqueConstraint('symbol', 'interval', 'timestamp', name='unique_market_data'),
     )
 
+class SymbolDictionary(Base):
+    """交易对字典表（紧凑存储布局）
+
+    price_scale/quantity_scale/quote_scale 为该交易对价格、基础资产数量、
+    计价资产金额的定点缩放系数（10 的幂）。
+    """
+    __tablename__ = 'symbol_dictionary'
+    
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, unique=True)
+    price_scale = Column(BigInteger, nullable=False)
+    quantity_scale = Column(BigInteger, nullable=False)
+    quote_scale = Column(BigInteger, nullable=False)
+
+class IntervalDictionary(Base):
+    """K线周期字典表（紧凑存储布局）"""
+    __tablename__ = 'interval_dictionary'
+    
+    id = Column(Integer, primary_key=True)
+    interval = Column(String(10), nullable=False, unique=True)
+
+class MarketBar(Base):
+    """紧凑布局的市场数据表
+
+    (symbol_id, interval_id, ts) 为聚簇主键（SQLite 为 WITHOUT ROWID 表），
+    ts 为开盘时间的 UTC 毫秒时间戳，价格与数量按 SymbolDictionary 中的缩放系数以定点整数保存。
+    """
+    __tablename__ = 'market_bars'
+    
+    symbol_id = Column(Integer, primary_key=True, autoincrement=False)
+    interval_id = Column(Integer, primary_key=True, autoincrement=False)
+    ts = Column(BigInteger, primary_key=True, autoincrement=False)
+    open = Column(BigInteger, nullable=False)
+    high = Column(BigInteger, nullable=False)
+    low = Column(BigInteger, nullable=False)
+    close = Column(BigInteger, nullable=False)
+    volume = Column(BigInteger, nullable=False)
+    quote_volume = Column(BigInteger, nullable=False)
+    trades_count = Column(Integer)
+    taker_buy_volume = Column(BigInteger)
+    taker_buy_quote_volume = Column(BigInteger)
+    
+    __table_args__ = (
+        {'sqlite_with_rowid': False},
+    )
+
 class DataSyncStatus(Base):
     """数据同步状态表"""
     __tablename__ = 'data_sync_status'
@@ -104,6 +152,21 @@ class DataSyncStatus(Base):
         UniqueConstraint('symbol', 'interval', name='unique_sync_status'),
     )
 
+class DataCoverage(Base):
+    """数据覆盖索引表：已成功同步的连续时间范围（K线开盘时间，闭区间）"""
+    __tablename__ = 'data_coverage'
+    
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+    interval = Column(String(10), nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('symbol', 'interval', 'start_time', name='unique_data_coverage'),
+    )
+
 class TechnicalIndicators(Base):
     """技术指标表"""
     __tablename__ = 'technical_indicators'
@@ -147,6 +210,110 @@ class TechnicalIndicators(Base):
         UniqueConstraint('symbol', 'interval', 'timestamp', name='unique_technical_indicators'),
     )
 
+class IndicatorState(Base):
+    """流式指标状态表：technical_indicators 增量计算的断点，每个交易对/周期一行"""
+    __tablename__ = 'indicator_states'
+    
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+    interval = Column(String(10), nullable=False)
+    timestamp = Column(DateTime, nullable=False)  # 最后一根已计算K线的开盘时间
+    state = Column(Text, nullable=False)  # StreamingIndicatorSet.get_state() 的 JSON
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('symbol', 'interval', name='unique_indicator_state'),
+    )
+
+# SQLite 连接参数：WAL 允许读写并发，NORMAL 同步在 WAL 下只在检查点时 fsync，
+# 页缓存 cache_size 为负数时单位是 KiB
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -65536,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+# 服务端数据库（PostgreSQL 等）的连接池参数
+POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
+
+
+# 异步引擎使用的驱动
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+}
+
+
+def _set_sqlite_pragmas(engine, pragmas: Dict):
+    """在每个新的 SQLite 连接上执行 pragmas"""
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def create_database_engine(
+    db_url: str,
+    echo: bool = False,
+    pragmas: Optional[Dict] = None,
+    pool: Optional[Dict] = None
+):
+    """按数据库类型创建引擎
+
+    SQLite 在每个新连接上执行 pragmas；其他数据库使用 pool 指定的连接池参数。
+    pragmas/pool 为 None 时使用默认配置，传入空字典则不做调整。
+    """
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    pool = POOL_OPTIONS if pool is None else pool
+
+    if not db_url.startswith('sqlite'):
+        return create_engine(db_url, echo=echo, **pool)
+
+    engine = create_engine(db_url, echo=echo)
+    if pragmas:
+        _set_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def to_async_url(db_url: str) -> str:
+    """同步数据库URL转换为对应异步驱动的URL（如 sqlite:// -> sqlite+aiosqlite://）"""
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"不支持异步访问的数据库类型: {backend}")
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}').render_as_string(hide_password=False)
+
+
+def create_async_database_engine(
+    db_url: str,
+    echo: bool = False,
+    pragmas: Optional[Dict] = None,
+    pool: Optional[Dict] = None
+):
+    """创建异步引擎（aiosqlite/asyncpg），连接参数与 create_database_engine 相同"""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    pool = POOL_OPTIONS if pool is None else pool
+    async_url = to_async_url(db_url)
+
+    if not db_url.startswith('sqlite'):
+        return create_async_engine(async_url, echo=echo, **pool)
+
+    engine = create_async_engine(async_url, echo=echo)
+    if pragmas:
+        _set_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
 class DatabaseManager:
     """数据库管理器"""
     _instance: Optional['DatabaseManager'] = None
@@ -172,18 +339,58 @@ class DatabaseManager:
                     db_path = str(data_dir / db_path)
                 db_url = f'sqlite:///{db_path}'
             
-            self.engine = create_engine(
-                db_url,
-                echo=self.config.get('database.echo', False)
-            )
+            self.db_url = db_url
+            self.engine_options = {
+                'echo': self.config.get('database.echo', False),
+                'pragmas': {**SQLITE_PRAGMAS, **(self.config.get('database.sqlite') or {})},
+                'pool': {**POOL_OPTIONS, **(self.config.get('database.pool') or {})}
+            }
+            self.engine = create_database_engine(db_url, **self.engine_options)
             Base.metadata.create_all(self.engine)
-            self.Session = scoped_session(sessionmaker(bind=self.engine))
+            self.session_factory = sessionmaker(bind=self.engine)
+            self.Session = scoped_session(self.session_factory)
+            
+            # 异步引擎在首次使用时创建，只有用到时才需要安装异步驱动
+            self._async_engine = None
+            self._async_session_factory = None
             self.initialized = True
     
     def get_session(self):
-        """获取数据库会话"""
+        """获取数据库会话（线程内共享的 scoped_session）"""
         return self.Session()
     
+    def new_session(self):
+        """创建独立的数据库会话
+        
+        同一事件循环中并发执行的协程共用一个线程，get_session 返回的是同一个会话；
+        跨 await 持有会话的任务需使用独立会话，并由创建者负责关闭。
+        """
+        return self.session_factory()
+    
+    @property
+    def async_engine(self):
+        """异步引擎（SQLite 使用 aiosqlite，PostgreSQL 使用 asyncpg）"""
+        if self._async_engine is None:
+            self._async_engine = create_async_database_engine(self.db_url, **self.engine_options)
+        return self._async_engine
+    
+    def get_async_session(self):
+        """获取异步数据库会话，用法: async with db.get_async_session() as session"""
+        if self._async_session_factory is None:
+            self._async_session_factory = sessionmaker(
+                bind=self.async_engine,
+                class_=AsyncSession,
+                expire_on_commit=False
+            )
+        return self._async_session_factory()
+    
+    async def dispose_async_engine(self):
+        """关闭异步连接池"""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_session_factory = None
+    
     def close_session(self):
         """关闭数据库会话"""
         self.Session.remove()
\ No newline at end of file
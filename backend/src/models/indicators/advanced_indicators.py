@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Union
 
+from . import kernels
+
 class AdvancedIndicators:
     """高级技术指标"""
     
@@ -13,20 +15,15 @@ class AdvancedIndicators:
         signal_period: int = 9
     ) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """计算MACD指标"""
-        # 计算快速和慢速EMA
-        fast_ema = data.ewm(span=fast_period, adjust=False).mean()
-        slow_ema = data.ewm(span=slow_period, adjust=False).mean()
-        
-        # 计算MACD线
-        macd_line = fast_ema - slow_ema
-        
-        # 计算信号线
-        signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
-        
-        # 计算MACD柱状图
-        macd_histogram = macd_line - signal_line
+        macd_line, signal_line, macd_histogram = kernels.macd(
+            data.to_numpy(), fast_period, slow_period, signal_period
+        )
         
-        return macd_line, signal_line, macd_histogram
+        return (
+            pd.Series(macd_line, index=data.index),
+            pd.Series(signal_line, index=data.index),
+            pd.Series(macd_histogram, index=data.index)
+        )
         
     @staticmethod
     def calculate_kdj(
@@ -38,27 +35,13 @@ class AdvancedIndicators:
         m2: int = 3
     ) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """计算KDJ指标"""
-        # 计算RSV
-        low_min = low.rolling(window=n).min()
-        high_max = high.rolling(window=n).max()
-        rsv = 100 * (close - low_min) / (high_max - low_min)
+        k, d, j = kernels.kdj(high.to_numpy(), low.to_numpy(), close.to_numpy(), n, m1, m2)
         
-        # 计算K值
-        k = pd.Series(0.0, index=close.index)
-        k[0] = 50.0
-        for i in range(1, len(close)):
-            k[i] = (m1 * rsv[i] + (n - m1) * k[i-1]) / n
-            
-        # 计算D值
-        d = pd.Series(0.0, index=close.index)
-        d[0] = 50.0
-        for i in range(1, len(close)):
-            d[i] = (m2 * k[i] + (n - m2) * d[i-1]) / n
-            
-        # 计算J值
-        j = 3 * k - 2 * d
-        
-        return k, d, j
+        return (
+            pd.Series(k, index=close.index),
+            pd.Series(d, index=close.index),
+            pd.Series(j, index=close.index)
+        )
         
     @staticmethod
     def calculate_ichimoku(
@@ -71,23 +54,24 @@ class AdvancedIndicators:
         displacement: int = 26
     ) -> dict:
         """计算一目均衡表指标"""
+        def midpoint(period: int) -> pd.Series:
+            """period 期最高价与最低价的中点"""
+            return pd.Series(
+                (kernels.rolling_max(high.to_numpy(), period) + kernels.rolling_min(low.to_numpy(), period)) / 2,
+                index=close.index
+            )
+        
         # 转换线 (Conversion Line)
-        high_conversion = high.rolling(window=conversion_line_period).max()
-        low_conversion = low.rolling(window=conversion_line_period).min()
-        conversion_line = (high_conversion + low_conversion) / 2
+        conversion_line = midpoint(conversion_line_period)
         
         # 基准线 (Base Line)
-        high_base = high.rolling(window=base_line_period).max()
-        low_base = low.rolling(window=base_line_period).min()
-        base_line = (high_base + low_base) / 2
+        base_line = midpoint(base_line_period)
         
         # 先行带A (Leading Span A)
         leading_span_a = ((conversion_line + base_line) / 2).shift(displacement)
         
         # 先行带B (Leading Span B)
-        high_leading = high.rolling(window=leading_span_b_period).max()
-        low_leading = low.rolling(window=leading_span_b_period).min()
-        leading_span_b = ((high_leading + low_leading) / 2).shift(displacement)
+        leading_span_b = midpoint(leading_span_b_period).shift(displacement)
         
         # 延迟线 (Lagging Span)
         lagging_span = close.shift(-displacement)
@@ -109,11 +93,5 @@ class AdvancedIndicators:
         window: int = None
     ) -> pd.Series:
         """计算成交量加权平均价格(VWAP)"""
-        typical_price = (high + low + close) / 3
-        vwap = (typical_price * volume).cumsum() / volume.cumsum()
-        
-        if window:
-            vwap = (typical_price * volume).rolling(window=window).sum() / \
-                   volume.rolling(window=window).sum()
-            
-        return vwap 
\ No newline at end of file
+        vwap = kernels.vwap(high.to_numpy(), low.to_numpy(), close.to_numpy(), volume.to_numpy(), window)
+        return pd.Series(vwap, index=close.index) 
\ No newline at end of file
@@ -0,0 +1,156 @@
+from typing import Dict, Mapping, Tuple, Union
+
+import numpy as np
+
+from . import kernels
+from .kernels import MA_PERIODS, RSI_PERIODS
+
+# 指标计算图：节点以 (运算, 参数...) 为键，例如 ('sma', 'close', 20)、('wilder', ('gain', 'close'), 14, 1)。
+# 参数中的序列引用可以是列名（'close'）或另一个节点的键（('macd', 'close', 12, 26)）。
+# 节点按需递归求解，同一份数据上每个键只计算一次：sma_20 与布林带中轨是同一个节点，
+# 各周期 RSI 共享 close 的差分与涨跌幅，各周期均线共享同一个前缀和，ATR 复用真实波幅。
+# 节点都由 kernels 的函数组成，结果与直接调用 kernels 逐位一致。
+
+Key = Tuple
+Source = Union[str, Key]
+
+
+def _table_outputs() -> Dict[str, Key]:
+    outputs = {}
+    for period in MA_PERIODS:
+        outputs[f'ma_{period}'] = ('sma', 'close', period)
+        outputs[f'ema_{period}'] = ('ema', 'close', period)
+    for period in RSI_PERIODS:
+        outputs[f'rsi_{period}'] = ('rsi', 'close', period)
+    outputs['macd'] = ('macd', 'close', 12, 26)
+    outputs['macd_signal'] = ('macd_signal', 'close', 12, 26, 9)
+    outputs['macd_hist'] = ('macd_hist', 'close', 12, 26, 9)
+    outputs['bb_upper'] = ('bb_upper', 'close', 20, 2)
+    outputs['bb_middle'] = ('sma', 'close', 20)
+    outputs['bb_lower'] = ('bb_lower', 'close', 20, 2)
+    outputs['atr'] = ('atr', 14)
+    outputs['vwap'] = ('vwap', None)
+    outputs['obv'] = ('obv',)
+    return outputs
+
+
+# technical_indicators 表的全部指标列
+INDICATOR_TABLE = _table_outputs()
+
+
+class IndicatorGraph:
+    """一份K线数据（DataFrame 或 {列名: 数组}）上的指标计算图，公共中间结果只计算一次"""
+
+    def __init__(self, data):
+        self.data = data
+        self.cache: Dict[Key, np.ndarray] = {}
+        self.hits = 0
+
+    def get(self, operation: str, *params) -> np.ndarray:
+        """求解节点 (operation, *params)，已计算过的直接取缓存"""
+        key = (operation,) + params
+        if key in self.cache:
+            self.hits += 1
+            return self.cache[key]
+        compute = getattr(self, f'_{operation}', None)
+        if compute is None:
+            raise ValueError(f"未知的指标节点: {operation}")
+        result = compute(*params)
+        self.cache[key] = result
+        return result
+
+    def series(self, source: Source) -> np.ndarray:
+        """列名或节点键对应的序列"""
+        if isinstance(source, str):
+            return self.get('input', source)
+        return self.get(*source)
+
+    def compute(self, outputs: Mapping[str, Key]) -> Dict[str, np.ndarray]:
+        """按 {输出名: 节点键} 求解全部输出"""
+        return {name: self.get(*key) for name, key in outputs.items()}
+
+    def stats(self) -> Dict[str, int]:
+        """已计算的节点数与缓存命中次数"""
+        return {'nodes': len(self.cache), 'hits': self.hits}
+
+    # ---- 节点 ----
+
+    def _input(self, column: str) -> np.ndarray:
+        return kernels.as_array(self.data[column])
+
+    def _diff(self, source: Source) -> np.ndarray:
+        return kernels.delta(self.series(source))
+
+    def _changes(self, source: Source) -> Tuple[np.ndarray, np.ndarray]:
+        return kernels.gains_losses(self.get('diff', source))
+
+    def _gain(self, source: Source) -> np.ndarray:
+        return self.get('changes', source)[0]
+
+    def _loss(self, source: Source) -> np.ndarray:
+        return self.get('changes', source)[1]
+
+    def _prefix_sum(self, source: Source) -> np.ndarray:
+        return kernels.prefix_sum(self.series(source))
+
+    def _rolling_sum(self, source: Source, window: int) -> np.ndarray:
+        return kernels.rolling_sum(self.series(source), window, self.get('prefix_sum', source))
+
+    def _sma(self, source: Source, window: int) -> np.ndarray:
+        return kernels.sma(self.series(source), window, self.get('prefix_sum', source))
+
+    def _rolling_std(self, source: Source, window: int) -> np.ndarray:
+        return kernels.rolling_std(self.series(source), window)
+
+    def _ema(self, source: Source, span: int) -> np.ndarray:
+        return kernels.ema(self.series(source), span)
+
+    def _wilder(self, source: Source, window: int, start: int) -> np.ndarray:
+        return kernels.wilder(self.series(source), window, start)
+
+    def _rsi(self, source: Source, window: int) -> np.ndarray:
+        return kernels.rsi_from_averages(
+            self.get('wilder', ('gain', source), window, 1),
+            self.get('wilder', ('loss', source), window, 1)
+        )
+
+    def _macd(self, source: Source, fast_period: int, slow_period: int) -> np.ndarray:
+        return self.get('ema', source, fast_period) - self.get('ema', source, slow_period)
+
+    def _macd_signal(self, source: Source, fast_period: int, slow_period: int, signal_period: int) -> np.ndarray:
+        return self.get('ema', ('macd', source, fast_period, slow_period), signal_period)
+
+    def _macd_hist(self, source: Source, fast_period: int, slow_period: int, signal_period: int) -> np.ndarray:
+        return (
+            self.get('macd', source, fast_period, slow_period)
+            - self.get('macd_signal', source, fast_period, slow_period, signal_period)
+        )
+
+    def _bb_upper(self, source: Source, window: int, num_std: float) -> np.ndarray:
+        return self.get('sma', source, window) + num_std * self.get('rolling_std', source, window)
+
+    def _bb_lower(self, source: Source, window: int, num_std: float) -> np.ndarray:
+        return self.get('sma', source, window) - num_std * self.get('rolling_std', source, window)
+
+    def _stochastic(self, window: int, smooth_window: int) -> Tuple[np.ndarray, np.ndarray]:
+        return kernels.stochastic(self.series('high'), self.series('low'), self.series('close'), window, smooth_window)
+
+    def _stoch_k(self, window: int, smooth_window: int) -> np.ndarray:
+        return self.get('stochastic', window, smooth_window)[0]
+
+    def _stoch_d(self, window: int, smooth_window: int) -> np.ndarray:
+        return self.get('stochastic', window, smooth_window)[1]
+
+    def _true_range(self) -> np.ndarray:
+        return kernels.true_range(self.series('high'), self.series('low'), self.series('close'))
+
+    def _atr(self, window: int) -> np.ndarray:
+        return self.get('wilder', ('true_range',), window, 0)
+
+    def _vwap(self, window) -> np.ndarray:
+        return kernels.vwap(
+            self.series('high'), self.series('low'), self.series('close'), self.series('volume'), window
+        )
+
+    def _obv(self) -> np.ndarray:
+        return kernels.obv(self.series('close'), self.series('volume'))
@@ -0,0 +1,332 @@
+import numpy as np
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+from scipy.signal import lfilter
+from typing import Optional, Tuple
+
+# 技术指标的向量化批量实现，全部指标只在这里实现一次：
+# TechnicalIndicators/AdvancedIndicators 直接调用这些函数，TechnicalAnalysisService、FeatureGenerator
+# 与 TrendFollowingStrategy 经 graph.py 的指标计算图组合调用，共享中间结果。
+# 输入为 float64 或 float32 数组（其它类型按 float64），输出与输入精度相同；
+# 前缀和在 float64 中累加，float32 输入的长序列均线不会因累加误差失真。
+#
+# float64 输入时每个函数与 streaming.py 中对应的流式指标按相同顺序做相同的浮点运算，
+# 批量结果与逐根K线 update 的结果逐位一致：
+# - 移动平均用前缀和（np.cumsum，顺序累加）之差除以窗口长度；
+# - EMA 与 Wilder 平滑是一阶递推 y = alpha * x + (1 - alpha) * y，由 recursive_filter（lfilter）向量化；
+# - 布林带标准差在每个窗口内两遍顺序求和（样本标准差，ddof=1）。
+# 预热期不足的位置为 NaN。
+#
+# 输入中的 NaN（缺失值）按 pandas 的语义处理，不会污染之后的全部结果：
+# - 滚动类指标（均线、滚动求和/极值/标准差）只有窗口内含 NaN 时为 NaN，NaN 移出窗口后恢复；
+# - 递推类指标（EMA、Wilder 平滑、KDJ）跳过 NaN，该位置沿用上一个值，
+#   即 pandas ewm(adjust=False, ignore_na=True) 的定义；
+# - 累计类指标（累计 VWAP、OBV）中 NaN 所在K线不计入累计。
+
+# 指标表（technical_indicators）使用的周期
+MA_PERIODS = (5, 10, 20, 50, 200)
+RSI_PERIODS = (6, 12, 24)
+
+
+def as_array(values) -> np.ndarray:
+    """转为连续的 float32/float64 数组"""
+    values = np.asarray(values)
+    dtype = values.dtype if values.dtype in (np.float32, np.float64) else np.float64
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+def _as_arrays(*values) -> Tuple[np.ndarray, ...]:
+    """多个输入统一精度：全部为 float32 时保持 float32，否则为 float64"""
+    arrays = [as_array(value) for value in values]
+    dtype = np.result_type(*arrays)
+    return tuple(np.ascontiguousarray(array, dtype=dtype) for array in arrays)
+
+
+def prefix_sum(values) -> np.ndarray:
+    """以 0 开头的 float64 前缀和（长度 len(values) + 1），滚动求和与均线由它相减得到
+
+    NaN 按 0 累加，含 NaN 的窗口由 _mask_missing 置为 NaN。
+    """
+    values = as_array(values)
+    missing = np.isnan(values)
+    if missing.any():
+        values = np.where(missing, values.dtype.type(0), values)
+    prefix = np.zeros(len(values) + 1)
+    np.cumsum(values, dtype=np.float64, out=prefix[1:])
+    return prefix
+
+
+def _mask_missing(result: np.ndarray, values: np.ndarray, window: int) -> np.ndarray:
+    """窗口内含 NaN 的位置置为 NaN（同 pandas rolling 的 min_periods=window），返回 result"""
+    missing = np.isnan(values)
+    if len(values) >= window and missing.any():
+        counts = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(missing, out=counts[1:])
+        result[window - 1:][counts[window:] - counts[:-window] > 0] = np.nan
+    return result
+
+
+def recursive_filter(values, gain: float, decay: float, initial: float) -> np.ndarray:
+    """一阶递推（IIR）滤波：y[i] = gain * values[i] + decay * y[i-1]，y[-1] = initial
+
+    即线性滤波器 lfilter([gain], [1, -decay])，循环在 C 中完成；
+    EMA（gain = alpha）、Wilder 平滑（gain = 1 / window）与 KDJ 的 K、D 都由它构成。
+    values 中的 NaN 被跳过：递推只作用于有效值，NaN 位置沿用上一个输出。
+    """
+    values = as_array(values)
+    if len(values) == 0:
+        return values.copy()
+    dtype = values.dtype.type
+    valid = ~np.isnan(values)
+    if not valid.all():
+        filtered = recursive_filter(values[valid], gain, decay, initial)
+        held = np.concatenate((np.array([initial], dtype=values.dtype), filtered))
+        return held[np.cumsum(valid)]
+    gain, decay = dtype(gain), dtype(decay)
+    return lfilter(
+        np.array([gain]), np.array([dtype(1.0), -decay]), values, zi=np.array([decay * dtype(initial)])
+    )[0]
+
+
+def _smooth(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """指数平滑 y[i] = alpha * values[i] + (1 - alpha) * y[i-1]"""
+    alpha = values.dtype.type(alpha)
+    return recursive_filter(values, alpha, values.dtype.type(1.0) - alpha, initial)
+
+
+def rolling_sum(values, window: int, prefix: Optional[np.ndarray] = None) -> np.ndarray:
+    """滚动求和（前缀和之差，已有 values 的前缀和时可传入 prefix）"""
+    values = as_array(values)
+    result = np.full(len(values), np.nan, dtype=values.dtype)
+    if len(values) >= window:
+        prefix = prefix_sum(values) if prefix is None else prefix
+        result[window - 1:] = prefix[window:] - prefix[:-window]
+    return _mask_missing(result, values, window)
+
+
+def sma(values, window: int, prefix: Optional[np.ndarray] = None) -> np.ndarray:
+    """简单移动平均（已有 values 的前缀和时可传入 prefix）"""
+    values = as_array(values)
+    result = np.full(len(values), np.nan, dtype=values.dtype)
+    if len(values) >= window:
+        prefix = prefix_sum(values) if prefix is None else prefix
+        result[window - 1:] = (prefix[window:] - prefix[:-window]) / window
+    return _mask_missing(result, values, window)
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """滚动最大值（单调队列算法，与窗口长度无关）"""
+    values = as_array(values)
+    result = np.full(len(values), np.nan, dtype=values.dtype)
+    if len(values) >= window:
+        result[window - 1:] = maximum_filter1d(values, window, origin=(window - 1) // 2)[window - 1:]
+    return _mask_missing(result, values, window)
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """滚动最小值（单调队列算法，与窗口长度无关）"""
+    values = as_array(values)
+    result = np.full(len(values), np.nan, dtype=values.dtype)
+    if len(values) >= window:
+        result[window - 1:] = minimum_filter1d(values, window, origin=(window - 1) // 2)[window - 1:]
+    return _mask_missing(result, values, window)
+
+
+def rolling_std(values, window: int) -> np.ndarray:
+    """滚动样本标准差（ddof=1），每个窗口先求均值再求离差平方和"""
+    values = as_array(values)
+    result = np.full(len(values), np.nan, dtype=values.dtype)
+    if len(values) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        total = windows[:, 0].copy()
+        for k in range(1, window):
+            total += windows[:, k]
+        mean = total / window
+        squares = (windows[:, 0] - mean) * (windows[:, 0] - mean)
+        for k in range(1, window):
+            squares += (windows[:, k] - mean) * (windows[:, k] - mean)
+        result[window - 1:] = np.sqrt(squares / (window - 1))
+    return result
+
+
+def _first_valid(values: np.ndarray) -> int:
+    """首个非 NaN 值的下标，全为 NaN 时返回 len(values)"""
+    if len(values) and not np.isnan(values[0]):
+        return 0
+    valid = np.flatnonzero(~np.isnan(values))
+    return int(valid[0]) if len(valid) else len(values)
+
+
+def ema(values, span: int) -> np.ndarray:
+    """指数移动平均（alpha = 2 / (span + 1)，以首个有效值为初值）
+
+    定义同 pandas ewm(adjust=False, ignore_na=True)。
+    """
+    values = as_array(values)
+    result = np.full_like(values, np.nan)
+    first = _first_valid(values)
+    if first < len(values):
+        result[first] = values[first]
+        result[first + 1:] = _smooth(values[first + 1:], 2.0 / (span + 1), values[first])
+    return result
+
+
+def wilder(values, window: int, start: int = 0) -> np.ndarray:
+    """Wilder 平滑：从 start 起的前 window 个有效值取均值作初值，之后 alpha = 1 / window 递推"""
+    values = as_array(values)
+    result = np.full(len(values), np.nan, dtype=values.dtype)
+    seed_index = start + window - 1
+    if len(values) > seed_index:
+        seed_values = values[start:seed_index + 1]
+        if np.isnan(seed_values).any():
+            valid = np.flatnonzero(~np.isnan(values[start:]))
+            if len(valid) < window:
+                return result
+            seed_index = start + int(valid[window - 1])
+            seed_values = values[start:][valid[:window]]
+        seed = np.cumsum(seed_values)[-1] / window
+        result[seed_index] = seed
+        result[seed_index + 1:] = _smooth(values[seed_index + 1:], 1.0 / window, seed)
+    return result
+
+
+def delta(values) -> np.ndarray:
+    """一阶差分，首个值为 0"""
+    values = as_array(values)
+    result = np.zeros_like(values)
+    result[1:] = values[1:] - values[:-1]
+    return result
+
+
+def gains_losses(changes) -> Tuple[np.ndarray, np.ndarray]:
+    """差分拆为上涨幅度与下跌幅度（均为非负）"""
+    changes = as_array(changes)
+    zero = changes.dtype.type(0)
+    return np.where(changes > 0, changes, zero), np.where(changes < 0, -changes, zero)
+
+
+def rsi_from_averages(average_gain, average_loss) -> np.ndarray:
+    """由平均涨幅与平均跌幅计算 RSI"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - 100 / (1 + average_gain / average_loss)
+
+
+def rsi(close, window: int = 14) -> np.ndarray:
+    """Wilder RSI，第 window 根K线起有值"""
+    gain, loss = gains_losses(delta(close))
+    return rsi_from_averages(wilder(gain, window, start=1), wilder(loss, window, start=1))
+
+
+def macd(
+    close,
+    fast_period: int = 12,
+    slow_period: int = 26,
+    signal_period: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD 线、信号线、柱状图"""
+    close = as_array(close)
+    macd_line = ema(close, fast_period) - ema(close, slow_period)
+    signal_line = ema(macd_line, signal_period)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger_bands(
+    close,
+    window: int = 20,
+    num_std: float = 2
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """布林带上轨、中轨、下轨"""
+    middle = sma(close, window)
+    std = rolling_std(close, window)
+    return middle + num_std * std, middle, middle - num_std * std
+
+
+def stochastic(
+    high,
+    low,
+    close,
+    window: int = 14,
+    smooth_window: int = 3
+) -> Tuple[np.ndarray, np.ndarray]:
+    """随机指标 %K 与 %D（%K 的 smooth_window 期均线）"""
+    high, low, close = _as_arrays(high, low, close)
+    lowest = rolling_min(low, window)
+    highest = rolling_max(high, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100 * (close - lowest) / (highest - lowest)
+    d = np.full_like(k, np.nan)
+    if len(k) >= window:
+        d[window - 1:] = sma(k[window - 1:], smooth_window)
+    return k, d
+
+
+def kdj(
+    high,
+    low,
+    close,
+    n: int = 9,
+    m1: int = 3,
+    m2: int = 3
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """KDJ 指标
+
+    RSV 为收盘价在 n 期最高最低价区间中的位置（区间为 0 时取 50）；
+    K = (m1 * RSV + (n - m1) * K') / n，D = (m2 * K + (n - m2) * D') / n，
+    K、D 从首个有效 RSV 起递推，前值取 50；J = 3K - 2D。
+    """
+    high, low, close = _as_arrays(high, low, close)
+    k = np.full_like(close, np.nan)
+    d = np.full_like(close, np.nan)
+    if len(close) >= n:
+        lowest = rolling_min(low, n)[n - 1:]
+        highest = rolling_max(high, n)[n - 1:]
+        spread = highest - lowest
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsv = np.where(spread > 0, 100 * (close[n - 1:] - lowest) / spread, 50)
+        rsv[np.isnan(spread)] = np.nan
+        k[n - 1:] = recursive_filter(rsv, m1 / n, (n - m1) / n, 50)
+        d[n - 1:] = recursive_filter(k[n - 1:], m2 / n, (n - m2) / n, 50)
+    return k, d, 3 * k - 2 * d
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """真实波幅，首根K线为 high - low"""
+    high, low, close = _as_arrays(high, low, close)
+    result = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        result[1:] = np.maximum(
+            np.maximum(result[1:], np.abs(high[1:] - previous)),
+            np.abs(low[1:] - previous)
+        )
+    return result
+
+
+def atr(high, low, close, window: int = 14) -> np.ndarray:
+    """平均真实波幅（Wilder 平滑）"""
+    return wilder(true_range(high, low, close), window)
+
+
+def vwap(high, low, close, volume, window: Optional[int] = None) -> np.ndarray:
+    """成交量加权平均价：默认自序列起点累计，指定 window 时为滚动窗口"""
+    high, low, close, volume = _as_arrays(high, low, close, volume)
+    typical_price = (high + low + close) / 3
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if window:
+            return rolling_sum(typical_price * volume, window) / rolling_sum(volume, window)
+        amount = typical_price * volume
+        missing = np.isnan(amount)
+        if missing.any():
+            amount = np.where(missing, 0, amount)
+            volume = np.where(missing, 0, volume)
+        amount = np.cumsum(amount, dtype=np.float64)
+        return (amount / np.cumsum(volume, dtype=np.float64)).astype(close.dtype, copy=False)
+
+
+def obv(close, volume) -> np.ndarray:
+    """能量潮，首根K线为 0"""
+    close, volume = _as_arrays(close, volume)
+    flow = np.zeros_like(close)
+    flow[1:] = np.sign(delta(close)[1:]) * volume[1:]
+    flow[np.isnan(flow)] = 0
+    return np.cumsum(flow, dtype=np.float64).astype(close.dtype, copy=False)
+
@@ -0,0 +1,371 @@
+import math
+import numbers
+from collections import deque
+from typing import Dict, Mapping, Tuple, Union
+
+from .kernels import MA_PERIODS, RSI_PERIODS, prefix_sum
+from .graph import IndicatorGraph, Source
+
+# 逐根K线更新的流式指标：update(bar) 只做常数次运算并返回最新值，预热期内为 NaN。
+# 运算顺序与 kernels.py 的批量实现相同，对同一序列逐根 update 的结果与批量计算逐位一致。
+# bar 可以是数值，也可以是含 open/high/low/close/volume 的映射（dict、DataFrame 的一行）。
+# seed(graph) 由 float64 K线上批量计算图的结果直接设置状态，
+# 与从头逐根 update 同一序列后的状态逐位一致，长历史无需在 Python 中逐根回放。
+
+Bar = Union[float, Mapping[str, float]]
+
+
+def _field(bar: Bar, name: str) -> float:
+    if isinstance(bar, numbers.Real):
+        return float(bar)
+    return float(bar[name])
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """与 numpy 一致的除法：除以 0 得到 ±inf 或 NaN 而不是抛出异常"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+def _last(values) -> float:
+    return float(values[-1]) if len(values) else math.nan
+
+
+def _dump(value):
+    """指标对象的属性转为可 JSON 序列化的结构"""
+    if isinstance(value, (deque, tuple)):
+        return list(value)
+    if isinstance(value, dict):
+        return {str(key): _dump(item) for key, item in value.items()}
+    if hasattr(value, '__dict__'):
+        return {name: _dump(item) for name, item in vars(value).items()}
+    return value
+
+
+def _restore(current, saved):
+    """按现有对象的结构还原 _dump 的结果（deque 保留原 maxlen）"""
+    if isinstance(current, deque):
+        return deque(saved, maxlen=current.maxlen)
+    if isinstance(current, tuple):
+        return tuple(saved)
+    if isinstance(current, dict):
+        for key in current:
+            current[key] = _restore(current[key], saved[str(key)])
+        return current
+    if hasattr(current, '__dict__'):
+        for name in vars(current):
+            setattr(current, name, _restore(getattr(current, name), saved[name]))
+        return current
+    return saved
+
+
+class StreamingSMA:
+    """简单移动平均：保存最近 window + 1 个前缀和，当前值为首尾之差除以 window"""
+
+    def __init__(self, window: int, field: str = 'close'):
+        self.window = window
+        self.field = field
+        self.value = math.nan
+        self._total = 0.0
+        self._prefix = deque([0.0], maxlen=window + 1)
+
+    def update(self, bar: Bar) -> float:
+        self._total += _field(bar, self.field)
+        self._prefix.append(self._total)
+        if len(self._prefix) > self.window:
+            self.value = (self._total - self._prefix[0]) / self.window
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        prefix = graph.get('prefix_sum', self.field)
+        self._total = float(prefix[-1])
+        self._prefix = deque(prefix[-(self.window + 1):].tolist(), maxlen=self.window + 1)
+        self.value = _last(graph.get('sma', self.field, self.window))
+
+
+class StreamingEMA:
+    """指数移动平均（alpha = 2 / (span + 1)，以首个值为初值）"""
+
+    def __init__(self, span: int, field: str = 'close'):
+        self.span = span
+        self.field = field
+        self.alpha = 2.0 / (span + 1)
+        self.value = math.nan
+        self.count = 0
+
+    def update(self, bar: Bar) -> float:
+        value = _field(bar, self.field)
+        if self.count == 0:
+            self.value = value
+        else:
+            self.value = self.alpha * value + (1.0 - self.alpha) * self.value
+        self.count += 1
+        return self.value
+
+    def seed(self, graph: IndicatorGraph, source: Source = None):
+        """source 为输入序列（默认 field 列）"""
+        values = graph.get('ema', source or self.field, self.span)
+        self.count = len(values)
+        self.value = _last(values)
+
+
+class StreamingWilder:
+    """Wilder 平滑：前 window 个值的均值作初值，之后 alpha = 1 / window 递推"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 1.0 / window
+        self.value = math.nan
+        self.count = 0
+        self._total = 0.0
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.window:
+            self._total += value
+        elif self.count == self.window:
+            self._total += value
+            self.value = self._total / self.window
+        else:
+            self.value = self.alpha * value + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def seed(self, graph: IndicatorGraph, source: Source, start: int = 0):
+        """source 从第 start 个值起的序列逐个 update 之后的状态"""
+        values = graph.series(source)[start:]
+        self.count = len(values)
+        self._total = float(prefix_sum(values[:self.window])[-1])
+        self.value = _last(graph.get('wilder', source, self.window, start)) if self.count >= self.window else math.nan
+
+
+class StreamingRSI:
+    """Wilder RSI"""
+
+    def __init__(self, window: int = 14, field: str = 'close'):
+        self.window = window
+        self.field = field
+        self.value = math.nan
+        self._previous = None
+        self._gain = StreamingWilder(window)
+        self._loss = StreamingWilder(window)
+
+    def update(self, bar: Bar) -> float:
+        close = _field(bar, self.field)
+        if self._previous is not None:
+            delta = close - self._previous
+            gain = self._gain.update(delta if delta > 0 else 0.0)
+            loss = self._loss.update(-delta if delta < 0 else 0.0)
+            if self._gain.count >= self.window:
+                self.value = 100 - _divide(100, 1 + _divide(gain, loss))
+        self._previous = close
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        close = graph.series(self.field)
+        self._gain.seed(graph, ('gain', self.field), 1)
+        self._loss.seed(graph, ('loss', self.field), 1)
+        self.value = _last(graph.get('rsi', self.field, self.window))
+        self._previous = float(close[-1]) if len(close) else None
+
+
+class StreamingMACD:
+    """MACD：update 返回 (MACD 线, 信号线, 柱状图)"""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9, field: str = 'close'):
+        self.field = field
+        self.value = (math.nan, math.nan, math.nan)
+        self._fast = StreamingEMA(fast_period)
+        self._slow = StreamingEMA(slow_period)
+        self._signal = StreamingEMA(signal_period)
+
+    def update(self, bar: Bar) -> Tuple[float, float, float]:
+        close = _field(bar, self.field)
+        macd_line = self._fast.update(close) - self._slow.update(close)
+        signal_line = self._signal.update(macd_line)
+        self.value = (macd_line, signal_line, macd_line - signal_line)
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        periods = (self._fast.span, self._slow.span)
+        self._fast.seed(graph, self.field)
+        self._slow.seed(graph, self.field)
+        self._signal.seed(graph, ('macd', self.field) + periods)
+        self.value = (
+            _last(graph.get('macd', self.field, *periods)),
+            _last(graph.get('macd_signal', self.field, *periods, self._signal.span)),
+            _last(graph.get('macd_hist', self.field, *periods, self._signal.span))
+        )
+
+
+class StreamingBollinger:
+    """布林带：update 返回 (上轨, 中轨, 下轨)
+
+    中轨为流式 SMA；样本标准差在最近 window 个值上两遍求和，
+    每根K线的代价与窗口长度成正比、与历史长度无关。
+    """
+
+    def __init__(self, window: int = 20, num_std: float = 2, field: str = 'close'):
+        self.window = window
+        self.num_std = num_std
+        self.field = field
+        self.value = (math.nan, math.nan, math.nan)
+        self._middle = StreamingSMA(window)
+        self._values = deque(maxlen=window)
+
+    def _std(self) -> float:
+        values = self._values
+        total = values[0]
+        for k in range(1, self.window):
+            total += values[k]
+        mean = total / self.window
+        squares = (values[0] - mean) * (values[0] - mean)
+        for k in range(1, self.window):
+            squares += (values[k] - mean) * (values[k] - mean)
+        return math.sqrt(squares / (self.window - 1))
+
+    def update(self, bar: Bar) -> Tuple[float, float, float]:
+        close = _field(bar, self.field)
+        middle = self._middle.update(close)
+        self._values.append(close)
+        if len(self._values) == self.window:
+            std = self._std()
+            self.value = (middle + self.num_std * std, middle, middle - self.num_std * std)
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        close = graph.series(self.field)
+        self._middle.seed(graph)
+        self._values = deque(close[-self.window:].tolist(), maxlen=self.window)
+        if len(close) >= self.window:
+            self.value = (
+                _last(graph.get('bb_upper', self.field, self.window, self.num_std)),
+                self._middle.value,
+                _last(graph.get('bb_lower', self.field, self.window, self.num_std))
+            )
+        else:
+            self.value = (math.nan, math.nan, math.nan)
+
+
+class StreamingATR:
+    """平均真实波幅（Wilder 平滑）"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.value = math.nan
+        self._previous = None
+        self._average = StreamingWilder(window)
+
+    def update(self, bar: Mapping[str, float]) -> float:
+        high, low, close = _field(bar, 'high'), _field(bar, 'low'), _field(bar, 'close')
+        true_range = high - low
+        if self._previous is not None:
+            true_range = max(max(true_range, abs(high - self._previous)), abs(low - self._previous))
+        self._previous = close
+        self.value = self._average.update(true_range)
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        close = graph.series('close')
+        self._average.seed(graph, ('true_range',))
+        self.value = self._average.value
+        self._previous = float(close[-1]) if len(close) else None
+
+
+class StreamingVWAP:
+    """自序列起点累计的成交量加权平均价"""
+
+    def __init__(self):
+        self.value = math.nan
+        self._amount = 0.0
+        self._volume = 0.0
+
+    def update(self, bar: Mapping[str, float]) -> float:
+        volume = _field(bar, 'volume')
+        typical_price = (_field(bar, 'high') + _field(bar, 'low') + _field(bar, 'close')) / 3
+        self._amount += typical_price * volume
+        self._volume += volume
+        self.value = _divide(self._amount, self._volume)
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        typical_price = (graph.series('high') + graph.series('low') + graph.series('close')) / 3
+        self._amount = float(prefix_sum(typical_price * graph.series('volume'))[-1])
+        self._volume = float(graph.get('prefix_sum', 'volume')[-1])
+        self.value = _last(graph.get('vwap', None))
+
+
+class StreamingOBV:
+    """能量潮，首根K线为 0"""
+
+    def __init__(self):
+        self.value = math.nan
+        self._previous = None
+
+    def update(self, bar: Mapping[str, float]) -> float:
+        close, volume = _field(bar, 'close'), _field(bar, 'volume')
+        if self._previous is None:
+            self.value = 0.0
+        else:
+            delta = close - self._previous
+            sign = 1.0 if delta > 0 else -1.0 if delta < 0 else 0.0 if delta == 0 else math.nan
+            self.value += sign * volume
+        self._previous = close
+        return self.value
+
+    def seed(self, graph: IndicatorGraph):
+        close = graph.series('close')
+        self.value = _last(graph.get('obv'))
+        self._previous = float(close[-1]) if len(close) else None
+
+
+class StreamingIndicatorSet:
+    """technical_indicators 表全部指标列的流式计算，与 graph.INDICATOR_TABLE 的批量计算逐位一致"""
+
+    def __init__(self):
+        self.ma = {period: StreamingSMA(period) for period in MA_PERIODS}
+        self.ema = {period: StreamingEMA(period) for period in MA_PERIODS}
+        self.rsi = {period: StreamingRSI(period) for period in RSI_PERIODS}
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger()
+        self.atr = StreamingATR()
+        self.vwap = StreamingVWAP()
+        self.obv = StreamingOBV()
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """消费一根K线，返回 {列名: 最新值}"""
+        values = {}
+        for period in MA_PERIODS:
+            values[f'ma_{period}'] = self.ma[period].update(bar)
+            values[f'ema_{period}'] = self.ema[period].update(bar)
+        for period in RSI_PERIODS:
+            values[f'rsi_{period}'] = self.rsi[period].update(bar)
+        values['macd'], values['macd_signal'], values['macd_hist'] = self.macd.update(bar)
+        values['bb_upper'], values['bb_middle'], values['bb_lower'] = self.bollinger.update(bar)
+        values['atr'] = self.atr.update(bar)
+        values['vwap'] = self.vwap.update(bar)
+        values['obv'] = self.obv.update(bar)
+        return values
+
+    def seed(self, graph: IndicatorGraph):
+        """由批量计算图设置全部指标的状态，与对同一序列逐根 update 后逐位一致"""
+        for period in MA_PERIODS:
+            self.ma[period].seed(graph)
+            self.ema[period].seed(graph)
+        for period in RSI_PERIODS:
+            self.rsi[period].seed(graph)
+        self.macd.seed(graph)
+        self.bollinger.seed(graph)
+        self.atr.seed(graph)
+        self.vwap.seed(graph)
+        self.obv.seed(graph)
+
+    def get_state(self) -> Dict:
+        """全部指标的内部状态（可 JSON 序列化，浮点数按 repr 往返不丢精度）"""
+        return _dump(self)
+
+    def set_state(self, state: Dict):
+        """恢复 get_state 保存的状态，之后的 update 与未中断时逐位一致"""
+        _restore(self, state)
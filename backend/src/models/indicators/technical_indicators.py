@@ -2,8 +2,10 @@ import pandas as pd
 import numpy as np
 from typing import Optional
 
+from . import kernels
+
 class TechnicalIndicators:
-    """技术指标计算类"""
+    """技术指标计算类（计算由 kernels 完成，这里只做 Series 的转换）"""
     
     @staticmethod
     def calculate_ma(
@@ -11,7 +13,7 @@ class TechnicalIndicators:
         window: int
     ) -> pd.Series:
         """计算移动平均线"""
-        return data.rolling(window=window).mean()
+        return pd.Series(kernels.sma(data.to_numpy(), window), index=data.index)
         
     @staticmethod
     def calculate_ema(
@@ -19,19 +21,15 @@ class TechnicalIndicators:
         window: int
     ) -> pd.Series:
         """计算指数移动平均线"""
-        return data.ewm(span=window, adjust=False).mean()
+        return pd.Series(kernels.ema(data.to_numpy(), window), index=data.index)
         
     @staticmethod
     def calculate_rsi(
         data: pd.Series,
         window: int = 14
     ) -> pd.Series:
-        """计算RSI指标"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        """计算RSI指标（Wilder 平滑）"""
+        return pd.Series(kernels.rsi(data.to_numpy(), window), index=data.index)
         
     @staticmethod
     def calculate_bollinger_bands(
@@ -40,8 +38,22 @@ class TechnicalIndicators:
         num_std: float = 2
     ) -> tuple:
         """计算布林带"""
-        middle_band = data.rolling(window=window).mean()
-        std = data.rolling(window=window).std()
-        upper_band = middle_band + num_std * std
-        lower_band = middle_band - num_std * std
-        return upper_band, middle_band, lower_band 
\ No newline at end of file
+        upper_band, middle_band, lower_band = kernels.bollinger_bands(data.to_numpy(), window, num_std)
+        return (
+            pd.Series(upper_band, index=data.index),
+            pd.Series(middle_band, index=data.index),
+            pd.Series(lower_band, index=data.index)
+        )
+        
+    @staticmethod
+    def calculate_atr(
+        high: pd.Series,
+        low: pd.Series,
+        close: pd.Series,
+        window: int = 14
+    ) -> pd.Series:
+        """计算平均真实波幅(ATR)"""
+        return pd.Series(
+            kernels.atr(high.to_numpy(), low.to_numpy(), close.to_numpy(), window),
+            index=close.index
+        )
@@ -0,0 +1,388 @@
+import re
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import Column, MetaData, PrimaryKeyConstraint, Table, and_, func, inspect, select
+from sqlalchemy.schema import CreateTable
+
+from .database import DatabaseManager, MarketData
+from .bulk_writer import BulkWriter
+from .chunked_reader import Chunk, ChunkedReader
+from ..utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class PartitionedBarStore:
+    """按月分区的K线存储（market_data_YYYY_MM）
+
+    每个分区表的列与 market_data 相同，去掉自增ID，以 (symbol, interval, timestamp)
+    为主键（SQLite 下为 WITHOUT ROWID 聚簇表）。写入按K线开盘时间所在月份拆分到
+    各分区，分区不存在时在写入事务中创建；读取只查询与时间范围相交的分区，
+    唯一约束检查也只在单个分区的索引上进行。删除数据后清空的分区整表删除。
+    读写接口与 CompactBarStore 相同。
+    """
+
+    TABLE_PREFIX = 'market_data_'
+    TABLE_PATTERN = re.compile(r'^market_data_\d{4}_\d{2}$')
+
+    COLUMNS = [
+        'open', 'high', 'low', 'close', 'volume', 'quote_volume',
+        'trades_count', 'taker_buy_volume', 'taker_buy_quote_volume'
+    ]
+    KEY_COLUMNS = ['symbol', 'interval', 'timestamp']
+
+    def __init__(self, db: Optional[DatabaseManager] = None, chunk_size: int = 50000):
+        self.db = db or DatabaseManager()
+        self.writer = BulkWriter()
+        self.reader = ChunkedReader(chunk_size=chunk_size, db=self.db)
+        self.metadata = MetaData()
+
+    @classmethod
+    def from_config(cls, config, db: Optional[DatabaseManager] = None) -> Optional['PartitionedBarStore']:
+        """database.layout 为 partitioned 时返回存储，否则返回 None"""
+        if config.get('database.layout', 'row') != 'partitioned':
+            return None
+        return cls(db)
+
+    # ---- 分区 ----
+
+    @staticmethod
+    def _naive_utc(value: datetime) -> datetime:
+        if value.tzinfo:
+            return value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return value
+
+    @classmethod
+    def partition_name(cls, month: np.datetime64) -> str:
+        """月份对应的分区表名，如 market_data_2024_01"""
+        return cls.TABLE_PREFIX + str(month.astype('datetime64[M]')).replace('-', '_')
+
+    def _month(self, value: datetime) -> np.datetime64:
+        return np.datetime64(self._naive_utc(value), 'M')
+
+    def _table(self, name: str) -> Table:
+        """分区表定义（与 market_data 同列，不访问数据库）"""
+        table = self.metadata.tables.get(name)
+        if table is None:
+            columns = [
+                Column(column.name, column.type, nullable=column.nullable)
+                for column in MarketData.__table__.columns if column.name != 'id'
+            ]
+            table = Table(
+                name, self.metadata, *columns,
+                PrimaryKeyConstraint(*self.KEY_COLUMNS, name=f'{name}_pkey'),
+                sqlite_with_rowid=False
+            )
+        return table
+
+    def _create(self, session, name: str) -> Table:
+        """确保分区表存在（在调用方的事务中执行，并发写入时可能同时创建同一分区）"""
+        table = self._table(name)
+        ddl = str(CreateTable(table).compile(dialect=session.get_bind().dialect))
+        session.connection().exec_driver_sql(ddl.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+        return table
+
+    def partitions(
+        self,
+        session,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[str]:
+        """已存在的分区表名（按月份升序），给定时间范围时只返回与之相交的分区"""
+        names = sorted(
+            name for name in inspect(session.connection()).get_table_names()
+            if self.TABLE_PATTERN.match(name)
+        )
+        # 表名定长，按字符串比较即按月份比较
+        if start_time is not None:
+            first = self.partition_name(self._month(start_time))
+            names = [name for name in names if name >= first]
+        if end_time is not None:
+            last = self.partition_name(self._month(end_time))
+            names = [name for name in names if name <= last]
+        return names
+
+    def _conditions(
+        self,
+        table: Table,
+        symbol: str,
+        interval: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ):
+        conditions = [table.c.symbol == symbol, table.c.interval == interval]
+        if start_time is not None:
+            conditions.append(table.c.timestamp >= self._naive_utc(start_time))
+        if end_time is not None:
+            conditions.append(table.c.timestamp <= self._naive_utc(end_time))
+        return and_(*conditions)
+
+    # ---- 写入 ----
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        data: pd.DataFrame,
+        update: bool = False,
+        update_columns: Optional[List[str]] = None,
+        session=None
+    ) -> Dict:
+        """写入以时间戳为索引、列同 market_data 的 DataFrame，按月份拆分到各分区"""
+        if data.empty:
+            return {'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            months = BulkWriter._naive_utc(data.index).astype('datetime64[M]')
+            rows, seconds = 0, 0.0
+            for month in np.unique(months):
+                table = self._create(session, self.partition_name(month))
+                stats = self.writer.write(
+                    table,
+                    data[months == month],
+                    key_columns=self.KEY_COLUMNS,
+                    update=update,
+                    update_columns=update_columns,
+                    constants={'symbol': symbol, 'interval': interval},
+                    index_column='timestamp',
+                    session=session
+                )
+                rows += stats['rows']
+                seconds += stats['seconds']
+            if own_session:
+                session.commit()
+            return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds > 0 else float('inf')}
+        except Exception:
+            if own_session:
+                session.rollback()
+            raise
+        finally:
+            if own_session:
+                session.close()
+
+    def delete(self, session, symbol: str, interval: str, start_time: datetime, end_time: datetime) -> int:
+        """删除 [start_time, end_time] 的K线（不提交），清空的分区整表删除，返回删除行数"""
+        deleted = 0
+        for name in self.partitions(session, start_time, end_time):
+            table = self._table(name)
+            result = session.execute(table.delete().where(self._conditions(table, symbol, interval, start_time, end_time)))
+            deleted += result.rowcount
+            if session.execute(select(table.c.timestamp).limit(1)).first() is None:
+                table.drop(bind=session.connection())
+                logger.info(f"删除空分区: {name}")
+        return deleted
+
+    # ---- 读取 ----
+
+    def _empty(self, columns: List[str]) -> pd.DataFrame:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+
+    def _range_query(self, name: str, symbol: str, interval: str, start_time: datetime, end_time: datetime, columns: List[str]):
+        return ChunkedReader.range_query(
+            self._table(name), symbol, interval,
+            self._naive_utc(start_time), self._naive_utc(end_time), columns
+        )
+
+    def iter_read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None,
+        as_numpy: bool = False,
+        session=None
+    ) -> Iterator[Chunk]:
+        """按时间顺序分块读取 [start_time, end_time]，只查询相交的分区"""
+        columns = list(columns or self.COLUMNS)
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            for name in self.partitions(session, start_time, end_time):
+                query = self._range_query(name, symbol, interval, start_time, end_time, columns)
+                yield from self.reader.iter_query(query, chunk_size, as_numpy, session=session)
+        finally:
+            if own_session:
+                session.close()
+
+    async def aiter_read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None,
+        as_numpy: bool = False
+    ) -> AsyncIterator[Chunk]:
+        """iter_read 的异步版本（通过异步引擎流式读取）"""
+        columns = list(columns or self.COLUMNS)
+        session = self.db.get_session()
+        try:
+            names = self.partitions(session, start_time, end_time)
+        finally:
+            session.close()
+        for name in names:
+            query = self._range_query(name, symbol, interval, start_time, end_time, columns)
+            async for chunk in self.reader.aiter_query(query, chunk_size, as_numpy):
+                yield chunk
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None,
+        session=None
+    ) -> pd.DataFrame:
+        """读取 [start_time, end_time]，返回以时间戳为索引的 DataFrame（无数据时为空表）"""
+        chunks = list(self.iter_read(symbol, interval, start_time, end_time, columns, session=session))
+        if not chunks:
+            return self._empty(list(columns or self.COLUMNS))
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+    def resample(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        bucket_ms: int,
+        columns: Optional[List[str]] = None,
+        session=None
+    ) -> pd.DataFrame:
+        """在数据库内按时间桶聚合 [start_time, end_time]，返回以桶起点为索引的 DataFrame
+
+        时间桶不超过 1d，不会跨越月度分区，各分区分别聚合后按顺序拼接。
+        """
+        columns = list(columns or self.COLUMNS)
+        own_session = session is None
+        session = session or self.db.get_session()
+        try:
+            dialect = session.get_bind().dialect.name
+            frames = []
+            for name in self.partitions(session, start_time, end_time):
+                query = ChunkedReader.bucket_query(
+                    self._table(name), symbol, interval,
+                    self._naive_utc(start_time), self._naive_utc(end_time), bucket_ms, dialect, columns
+                )
+                frames.append(self.reader.read_buckets(query, columns, session=session))
+        finally:
+            if own_session:
+                session.close()
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return self._empty(columns)
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def timestamps(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> np.ndarray:
+        """有序 int64 毫秒时间戳（只扫描主键）"""
+        start_time = None if start_ms is None else pd.Timestamp(start_ms, unit='ms').to_pydatetime()
+        end_time = None if end_ms is None else pd.Timestamp(end_ms, unit='ms').to_pydatetime()
+        parts = []
+        for name in self.partitions(session, start_time, end_time):
+            table = self._table(name)
+            rows = session.execute(
+                select(table.c.timestamp)
+                .where(self._conditions(table, symbol, interval, start_time, end_time))
+                .order_by(table.c.timestamp)
+            ).fetchall()
+            parts.append(np.array([row[0] for row in rows], dtype='datetime64[ms]').astype(np.int64))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def series(self, session) -> List[Tuple[str, str]]:
+        """已存储K线的 (交易对, 周期)"""
+        found = set()
+        for name in self.partitions(session):
+            table = self._table(name)
+            found.update(
+                tuple(row) for row in session.execute(select(table.c.symbol, table.c.interval).distinct())
+            )
+        return sorted(found)
+
+    def bounds(self, session, symbol: str, interval: str) -> Optional[Tuple[datetime, datetime]]:
+        """已存储的最早、最晚开盘时间（UTC，不带时区），只查询首尾有数据的分区"""
+        def find(names: List[str], aggregate) -> Optional[datetime]:
+            for name in names:
+                table = self._table(name)
+                value = session.execute(
+                    select(aggregate(table.c.timestamp)).where(self._conditions(table, symbol, interval))
+                ).scalar()
+                if value is not None:
+                    return value
+            return None
+
+        names = self.partitions(session)
+        first = find(names, func.min)
+        if first is None:
+            return None
+        return first, find(list(reversed(names)), func.max)
+
+    # ---- 迁移 ----
+
+    def migrate(self, chunk_size: int = 100000, drop_source: bool = False) -> Dict[Tuple[str, str], int]:
+        """将 market_data 中的全部K线复制到月度分区，返回各交易对/周期的行数
+
+        可重复执行（按主键覆盖）；drop_source 为 True 时，校验行数一致后删除 market_data 中的数据。
+        """
+        session = self.db.get_session()
+        try:
+            series = session.execute(
+                select(MarketData.symbol, MarketData.interval, func.count())
+                .group_by(MarketData.symbol, MarketData.interval)
+            ).fetchall()
+        finally:
+            session.close()
+
+        migrated = {}
+        for symbol, interval, count in series:
+            query = ChunkedReader.range_query(
+                MarketData, symbol, interval, datetime.min, datetime.max, self.COLUMNS
+            )
+            written = 0
+            for chunk in self.reader.iter_query(query, chunk_size):
+                written += self.write(symbol, interval, chunk, update=True)['rows']
+            migrated[(symbol, interval)] = written
+            logger.info(f"迁移K线: {symbol} {interval} {written}/{count} 条")
+
+        if drop_source:
+            session = self.db.get_session()
+            try:
+                names = self.partitions(session)
+                for symbol, interval, count in series:
+                    stored = sum(
+                        session.execute(
+                            select(func.count()).select_from(self._table(name))
+                            .where(self._conditions(self._table(name), symbol, interval))
+                        ).scalar()
+                        for name in names
+                    )
+                    if stored < count:
+                        raise ValueError(f"迁移后行数不一致: {symbol} {interval} {stored} < {count}")
+                session.query(MarketData).delete(synchronize_session=False)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            logger.info("已删除 market_data 中的原始数据")
+
+        return migrated
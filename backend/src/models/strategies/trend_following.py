@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 from .base_strategy import BaseStrategy
+from ..indicators.graph import IndicatorGraph
 
 class TrendFollowingStrategy(BaseStrategy):
     """趋势跟踪策略"""
@@ -41,14 +42,21 @@ class TrendFollowingStrategy(BaseStrategy):
         
     def generate_signals(self, data: pd.DataFrame) -> pd.Series:
         """生成交易信号"""
-        # 计算技术指标
-        short_ma = self.indicators.calculate_ma(data['close'], self.short_window)
-        long_ma = self.indicators.calculate_ma(data['close'], self.long_window)
-        rsi = self.indicators.calculate_rsi(data['close'], self.rsi_window)
-        volume_ma = self.indicators.calculate_ma(data['volume'], self.volume_window)
-        bb_upper, bb_middle, bb_lower = self.indicators.calculate_bollinger_bands(
-            data['close'], self.short_window
-        )
+        # 计算技术指标：短均线与布林带中轨、各均线的前缀和等中间结果在计算图中只计算一次
+        graph = IndicatorGraph(data)
+        indicators = {
+            name: pd.Series(values, index=data.index)
+            for name, values in graph.compute({
+                'short_ma': ('sma', 'close', self.short_window),
+                'long_ma': ('sma', 'close', self.long_window),
+                'rsi': ('rsi', 'close', self.rsi_window),
+                'volume_ma': ('sma', 'volume', self.volume_window),
+                'bb_lower': ('bb_lower', 'close', self.short_window, 2),
+                'atr': ('atr', self.atr_window),
+            }).items()
+        }
+        short_ma, long_ma = indicators['short_ma'], indicators['long_ma']
+        rsi, volume_ma, bb_lower = indicators['rsi'], indicators['volume_ma'], indicators['bb_lower']
         
         # 生成信号
         signals = pd.Series(0, index=data.index)
@@ -81,12 +89,7 @@ class TrendFollowingStrategy(BaseStrategy):
         signals[sell_condition] = -1
         
         # 计算ATR用于仓位管理
-        self.current_atr = self.indicators.calculate_atr(
-            data['high'], 
-            data['low'], 
-            data['close'], 
-            self.atr_window
-        ).iloc[-1]
+        self.current_atr = indicators['atr'].iloc[-1]
         
         return signals
         
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Integer, select
+
+from ..models.database import DatabaseManager, MarketData, TechnicalIndicators
+from ..models.chunked_reader import ChunkedReader
+from ..models.bar_store import open_bar_store
+from ..data.storage.bar_cache import ColumnarBarCache
+from ..utils.logger import Logger
+from ..config.config import Config
+
+logger = Logger(__name__)
+
+
+class AnalyticsService:
+    """K线与技术指标的嵌入式分析查询（DuckDB）
+
+    数据库中的K线和指标按 表/symbol=交易对/interval=周期/YYYY-MM.parquet 镜像为列式文件
+    （zstd 压缩），DuckDB 以视图 market_data 与 technical_indicators 注册这些文件：
+    按交易对/周期的过滤只扫描对应目录，时间过滤利用行组统计跳过无关数据，
+    聚合在 DuckDB 内向量化执行，不经过 pandas。
+
+    refresh 流式读取数据库中的序列，按月比较行数、首尾时间戳与全部镜像列的内容摘要，
+    只重写发生变化的月份（包括同一时间戳上的覆盖写入），清理已删除的月份。
+    """
+
+    MARKET_DATA = 'market_data'
+    INDICATORS = 'technical_indicators'
+    TABLES = (MARKET_DATA, INDICATORS)
+    BAR_COLUMNS = list(ColumnarBarCache.COLUMNS)
+    INDICATOR_COLUMNS = [
+        column.name for column in TechnicalIndicators.__table__.columns
+        if column.name not in ('id', 'symbol', 'interval', 'timestamp')
+    ]
+    FILE_SUFFIX = '.parquet'
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root: Optional[str] = None, max_workers: int = 4, chunk_size: int = 100000):
+        self.db = DatabaseManager()
+        self.config = Config()
+        self.root = Path(root or self.config.get('data.analytics_path', 'data/analytics'))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.store = open_bar_store(self.config)
+        self.reader = ChunkedReader(chunk_size=chunk_size)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    # ---- 镜像 ----
+
+    def _directory(self, table: str, symbol: str, interval: str) -> Path:
+        return self.root / table / f'symbol={symbol}' / f'interval={interval}'
+
+    def _load_manifest(self) -> Dict[str, Dict[str, list]]:
+        path = self.root / self.MANIFEST
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text())
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, list]]):
+        path = self.root / self.MANIFEST
+        temp = path.with_name(path.name + '.tmp')
+        temp.write_text(json.dumps(manifest, sort_keys=True))
+        os.replace(temp, path)
+
+    def _series(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        intervals: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, str, str]]:
+        """数据库中的 (表, 交易对, 周期)"""
+        session = self.db.get_session()
+        try:
+            if self.store:
+                bars = self.store.series(session)
+            else:
+                bars = session.execute(select(MarketData.symbol, MarketData.interval).distinct()).fetchall()
+            indicators = session.execute(
+                select(TechnicalIndicators.symbol, TechnicalIndicators.interval).distinct()
+            ).fetchall()
+        finally:
+            session.close()
+
+        series = []
+        for table, rows in ((self.MARKET_DATA, bars), (self.INDICATORS, indicators)):
+            for symbol, interval in sorted(tuple(row) for row in rows):
+                if (symbols and symbol not in symbols) or (intervals and interval not in intervals):
+                    continue
+                series.append((table, symbol, interval))
+        return series
+
+    def _iter_range(self, table: str, symbol: str, interval: str, start_time: datetime, end_time: datetime):
+        if table == self.MARKET_DATA and self.store:
+            return self.store.iter_read(
+                symbol, interval, start_time, end_time, self.BAR_COLUMNS,
+                chunk_size=self.chunk_size, as_numpy=True
+            )
+        model, columns = (
+            (MarketData, self.BAR_COLUMNS) if table == self.MARKET_DATA
+            else (TechnicalIndicators, self.INDICATOR_COLUMNS)
+        )
+        query = ChunkedReader.range_query(model, symbol, interval, start_time, end_time, columns)
+        return self.reader.iter_query(query, self.chunk_size, as_numpy=True)
+
+    def _fingerprints(self, table: str, symbol: str, interval: str) -> Dict[str, list]:
+        """按自然月统计 {YYYY-MM: [行数, 首个时间戳, 末个时间戳, 内容摘要]}
+
+        摘要按行计算（各列统一转为 float64 后按行拼接），与分块边界无关；
+        未收盘K线更新、重新聚合、指标重算等只改数值不改时间戳的写入也会改变摘要。
+        """
+        stats: Dict[str, list] = {}
+        for arrays in self._iter_range(table, symbol, interval, datetime.min, datetime.max):
+            timestamps = arrays['timestamp'].astype('datetime64[ms]')
+            if len(timestamps) == 0:
+                continue
+            timestamps_ms = timestamps.astype(np.int64)
+            values = np.column_stack(
+                [timestamps_ms.astype(np.float64)]
+                + [arrays[name].astype(np.float64) for name in arrays if name != 'timestamp']
+            )
+            months = timestamps.astype('datetime64[M]')
+            starts = np.flatnonzero(np.concatenate(([True], months[1:] != months[:-1])))
+            ends = np.append(starts[1:], len(timestamps_ms))
+            for start, end in zip(starts, ends):
+                month = str(months[start])
+                if month not in stats:
+                    stats[month] = [0, int(timestamps_ms[start]), 0, hashlib.blake2b(digest_size=16)]
+                entry = stats[month]
+                entry[0] += int(end - start)
+                entry[2] = int(timestamps_ms[end - 1])
+                entry[3].update(np.ascontiguousarray(values[start:end]).tobytes())
+        return {
+            month: [count, first, last, digest.hexdigest()]
+            for month, (count, first, last, digest) in stats.items()
+        }
+
+    @staticmethod
+    def _to_table(model, arrays: Dict[str, np.ndarray]) -> pa.Table:
+        """块转为 pyarrow.Table：NaN 记为 null（SQL 聚合时跳过），含空值的整数列仍为 int64"""
+        table = model.__table__
+        columns = {}
+        for name, values in arrays.items():
+            array = pa.array(values, from_pandas=True)
+            if isinstance(table.c[name].type, Integer) and pa.types.is_floating(array.type):
+                array = array.cast(pa.int64())
+            columns[name] = array
+        return pa.table(columns)
+
+    def _write_month(self, table: str, symbol: str, interval: str, month: str) -> int:
+        """把一个月的数据写为 parquet 文件（先写临时文件再替换），返回行数"""
+        start_time = datetime.strptime(month, '%Y-%m')
+        end_time = (start_time + timedelta(days=32)).replace(day=1) - timedelta(milliseconds=1)
+        model = MarketData if table == self.MARKET_DATA else TechnicalIndicators
+        chunks = [
+            self._to_table(model, arrays)
+            for arrays in self._iter_range(table, symbol, interval, start_time, end_time)
+        ]
+        path = self._directory(table, symbol, interval) / f'{month}{self.FILE_SUFFIX}'
+        if not chunks:
+            if path.exists():
+                path.unlink()
+            return 0
+
+        data = pa.concat_tables(chunks) if len(chunks) > 1 else chunks[0]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(path.name + '.tmp')
+        pq.write_table(data, temp, compression='zstd')
+        os.replace(temp, path)
+        return data.num_rows
+
+    def _refresh_series(
+        self,
+        table: str,
+        symbol: str,
+        interval: str,
+        known: Dict[str, list],
+        rebuild: bool
+    ) -> Tuple[Dict[str, list], int, int]:
+        """刷新一个序列，返回 (新的月度指纹, 重写的月份数, 写入行数)"""
+        current = self._fingerprints(table, symbol, interval)
+        directory = self._directory(table, symbol, interval)
+        for month in set(known) - set(current):
+            path = directory / f'{month}{self.FILE_SUFFIX}'
+            if path.exists():
+                path.unlink()
+
+        months = rows = 0
+        for month, fingerprint in sorted(current.items()):
+            path = directory / f'{month}{self.FILE_SUFFIX}'
+            if not rebuild and known.get(month) == fingerprint and path.exists():
+                continue
+            rows += self._write_month(table, symbol, interval, month)
+            months += 1
+        return current, months, rows
+
+    def refresh(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        intervals: Optional[Sequence[str]] = None,
+        rebuild: bool = False
+    ) -> Dict:
+        """同步数据库到列式镜像，返回 {'series', 'months', 'rows', 'seconds'}"""
+        started = time.perf_counter()
+        manifest = self._load_manifest()
+        series = self._series(symbols, intervals)
+
+        def refresh_one(item):
+            table, symbol, interval = item
+            key = f'{table}/{symbol}/{interval}'
+            try:
+                return key, self._refresh_series(table, symbol, interval, manifest.get(key, {}), rebuild)
+            except Exception as e:
+                logger.error(f"刷新分析镜像失败: {key} - {e}")
+                return key, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(refresh_one, series))
+
+        months = rows = 0
+        for key, result in results:
+            if result is None:
+                # 失败的序列去掉指纹，下次刷新时全部重写
+                manifest.pop(key, None)
+                continue
+            manifest[key], series_months, series_rows = result
+            months += series_months
+            rows += series_rows
+
+        # 数据库中已不存在的序列
+        current = {f'{table}/{symbol}/{interval}' for table, symbol, interval in series}
+        for key in list(manifest):
+            table, symbol, interval = key.split('/')
+            if key in current or (symbols and symbol not in symbols) or (intervals and interval not in intervals):
+                continue
+            shutil.rmtree(self._directory(table, symbol, interval), ignore_errors=True)
+            del manifest[key]
+
+        self._save_manifest(manifest)
+        seconds = time.perf_counter() - started
+        logger.info(f"分析镜像刷新完成: {len(series)} 个序列, 重写 {months} 个月, {rows} 条, {seconds:.1f}s")
+        return {'series': len(series), 'months': months, 'rows': rows, 'seconds': seconds}
+
+    # ---- 查询 ----
+
+    def connect(self, threads: Optional[int] = None) -> duckdb.DuckDBPyConnection:
+        """创建注册了 market_data / technical_indicators 视图的内存 DuckDB 连接
+
+        视图列为 symbol、interval（DuckDB 关键字，需写作 "interval"）、timestamp 与数据列。
+        """
+        connection = duckdb.connect(database=':memory:')
+        threads = threads or self.config.get('data.analytics_threads')
+        if threads:
+            connection.execute(f'SET threads = {int(threads)}')
+        for table in self.TABLES:
+            pattern = (self.root / table).as_posix() + f'/*/*/*{self.FILE_SUFFIX}'
+            if not any((self.root / table).glob(f'*/*/*{self.FILE_SUFFIX}')):
+                continue
+            connection.execute(
+                f"CREATE VIEW {table} AS "
+                f"SELECT symbol, \"interval\", * EXCLUDE (symbol, \"interval\") "
+                f"FROM read_parquet('{pattern}', hive_partitioning = true, "
+                f"hive_types = {{'symbol': 'VARCHAR', 'interval': 'VARCHAR'}})"
+            )
+        return connection
+
+    def query(self, sql: str, params: Optional[Sequence] = None) -> pa.Table:
+        """执行 SQL，结果为 pyarrow.Table（需要时再 .to_pandas()）"""
+        connection = self.connect()
+        try:
+            result = connection.execute(sql, params or []).arrow()
+            # 新版 DuckDB 返回 RecordBatchReader
+            if isinstance(result, pa.RecordBatchReader):
+                result = result.read_all()
+            return result
+        finally:
+            connection.close()
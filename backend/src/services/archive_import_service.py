@@ -0,0 +1,216 @@
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pytz
+
+from ..models.database import DatabaseManager, MarketData
+from ..models.bulk_writer import BulkWriter
+from ..data.collectors.binance_archive import ArchiveFile, BinanceArchiveReader
+from .coverage_service import CoverageService
+from .resampling_service import ResamplingService
+from .market_data_service import MarketDataService
+from ..utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class ArchiveImportService:
+    """币安公开K线归档离线导入
+
+    多个归档文件并行解析、分块批量写入 market_data，每个文件写完后登记覆盖范围，
+    1m 数据同时刷新本地聚合的高周期K线。导入完成后可交给
+    MarketDataService.sync_market_data 从归档末尾补齐到当前时间。
+    """
+
+    def __init__(self, max_workers: int = 4, chunk_rows: int = 100000):
+        self.db = DatabaseManager()
+        self.reader = BinanceArchiveReader(chunk_rows=chunk_rows)
+        self.writer = BulkWriter(chunk_size=chunk_rows)
+        self.coverage = CoverageService()
+        self.resampler = ResamplingService()
+        self.bar_cache = self.resampler.bar_cache
+        self.hot_cache = self.resampler.hot_cache
+        self.store = self.resampler.store
+        self.max_workers = max_workers
+
+        # SQLite 同一时间只允许一个写事务，解析仍并行，写入串行；
+        # 该锁只在线程池的工作线程中获取，事件循环线程不持有
+        self._write_lock = threading.Lock()
+
+    def _writing(self):
+        if self.db.engine.dialect.name == 'sqlite':
+            return self._write_lock
+        return contextlib.nullcontext()
+
+    def _import_file(self, archive_file: ArchiveFile, force_update: bool, verify: bool) -> Dict:
+        """导入单个文件（在线程池中执行）"""
+        started = time.perf_counter()
+        result = {
+            'file': archive_file.path.name,
+            'symbol': archive_file.symbol,
+            'interval': archive_file.interval,
+            'rows': 0,
+            'start_time': None,
+            'end_time': None,
+            'seconds': 0.0,
+            'error': None
+        }
+
+        if verify and self.reader.verify_checksum(archive_file.path) is False:
+            result['error'] = '校验和不匹配'
+            logger.error(f"归档文件校验失败: {archive_file.path}")
+            return result
+
+        try:
+            for chunk in self.reader.iter_chunks(archive_file):
+                chunk = chunk.rename(columns=MarketDataService.COLUMN_MAPPING)
+                with self._writing():
+                    if self.store:
+                        self.store.write(
+                            archive_file.symbol, archive_file.interval, chunk, update=force_update
+                        )
+                    else:
+                        self.writer.write(
+                            MarketData,
+                            chunk,
+                            key_columns=['symbol', 'interval', 'timestamp'],
+                            update=force_update,
+                            constants={'symbol': archive_file.symbol, 'interval': archive_file.interval},
+                            index_column='timestamp'
+                        )
+                result['rows'] += len(chunk)
+                if result['start_time'] is None:
+                    result['start_time'] = chunk.index[0].to_pydatetime()
+                result['end_time'] = chunk.index[-1].to_pydatetime()
+
+            if result['rows']:
+                with self._writing():
+                    session = self.db.get_session()
+                    try:
+                        self.coverage.record_coverage(
+                            session,
+                            archive_file.symbol,
+                            archive_file.interval,
+                            result['start_time'],
+                            result['end_time']
+                        )
+                        session.commit()
+                    except Exception:
+                        session.rollback()
+                        raise
+                    finally:
+                        session.close()
+
+                if self.bar_cache:
+                    self.bar_cache.invalidate(
+                        archive_file.symbol,
+                        archive_file.interval,
+                        result['start_time'].replace(tzinfo=None),
+                        result['end_time'].replace(tzinfo=None)
+                    )
+                if self.hot_cache:
+                    self.hot_cache.invalidate(archive_file.symbol, archive_file.interval)
+
+                # 1m 数据导入后刷新本地聚合的高周期K线（同样在工作线程中持锁写入）
+                if archive_file.interval == self.resampler.SOURCE_INTERVAL:
+                    with self._writing():
+                        self.resampler.recompute_rollups(
+                            archive_file.symbol, result['start_time'], result['end_time']
+                        )
+
+        except Exception as e:
+            result['error'] = str(e)
+            logger.error(f"导入归档文件失败: {archive_file.path} - {e}")
+
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    async def import_directory(
+        self,
+        directory: Union[str, Path],
+        symbols: Optional[List[str]] = None,
+        intervals: Optional[List[str]] = None,
+        force_update: bool = False,
+        verify: bool = True
+    ) -> Dict:
+        """导入目录下的全部归档文件
+
+        返回 {'files', 'failed', 'rows', 'seconds', 'rows_per_second', 'ranges'}，
+        ranges 为 {(symbol, interval): (最早, 最晚)}。
+        """
+        files = self.reader.discover(directory, symbols, intervals)
+        logger.info(f"发现 {len(files)} 个归档文件: {directory}")
+
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_workers)
+        results = []
+
+        async def run(executor, archive_file: ArchiveFile):
+            async with semaphore:
+                result = await loop.run_in_executor(
+                    executor, self._import_file, archive_file, force_update, verify
+                )
+                logger.info(f"导入 {result['file']}: {result['rows']} 条, {result['seconds']:.2f}s")
+                results.append(result)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            await asyncio.gather(*[run(executor, f) for f in files])
+
+        ranges = {}
+        for result in results:
+            if not result['rows']:
+                continue
+            key = (result['symbol'], result['interval'])
+            start, end = ranges.get(key, (result['start_time'], result['end_time']))
+            ranges[key] = (min(start, result['start_time']), max(end, result['end_time']))
+
+        total_rows = sum(result['rows'] for result in results)
+        seconds = time.perf_counter() - started
+        failed = [result for result in results if result['error']]
+        summary = {
+            'files': len(files),
+            'failed': failed,
+            'rows': total_rows,
+            'seconds': seconds,
+            'rows_per_second': total_rows / seconds if seconds > 0 else 0.0,
+            'ranges': ranges
+        }
+        logger.info(f"归档导入完成: {len(files)} 个文件, 失败 {len(failed)}, {total_rows} 条, "
+                    f"{seconds:.1f}s, {summary['rows_per_second']:.0f} 条/秒")
+        return summary
+
+    async def import_and_sync(
+        self,
+        directory: Union[str, Path],
+        symbols: Optional[List[str]] = None,
+        intervals: Optional[List[str]] = None,
+        service: Optional[MarketDataService] = None,
+        end_time: Optional[datetime] = None,
+        force_update: bool = False,
+        verify: bool = True
+    ) -> Dict:
+        """导入归档后，通过交易所接口补齐归档末尾到 end_time（默认当前整点）的数据"""
+        summary = await self.import_directory(directory, symbols, intervals, force_update, verify)
+
+        own_service = service is None
+        service = service or MarketDataService()
+        try:
+            for (symbol, interval), (_, archive_end) in sorted(summary['ranges'].items()):
+                logger.info(f"补齐归档之后的数据: {symbol} {interval} 自 {archive_end}")
+                await service.sync_market_data(
+                    symbol,
+                    interval,
+                    start_time=archive_end.astimezone(pytz.UTC),
+                    end_time=end_time
+                )
+        finally:
+            if own_service:
+                await service.close()
+        return summary
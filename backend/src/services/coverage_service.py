@@ -0,0 +1,284 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import DateTime, bindparam, text
+
+from ..models.database import DatabaseManager, DataCoverage
+from ..models.bar_store import open_bar_store
+from ..data.processors.resampler import OHLCVResampler
+from ..utils.logger import Logger
+from ..config.config import Config
+
+logger = Logger(__name__)
+
+
+class CoverageService:
+    """数据覆盖索引与缺口检测
+
+    data_coverage 记录每个交易对/周期已成功同步的连续时间范围。
+    覆盖范围以外的部分即为需要补齐的缺口，检测时无需扫描 market_data；
+    全量扫描则将已存储的时间戳与期望的时间网格向量化比对，并据此重建索引。
+    所有时间均按K线开盘时间对齐，闭区间，UTC。
+    """
+
+    def __init__(self):
+        self.db = DatabaseManager()
+        self.store = open_bar_store(Config())
+
+    @staticmethod
+    def _to_ms(value: datetime) -> int:
+        if value.tzinfo:
+            value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return int(OHLCVResampler.to_epoch_ms([value])[0])
+
+    @staticmethod
+    def _to_datetime(ms: int) -> datetime:
+        return pd.Timestamp(int(ms), unit='ms').to_pydatetime()
+
+    @staticmethod
+    def _align(start_ms: int, end_ms: int, interval_ms: int) -> Tuple[int, int]:
+        """对齐到时间网格：起点向上取整，终点向下取整"""
+        return -(-start_ms // interval_ms) * interval_ms, end_ms // interval_ms * interval_ms
+
+    @staticmethod
+    def contiguous_runs(timestamps_ms: np.ndarray, interval_ms: int) -> np.ndarray:
+        """有序时间戳中的连续区段，返回 (n, 2) 的 [起点, 终点] 数组"""
+        if len(timestamps_ms) == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        breaks = np.flatnonzero(np.diff(timestamps_ms) != interval_ms)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.append(breaks, len(timestamps_ms) - 1)
+        return np.column_stack((timestamps_ms[starts], timestamps_ms[ends]))
+
+    @staticmethod
+    def complement(
+        ranges: np.ndarray,
+        start_ms: int,
+        end_ms: int,
+        interval_ms: int
+    ) -> np.ndarray:
+        """[start_ms, end_ms] 内未被 ranges 覆盖的区段（ranges 需有序且不重叠）"""
+        if start_ms > end_ms:
+            return np.empty((0, 2), dtype=np.int64)
+        ranges = ranges[(ranges[:, 1] >= start_ms) & (ranges[:, 0] <= end_ms)] if len(ranges) else ranges
+        if len(ranges) == 0:
+            return np.array([[start_ms, end_ms]], dtype=np.int64)
+
+        gap_starts = np.concatenate(([start_ms], ranges[:, 1] + interval_ms))
+        gap_ends = np.concatenate((ranges[:, 0] - interval_ms, [end_ms]))
+        gap_starts = np.maximum(gap_starts, start_ms)
+        gap_ends = np.minimum(gap_ends, end_ms)
+        mask = gap_starts <= gap_ends
+        return np.column_stack((gap_starts[mask], gap_ends[mask]))
+
+    def _load_timestamps(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> np.ndarray:
+        """只读取时间戳列（不经 ORM 类型转换），返回有序 int64 毫秒数组"""
+        if self.store:
+            return self.store.timestamps(session, symbol, interval, start_ms, end_ms)
+
+        conditions = ['symbol = :symbol', 'interval = :interval']
+        params = {'symbol': symbol, 'interval': interval}
+        if start_ms is not None:
+            conditions.append('timestamp >= :start_time')
+            params['start_time'] = self._to_datetime(start_ms)
+        if end_ms is not None:
+            conditions.append('timestamp <= :end_time')
+            params['end_time'] = self._to_datetime(end_ms)
+
+        # 绑定参数需按 DateTime 类型序列化，才能与库中存储格式正确比较
+        query = text(f"SELECT timestamp FROM market_data WHERE {' AND '.join(conditions)} ORDER BY timestamp")
+        query = query.bindparams(*[bindparam(name, type_=DateTime) for name in params if name.endswith('_time')])
+        rows = session.execute(query, params).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        return OHLCVResampler.to_epoch_ms(pd.to_datetime([row[0] for row in rows]))
+
+    def get_coverage(self, session, symbol: str, interval: str) -> np.ndarray:
+        """已覆盖区段，(n, 2) 毫秒数组，按起点排序"""
+        rows = session.query(DataCoverage.start_time, DataCoverage.end_time).filter(
+            DataCoverage.symbol == symbol,
+            DataCoverage.interval == interval
+        ).order_by(DataCoverage.start_time).all()
+        if not rows:
+            return np.empty((0, 2), dtype=np.int64)
+        starts = OHLCVResampler.to_epoch_ms([row[0] for row in rows])
+        ends = OHLCVResampler.to_epoch_ms([row[1] for row in rows])
+        return np.column_stack((starts, ends))
+
+    def record_coverage(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ):
+        """记录一段已同步的时间范围，并与相邻/重叠的区段合并（不提交）"""
+        interval_ms = OHLCVResampler.INTERVAL_MS[interval]
+        start_ms, end_ms = self._align(self._to_ms(start_time), self._to_ms(end_time), interval_ms)
+        if start_ms > end_ms:
+            return
+
+        # 与新区段重叠或首尾相接的已有区段
+        overlapping = session.query(DataCoverage).filter(
+            DataCoverage.symbol == symbol,
+            DataCoverage.interval == interval,
+            DataCoverage.start_time <= self._to_datetime(end_ms + interval_ms),
+            DataCoverage.end_time >= self._to_datetime(start_ms - interval_ms)
+        ).all()
+
+        for row in overlapping:
+            start_ms = min(start_ms, self._to_ms(row.start_time))
+            end_ms = max(end_ms, self._to_ms(row.end_time))
+            session.delete(row)
+        session.flush()
+
+        session.add(DataCoverage(
+            symbol=symbol,
+            interval=interval,
+            start_time=self._to_datetime(start_ms),
+            end_time=self._to_datetime(end_ms)
+        ))
+
+    def remove_coverage(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ):
+        """从覆盖索引中移除一段时间范围（该范围的数据被删除后调用，不提交）"""
+        interval_ms = OHLCVResampler.INTERVAL_MS[interval]
+        start_ms, end_ms = self._align(self._to_ms(start_time), self._to_ms(end_time), interval_ms)
+        if start_ms > end_ms:
+            return
+
+        overlapping = session.query(DataCoverage).filter(
+            DataCoverage.symbol == symbol,
+            DataCoverage.interval == interval,
+            DataCoverage.start_time <= self._to_datetime(end_ms),
+            DataCoverage.end_time >= self._to_datetime(start_ms)
+        ).all()
+
+        # 区段与删除范围相交的部分去掉，两端剩余部分保留
+        remaining = []
+        for row in overlapping:
+            row_start, row_end = self._to_ms(row.start_time), self._to_ms(row.end_time)
+            if row_start < start_ms:
+                remaining.append((row_start, start_ms - interval_ms))
+            if row_end > end_ms:
+                remaining.append((end_ms + interval_ms, row_end))
+            session.delete(row)
+        session.flush()
+
+        session.add_all([
+            DataCoverage(
+                symbol=symbol,
+                interval=interval,
+                start_time=self._to_datetime(run_start),
+                end_time=self._to_datetime(run_end)
+            )
+            for run_start, run_end in remaining
+        ])
+
+    def rebuild_coverage(self, symbol: str, interval: str) -> int:
+        """由已存储的数据重建覆盖索引，返回区段数"""
+        interval_ms = OHLCVResampler.INTERVAL_MS[interval]
+        session = self.db.get_session()
+        try:
+            timestamps = self._load_timestamps(session, symbol, interval)
+            runs = self.contiguous_runs(timestamps, interval_ms)
+
+            session.query(DataCoverage).filter(
+                DataCoverage.symbol == symbol,
+                DataCoverage.interval == interval
+            ).delete(synchronize_session=False)
+            session.bulk_save_objects([
+                DataCoverage(
+                    symbol=symbol,
+                    interval=interval,
+                    start_time=self._to_datetime(run_start),
+                    end_time=self._to_datetime(run_end)
+                )
+                for run_start, run_end in runs
+            ])
+            session.commit()
+            logger.info(f"重建覆盖索引: {symbol} {interval} {len(timestamps)} 条, {len(runs)} 个区段")
+            return len(runs)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def ensure_coverage(self, symbol: str, interval: str) -> bool:
+        """没有任何覆盖记录时（旧数据库）由已存储的数据建立覆盖索引，返回是否重建
+
+        需在首尾同步之前调用：否则新同步的区段写入索引后，已存储的历史数据会被当作缺口重新下载。
+        """
+        session = self.db.get_session()
+        try:
+            if len(self.get_coverage(session, symbol, interval)):
+                return False
+        finally:
+            session.close()
+        self.rebuild_coverage(symbol, interval)
+        return True
+
+    def find_gaps(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """根据覆盖索引查找缺口
+
+        没有任何覆盖记录但已有数据时（旧数据库），先由数据重建索引。
+        """
+        interval_ms = OHLCVResampler.INTERVAL_MS[interval]
+        start_ms, end_ms = self._align(self._to_ms(start_time), self._to_ms(end_time), interval_ms)
+
+        self.ensure_coverage(symbol, interval)
+        session = self.db.get_session()
+        try:
+            coverage = self.get_coverage(session, symbol, interval)
+        finally:
+            session.close()
+
+        gaps = self.complement(coverage, start_ms, end_ms, interval_ms)
+        return [(self._to_datetime(s), self._to_datetime(e)) for s, e in gaps]
+
+    def scan_gaps(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """扫描已存储数据，与期望时间网格比对，返回缺失的区段"""
+        interval_ms = OHLCVResampler.INTERVAL_MS[interval]
+        start_ms, end_ms = self._align(self._to_ms(start_time), self._to_ms(end_time), interval_ms)
+
+        session = self.db.get_session()
+        try:
+            timestamps = self._load_timestamps(session, symbol, interval, start_ms, end_ms)
+        finally:
+            session.close()
+
+        runs = self.contiguous_runs(timestamps, interval_ms)
+        gaps = self.complement(runs, start_ms, end_ms, interval_ms)
+        logger.info(f"缺口扫描: {symbol} {interval} {len(timestamps)} 条, 发现 {len(gaps)} 处缺口, "
+                    f"缺失 {int(((gaps[:, 1] - gaps[:, 0]) // interval_ms + 1).sum()) if len(gaps) else 0} 条")
+        return [(self._to_datetime(s), self._to_datetime(e)) for s, e in gaps]
@@ -0,0 +1,290 @@
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pytz
+from sqlalchemy import select
+
+from ..models.database import DatabaseManager, MarketData, TechnicalIndicators
+from ..models.bulk_writer import BulkWriter
+from ..models.chunked_reader import ChunkedReader
+from ..models.bar_store import open_bar_store
+from ..data.storage.bar_cache import ColumnarBarCache
+from ..data.storage.hot_cache import HotBarCache
+from ..data.storage.history_archive import HistoryArchiveReader, HistoryArchiveWriter
+from ..data.processors.resampler import OHLCVResampler
+from .coverage_service import CoverageService
+from ..utils.logger import Logger
+from ..config.config import Config
+
+logger = Logger(__name__)
+
+
+class HistoryArchiveService:
+    """K线与技术指标的压缩历史归档（导出/恢复）
+
+    每个交易对导出为一个 .hist 文件（见 HistoryArchiveWriter），多个交易对并行
+    编码和解码。恢复时可以只取部分交易对和时间范围，只解压相交的列块；
+    K线按当前 database.layout 写入，同时登记覆盖范围并失效缓存。
+    """
+
+    MARKET_DATA = 'market_data'
+    INDICATORS = 'technical_indicators'
+    KEY_COLUMNS = ['symbol', 'interval', 'timestamp']
+    BAR_COLUMNS = list(ColumnarBarCache.COLUMNS)
+    PRICE_COLUMNS = {'open', 'high', 'low', 'close'}
+    INDICATOR_COLUMNS = [
+        column.name for column in TechnicalIndicators.__table__.columns
+        if column.name not in ('id', 'symbol', 'interval', 'timestamp')
+    ]
+
+    def __init__(self, max_workers: int = 4, block_rows: int = 65536, level: int = 3):
+        self.db = DatabaseManager()
+        self.config = Config()
+        self.store = open_bar_store(self.config)
+        self.reader = ChunkedReader(chunk_size=block_rows)
+        self.writer = BulkWriter(chunk_size=block_rows)
+        self.coverage = CoverageService()
+        self.bar_cache = ColumnarBarCache.from_config(self.config)
+        self.hot_cache = HotBarCache.from_config(self.config)
+        self.max_workers = max_workers
+        self.block_rows = block_rows
+        self.level = level
+
+        # SQLite 同一时间只允许一个写事务，解码仍并行，写入串行
+        self._write_lock = threading.Lock()
+
+    def _writing(self):
+        if self.db.engine.dialect.name == 'sqlite':
+            return self._write_lock
+        return contextlib.nullcontext()
+
+    @staticmethod
+    def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        if value is not None and value.tzinfo:
+            return value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _to_ms(value: Optional[datetime]) -> Optional[int]:
+        if value is None:
+            return None
+        return int(OHLCVResampler.to_epoch_ms([value])[0])
+
+    # ---- 导出 ----
+
+    def _series(self, symbols: Optional[List[str]] = None) -> Dict[str, List[Tuple[str, str]]]:
+        """{交易对: [(表, 周期)]}"""
+        session = self.db.get_session()
+        try:
+            if self.store:
+                bars = self.store.series(session)
+            else:
+                bars = session.execute(select(MarketData.symbol, MarketData.interval).distinct()).fetchall()
+            indicators = session.execute(
+                select(TechnicalIndicators.symbol, TechnicalIndicators.interval).distinct()
+            ).fetchall()
+        finally:
+            session.close()
+
+        series = {}
+        for table, rows in ((self.MARKET_DATA, bars), (self.INDICATORS, indicators)):
+            for symbol, interval in sorted(tuple(row) for row in rows):
+                if symbols and symbol not in symbols:
+                    continue
+                series.setdefault(symbol, []).append((table, interval))
+        return series
+
+    def _iter_table(
+        self,
+        table: str,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """按块读取一个交易对/周期，timestamp 转为 int64 毫秒"""
+        if table == self.MARKET_DATA and self.store:
+            chunks = self.store.iter_read(
+                symbol, interval, start_time, end_time, self.BAR_COLUMNS,
+                chunk_size=self.block_rows, as_numpy=True
+            )
+        else:
+            model, columns = (
+                (MarketData, self.BAR_COLUMNS) if table == self.MARKET_DATA
+                else (TechnicalIndicators, self.INDICATOR_COLUMNS)
+            )
+            query = ChunkedReader.range_query(model, symbol, interval, start_time, end_time, columns)
+            chunks = self.reader.iter_query(query, self.block_rows, as_numpy=True)
+
+        for arrays in chunks:
+            arrays['timestamp'] = arrays['timestamp'].astype('datetime64[ms]').astype(np.int64)
+            yield arrays
+
+    def _export_symbol(
+        self,
+        directory: Path,
+        symbol: str,
+        series: List[Tuple[str, str]],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict:
+        """导出单个交易对（在线程池中执行）"""
+        started = time.perf_counter()
+        path = directory / f'{symbol}{HistoryArchiveWriter.FILE_SUFFIX}'
+        result = {'symbol': symbol, 'file': path.name, 'rows': 0, 'bytes': 0, 'seconds': 0.0, 'error': None}
+        try:
+            with HistoryArchiveWriter(path, symbol, self.level) as writer:
+                for table, interval in series:
+                    # 价格与指标序列相邻值接近，差分后压缩；成交量等不做差分
+                    delta = self.PRICE_COLUMNS if table == self.MARKET_DATA else set(self.INDICATOR_COLUMNS)
+                    for arrays in self._iter_table(table, symbol, interval, start_time, end_time):
+                        writer.write_block(table, interval, arrays, delta)
+                        result['rows'] += len(arrays['timestamp'])
+            result['bytes'] = path.stat().st_size
+        except Exception as e:
+            result['error'] = str(e)
+            logger.error(f"导出历史归档失败: {symbol} - {e}")
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    def export(
+        self,
+        directory: Union[str, Path],
+        symbols: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Dict:
+        """导出K线和技术指标到目录，每个交易对一个文件
+
+        返回 {'files', 'failed', 'rows', 'bytes', 'seconds', 'rows_per_second'}。
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        start_time = self._to_naive_utc(start_time) or datetime.min
+        end_time = self._to_naive_utc(end_time) or datetime.max
+
+        started = time.perf_counter()
+        series = self._series(symbols)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda symbol: self._export_symbol(directory, symbol, series[symbol], start_time, end_time),
+                series
+            ))
+        for result in results:
+            logger.info(f"导出 {result['file']}: {result['rows']} 条, "
+                        f"{result['bytes'] / 1024 / 1024:.1f} MB, {result['seconds']:.2f}s")
+        return self._summary(results, started, '导出')
+
+    # ---- 恢复 ----
+
+    def _write_block(self, session, table: str, symbol: str, interval: str, arrays: Dict[str, np.ndarray], force_update: bool):
+        df = HistoryArchiveReader.to_frame(arrays)
+        if table == self.INDICATORS:
+            self.writer.write(
+                TechnicalIndicators, df, key_columns=self.KEY_COLUMNS, update=force_update,
+                constants={'symbol': symbol, 'interval': interval}, index_column='timestamp', session=session
+            )
+            return
+
+        if self.store:
+            self.store.write(symbol, interval, df, update=force_update, session=session)
+        else:
+            self.writer.write(
+                MarketData, df, key_columns=self.KEY_COLUMNS, update=force_update,
+                constants={'symbol': symbol, 'interval': interval}, index_column='timestamp', session=session
+            )
+        # 归档中的连续区段登记为已覆盖
+        interval_ms = OHLCVResampler.INTERVAL_MS.get(interval)
+        if interval_ms:
+            for run_start, run_end in self.coverage.contiguous_runs(arrays['timestamp'], interval_ms):
+                self.coverage.record_coverage(
+                    session, symbol, interval,
+                    self.coverage._to_datetime(run_start), self.coverage._to_datetime(run_end)
+                )
+
+    def _restore_file(self, path: Path, start_ms: Optional[int], end_ms: Optional[int], force_update: bool) -> Dict:
+        """恢复单个归档文件（在线程池中执行）"""
+        started = time.perf_counter()
+        result = {'symbol': path.stem, 'file': path.name, 'rows': 0, 'bytes': path.stat().st_size,
+                  'seconds': 0.0, 'error': None}
+        try:
+            reader = HistoryArchiveReader(path)
+            symbol = result['symbol'] = reader.symbol
+            for table, interval in reader.series():
+                first = last = None
+                for arrays in reader.iter_blocks(table, interval, start_ms, end_ms):
+                    with self._writing():
+                        session = self.db.get_session()
+                        try:
+                            self._write_block(session, table, symbol, interval, arrays, force_update)
+                            session.commit()
+                        except Exception:
+                            session.rollback()
+                            raise
+                        finally:
+                            session.close()
+                    result['rows'] += len(arrays['timestamp'])
+                    first = arrays['timestamp'][0] if first is None else first
+                    last = arrays['timestamp'][-1]
+
+                if table == self.MARKET_DATA and first is not None:
+                    first, last = self.coverage._to_datetime(first), self.coverage._to_datetime(last)
+                    if self.bar_cache:
+                        self.bar_cache.invalidate(symbol, interval, first, last)
+                    if self.hot_cache:
+                        self.hot_cache.invalidate(symbol, interval)
+        except Exception as e:
+            result['error'] = str(e)
+            logger.error(f"恢复历史归档失败: {path} - {e}")
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    def restore(
+        self,
+        directory: Union[str, Path],
+        symbols: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        force_update: bool = False
+    ) -> Dict:
+        """从目录恢复归档，可只恢复部分交易对和时间范围
+
+        返回 {'files', 'failed', 'rows', 'bytes', 'seconds', 'rows_per_second'}。
+        """
+        paths = HistoryArchiveReader.discover(directory, symbols)
+        logger.info(f"发现 {len(paths)} 个历史归档文件: {directory}")
+        start_ms = self._to_ms(self._to_naive_utc(start_time))
+        end_ms = self._to_ms(self._to_naive_utc(end_time))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda path: self._restore_file(path, start_ms, end_ms, force_update), paths
+            ))
+        for result in results:
+            logger.info(f"恢复 {result['file']}: {result['rows']} 条, {result['seconds']:.2f}s")
+        return self._summary(results, started, '恢复')
+
+    @staticmethod
+    def _summary(results: List[Dict], started: float, action: str) -> Dict:
+        rows = sum(result['rows'] for result in results)
+        size = sum(result['bytes'] for result in results)
+        seconds = time.perf_counter() - started
+        failed = [result for result in results if result['error']]
+        summary = {
+            'files': len(results),
+            'failed': failed,
+            'rows': rows,
+            'bytes': size,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds > 0 else 0.0
+        }
+        logger.info(f"历史归档{action}完成: {len(results)} 个文件, 失败 {len(failed)}, {rows} 条, "
+                    f"{size / 1024 / 1024:.1f} MB, {seconds:.1f}s, {summary['rows_per_second']:.0f} 条/秒")
+        return summary
@@ -1,39 +1,93 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Callable, Dict, Optional, List, Union
 import pandas as pd
-from sqlalchemy.dialects.postgresql import insert
+import numpy as np
 from sqlalchemy import select, and_
 import math
 import pytz
 
 from ..models.database import DatabaseManager, MarketData, DataSyncStatus
+from ..models.bulk_writer import BulkWriter
+from ..models.chunked_reader import ChunkedReader
+from ..models.bar_store import open_bar_store
+from ..data.storage.bar_cache import ColumnarBarCache
+from ..data.storage.hot_cache import HotBarCache
+from ..data.processors.resampler import OHLCVResampler
 from ..data.collectors.binance_collector import BinanceDataCollector
+from .resampling_service import ResamplingService
+from .coverage_service import CoverageService
+from .retention_service import RetentionService
 from ..utils.logger import Logger
 from ..config.config import Config
 
 logger = Logger(__name__)
 
 class MarketDataService:
+    # 采集器列名 -> market_data 列名
+    COLUMN_MAPPING = {
+        'trades': 'trades_count',
+        'taker_buy_base': 'taker_buy_volume',
+        'taker_buy_quote': 'taker_buy_quote_volume'
+    }
+    
     def __init__(self):
         self.db = DatabaseManager()
         self.config = Config()
         self.collector = BinanceDataCollector(
             api_key=self.config.get('api.binance.api_key'),
-            api_secret=self.config.get('api.binance.api_secret')
+            api_secret=self.config.get('api.binance.api_secret'),
+            weight_limit=self.config.get('api.binance.weight_limit', 6000),
+            max_concurrency=self.config.get('api.binance.max_concurrency', 8)
         )
         
         # 每批次同步的天数（币安API限制）
         self.batch_days = 7
         
+        # 高周期K线由本地 1m 数据聚合生成
+        self.resampler = ResamplingService()
+        
+        # 已同步时间范围的覆盖索引，用于发现中间缺口
+        self.coverage = CoverageService()
+        
+        # 各周期K线的保留策略，超过保留期的数据不再同步
+        self.retention = RetentionService(self.resampler, self.coverage)
+        
+        # 批量写入器
+        self.writer = BulkWriter()
+        
+        # database.layout 为 compact/partitioned 时K线经由对应存储读写，否则直接读写 market_data
+        self.store = open_bar_store(self.config)
+        
+        # 按日分区的列式K线缓存
+        self.bar_cache = ColumnarBarCache.from_config(self.config)
+        
+        # 进程内最近K线窗口，同步写入后增量追加
+        self.hot_cache = HotBarCache.from_config(self.config)
+        
+        # 分块流式读取
+        self.reader = ChunkedReader()
+        
+    async def close(self):
+        """释放采集器的HTTP连接池"""
+        await self.collector.close()
+        
     async def sync_market_data(
         self,
         symbol: str,
         interval: str,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        force_update: bool = False
+        force_update: bool = False,
+        progress_callback: Optional[Callable[[datetime, datetime, bool], None]] = None,
+        fill_gaps: bool = True
     ):
-        """同步市场数据"""
+        """同步市场数据
+        
+        progress_callback(batch_start, batch_end, success) 在每批次完成后调用。
+        fill_gaps 为 True 时在首尾同步后按覆盖索引补齐中间缺口。
+        每次同步使用独立的数据库会话，并发的同步任务之间互不影响。
+        """
         try:
             # 使用UTC时间
             now = datetime.now(pytz.UTC)
@@ -53,42 +107,44 @@ class MarketDataService:
             elif not end_time.tzinfo:
                 end_time = pytz.UTC.localize(end_time)
             
+            horizon = self.retention.horizon(interval, now)
+            if horizon and start_time < horizon:
+                logger.info(f"{interval} 只保留 {horizon} 之后的K线，同步起点调整为该时间")
+                start_time = horizon
+            
             logger.info(f"计划同步时间范围: {start_time} 到 {end_time}")
             logger.info(f"总天数: {(end_time - start_time).days}天")
             
+            if self.resampler.is_derived(interval):
+                # 高周期不再从交易所下载，直接由 1m 数据聚合
+                logger.info(f"由 1m 数据聚合生成: {symbol} {interval}")
+                await self.resampler.rollup(symbol, interval, start_time, end_time)
+                if progress_callback:
+                    progress_callback(start_time, end_time, True)
+                return
+            
             # 检查数据库中最早的记录
-            session = self.db.get_session()
+            session = self.db.new_session()
             try:
-                earliest_record = session.query(MarketData.timestamp)\
-                    .filter(
-                        MarketData.symbol == symbol,
-                        MarketData.interval == interval
-                    )\
-                    .order_by(MarketData.timestamp.asc())\
-                    .first()
+                earliest_time = self._stored_timestamp(session, symbol, interval)
                 
-                if earliest_record and not force_update:
-                    earliest_time = earliest_record[0]
+                if earliest_time and not force_update:
                     if earliest_time.tzinfo:
                         earliest_time = earliest_time.replace(tzinfo=pytz.UTC)
                     else:
                         earliest_time = pytz.UTC.localize(earliest_time)
                     
+                    # 旧数据库没有覆盖索引时，先由已存储的数据建立，再做首尾同步
+                    self.coverage.ensure_coverage(symbol, interval)
+                    
                     if earliest_time > start_time:
                         logger.info(f"发现历史数据缺口: {start_time} 到 {earliest_time}")
-                        await self._sync_data_range(symbol, interval, start_time, earliest_time, force_update)
+                        await self._sync_data_range(symbol, interval, start_time, earliest_time, force_update, progress_callback, session)
                     
                     # 同步最新数据
-                    latest_record = session.query(MarketData.timestamp)\
-                        .filter(
-                            MarketData.symbol == symbol,
-                            MarketData.interval == interval
-                        )\
-                        .order_by(MarketData.timestamp.desc())\
-                        .first()
+                    latest_time = self._stored_timestamp(session, symbol, interval, latest=True)
                     
-                    if latest_record:
-                        latest_time = latest_record[0]
+                    if latest_time:
                         if latest_time.tzinfo:
                             latest_time = latest_time.replace(tzinfo=pytz.UTC)
                         else:
@@ -96,11 +152,15 @@ class MarketDataService:
                         
                         if latest_time < end_time:
                             logger.info(f"同步最新数据: {latest_time} 到 {end_time}")
-                            await self._sync_data_range(symbol, interval, latest_time, end_time, force_update)
+                            await self._sync_data_range(symbol, interval, latest_time, end_time, force_update, progress_callback, session)
+                    
+                    # 补齐中间缺口
+                    if fill_gaps:
+                        await self.repair_gaps(symbol, interval, start_time, end_time, progress_callback=progress_callback, session=session)
                 else:
                     # 首次同步或强制更新
                     logger.info("开始全量数据同步")
-                    await self._sync_data_range(symbol, interval, start_time, end_time, force_update)
+                    await self._sync_data_range(symbol, interval, start_time, end_time, force_update, progress_callback, session)
                 
             finally:
                 session.close()
@@ -109,40 +169,81 @@ class MarketDataService:
             logger.error(f"同步数据失败: {symbol} {interval} - {e}")
             raise e
             
-    async def _sync_data_range(
+    async def repair_gaps(
         self,
         symbol: str,
         interval: str,
         start_time: datetime,
         end_time: datetime,
-        force_update: bool
-    ):
-        """同步指定时间范围的数据"""
-        total_days = (end_time - start_time).days
-        batch_count = math.ceil(total_days / self.batch_days)
+        rescan: bool = False,
+        progress_callback: Optional[Callable[[datetime, datetime, bool], None]] = None,
+        session=None
+    ) -> List:
+        """查找并只补齐缺失的时间段，返回缺口列表
         
-        logger.info(f"开始同步数据范围: {start_time} 到 {end_time}")
-        logger.info(f"���天数: {total_days}天, 分{batch_count}批同步")
+        默认依据覆盖索引（失败批次不会进入索引）；rescan 为 True 时扫描已存储数据
+        与时间网格比对，并据此重建覆盖索引。
+        """
+        if rescan:
+            gaps = self.coverage.scan_gaps(symbol, interval, start_time, end_time)
+            self.coverage.rebuild_coverage(symbol, interval)
+        else:
+            gaps = self.coverage.find_gaps(symbol, interval, start_time, end_time)
         
-        current_start = start_time
-        for batch in range(batch_count):
-            batch_end = min(
-                current_start + timedelta(days=self.batch_days),
-                end_time
-            )
+        if gaps:
+            logger.info(f"发现 {len(gaps)} 处数据缺口: {symbol} {interval}")
+        for gap_start, gap_end in gaps:
+            logger.info(f"补齐缺口: {gap_start} 到 {gap_end}")
+            await self._sync_data_range(symbol, interval, gap_start, gap_end, False, progress_callback, session)
+        return gaps
             
-            logger.info(f"同步第 {batch + 1}/{batch_count} 批数据")
-            logger.info(f"批次时间范围: {current_start} 到 {batch_end}")
+    async def _sync_data_range(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        force_update: bool,
+        progress_callback: Optional[Callable[[datetime, datetime, bool], None]] = None,
+        session=None
+    ):
+        """同步指定时间范围的数据（未传入 session 时使用独立会话）"""
+        own_session = session is None
+        session = session or self.db.new_session()
+        try:
+            total_days = (end_time - start_time).days
+            # 按实际时长计算批次数，不足一天的范围也至少同步一批
+            batch_count = max(1, math.ceil((end_time - start_time) / timedelta(days=self.batch_days)))
             
-            await self._sync_batch(
-                symbol,
-                interval,
-                current_start,
-                batch_end,
-                force_update
-            )
+            logger.info(f"开始同步数据范围: {start_time} 到 {end_time}")
+            logger.info(f"总天数: {total_days}天, 分{batch_count}批同步")
             
-            current_start = batch_end
+            current_start = start_time
+            for batch in range(batch_count):
+                batch_end = min(
+                    current_start + timedelta(days=self.batch_days),
+                    end_time
+                )
+                
+                logger.info(f"同步第 {batch + 1}/{batch_count} 批数据")
+                logger.info(f"批次时间范围: {current_start} 到 {batch_end}")
+                
+                success = await self._sync_batch(
+                    symbol,
+                    interval,
+                    current_start,
+                    batch_end,
+                    force_update,
+                    session
+                )
+                
+                if progress_callback:
+                    progress_callback(current_start, batch_end, success)
+                
+                current_start = batch_end
+        finally:
+            if own_session:
+                session.close()
     
     async def _sync_batch(
         self,
@@ -150,12 +251,14 @@ class MarketDataService:
         interval: str,
         start_time: datetime,
         end_time: datetime,
-        force_update: bool
-    ):
-        """同步一批数据"""
+        force_update: bool,
+        session
+    ) -> bool:
+        """同步一批数据，返回是否成功
+        
+        session 为所属同步任务的独立会话：本批次在其上提交或回滚，由调用方关闭。
+        """
         try:
-            session = self.db.get_session()
-            
             # 获取数据
             data = await self.collector.fetch_historical_data(
                 symbol=symbol,
@@ -166,43 +269,26 @@ class MarketDataService:
             
             if data.empty:
                 logger.warning(f"没有新的数据需要同步: {symbol} {interval}")
-                return
-            
-            # 准备数据记录
-            records = []
-            for index, row in data.iterrows():
-                record = {
-                    'symbol': symbol,
-                    'interval': interval,
-                    'timestamp': index,
-                    'open': float(row['open']),
-                    'high': float(row['high']),
-                    'low': float(row['low']),
-                    'close': float(row['close']),
-                    'volume': float(row['volume']),
-                    'quote_volume': float(row['quote_volume']),
-                    'trades_count': int(row['trades']),
-                    'taker_buy_volume': float(row['taker_buy_base']),
-                    'taker_buy_quote_volume': float(row['taker_buy_quote'])
-                }
-                records.append(record)
-            
-            # 使用 upsert 插入数据
-            stmt = insert(MarketData).values(records)
+                # 交易所在该范围内没有数据（如停机），同样视为已覆盖
+                self.coverage.record_coverage(session, symbol, interval, start_time, end_time)
+                session.commit()
+                return True
             
-            if force_update:
-                update_cols = {col.name: stmt.excluded[col.name] 
-                             for col in MarketData.__table__.columns 
-                             if col.name not in ['id', 'symbol', 'interval', 'timestamp']}
-                
-                stmt = stmt.on_conflict_do_update(
-                    constraint='unique_market_data',
-                    set_=update_cols
-                )
+            # 列名对齐到表结构后批量写入
+            bars = data.rename(columns=self.COLUMN_MAPPING)
+            if self.store:
+                self.store.write(symbol, interval, bars, update=force_update, session=session)
             else:
-                stmt = stmt.on_conflict_do_nothing()
-            
-            session.execute(stmt)
+                self.writer.write(
+                    MarketData,
+                    bars,
+                    key_columns=['symbol', 'interval', 'timestamp'],
+                    update=force_update,
+                    constants={'symbol': symbol, 'interval': interval},
+                    index_column='timestamp',
+                    session=session
+                )
+            self.coverage.record_coverage(session, symbol, interval, start_time, end_time)
             
             # 更新同步状态
             await self._update_sync_status(
@@ -214,69 +300,255 @@ class MarketDataService:
             )
             
             session.commit()
-            logger.info(f"成功同步 {len(records)} 条数据")
+            logger.info(f"成功同步 {len(data)} 条数据")
+            
+            self.refresh_cache(symbol, interval, data.index[0], data.index[-1])
+            self.refresh_hot_cache(symbol, interval, start_time, end_time)
+            
+            # 1m 数据更新后增量刷新高周期K线
+            if interval == self.resampler.SOURCE_INTERVAL:
+                await self.resampler.update_rollups(symbol, data.index[0], data.index[-1], session=session)
+            return True
             
         except Exception as e:
             logger.error(f"批次同步失败: {e}")
-            if session:
-                await self._update_sync_status(
-                    session,
-                    symbol,
-                    interval,
-                    start_time,
-                    'failed',
-                    str(e)
-                )
-                session.commit()
-        finally:
-            if session:
-                session.close()
+            session.rollback()
+            await self._update_sync_status(
+                session,
+                symbol,
+                interval,
+                start_time,
+                'failed',
+                str(e)
+            )
+            session.commit()
+            return False
     
     async def get_market_data(
         self,
         symbol: str,
         interval: str,
         start_time: datetime,
-        end_time: Optional[datetime] = None
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        bucket: Optional[str] = None
     ) -> pd.DataFrame:
-        """获取市场数据"""
+        """获取市场数据
+        
+        最近的时间窗口从进程内缓存读取；其余已结束的自然日从列式缓存读取，
+        未结束的部分从数据库读取。columns 指定只返回的列（默认全部）。
+        只读内存即可返回的请求直接处理，需要读文件或数据库时在线程池中执行，
+        不阻塞事件循环。
+        
+        bucket 为更高的周期（如 interval 为 1m、bucket 为 1h）时返回按 UTC 对齐的时间桶
+        聚合后的K线：已缓存的日在缓存内聚合，其余在数据库内 GROUP BY 聚合，
+        只有聚合结果离开数据库。范围边缘的桶只包含 [start_time, end_time] 内的K线。
+        """
+        start_time = self._to_naive_utc(start_time)
+        end_time = self._to_naive_utc(end_time or datetime.utcnow())
+        if bucket == interval:
+            bucket = None
+        if bucket and not OHLCVResampler.can_resample(interval, bucket):
+            raise ValueError(f"无法由 {interval} K线聚合为 {bucket}")
+        
+        df = None
+        if self.hot_cache:
+            df = self.hot_cache.read(symbol, interval, start_time, end_time, None, columns)
+            if df is not None and bucket:
+                df = OHLCVResampler.aggregate(
+                    OHLCVResampler.to_epoch_ms(df.index),
+                    {name: df[name].to_numpy() for name in df.columns},
+                    OHLCVResampler.INTERVAL_MS[bucket]
+                )
+        if df is None:
+            loop = asyncio.get_running_loop()
+            if bucket:
+                df = await loop.run_in_executor(
+                    None, self._read_resampled, symbol, interval, bucket, start_time, end_time, columns
+                )
+            else:
+                df = await loop.run_in_executor(
+                    None, self._read_market_data, symbol, interval, start_time, end_time, columns
+                )
+        
+        if df.empty:
+            logger.warning(f"未找到市场数据: {symbol} {interval}")
+            return pd.DataFrame()
+        return df
+    
+    def _read_market_data(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """依次从进程内缓存、列式缓存、数据库读取 [start_time, end_time]"""
+        def loader(range_start: datetime, range_end: datetime) -> pd.DataFrame:
+            return self._load_market_data(symbol, interval, range_start, range_end)
+        
+        df = None
+        if self.hot_cache:
+            df = self.hot_cache.read(symbol, interval, start_time, end_time, loader, columns)
+        
+        if df is None:
+            # 结果要填充进程内缓存时读取全部列，否则列式缓存只读取需要的列
+            seed = self._is_recent(interval, start_time, end_time)
+            if self.bar_cache:
+                df = self.bar_cache.read(symbol, interval, start_time, end_time, loader, None if seed else columns)
+            else:
+                df = loader(start_time, end_time)
+            if seed and not df.empty:
+                self.hot_cache.seed(symbol, interval, df, start_time, end_time)
+            if columns is not None and not df.empty:
+                df = df[list(columns)]
+        return df
+    
+    def _read_resampled(
+        self,
+        symbol: str,
+        interval: str,
+        bucket: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """按时间桶聚合 [start_time, end_time]：已缓存的日在列式缓存内聚合，其余在数据库内聚合"""
+        bucket_ms = OHLCVResampler.INTERVAL_MS[bucket]
+        columns = list(columns or ColumnarBarCache.COLUMNS)
+        
+        def loader(range_start: datetime, range_end: datetime) -> pd.DataFrame:
+            return self._load_resampled(symbol, interval, range_start, range_end, bucket_ms, columns)
+        
+        if self.bar_cache:
+            return self.bar_cache.read_resampled(symbol, interval, start_time, end_time, bucket_ms, loader, columns)
+        return loader(start_time, end_time)
+    
+    def _load_resampled(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        bucket_ms: int,
+        columns: List[str]
+    ) -> pd.DataFrame:
+        """在数据库内按时间桶聚合 [start_time, end_time]，以桶起点为索引"""
+        if self.store:
+            return self.store.resample(symbol, interval, start_time, end_time, bucket_ms, columns)
+        
         session = self.db.get_session()
         try:
-            # 修改查询，明确指定列名
-            query = f"""
-                SELECT 
-                    timestamp,
-                    open,
-                    high,
-                    low,
-                    close,
-                    volume,
-                    quote_volume as quote_volume,
-                    trades_count,
-                    taker_buy_volume,
-                    taker_buy_quote_volume
-                FROM market_data 
-                WHERE symbol = '{symbol}' 
-                AND interval = '{interval}'
-                AND timestamp BETWEEN '{start_time}' AND '{end_time or datetime.utcnow()}'
-                ORDER BY timestamp ASC
-            """
-            
-            df = pd.read_sql(query, session.bind)
-            
-            if df.empty:
-                logger.warning(f"未找到市场数据: {symbol} {interval}")
-                return pd.DataFrame()
-            
-            # 确保时间戳列存在并设为索引
-            if 'timestamp' in df.columns:
-                df.set_index('timestamp', inplace=True)
-            
-            return df
-            
+            query = ChunkedReader.bucket_query(
+                MarketData, symbol, interval, start_time, end_time, bucket_ms,
+                session.get_bind().dialect.name, columns
+            )
+            return self.reader.read_buckets(query, columns, session=session)
         finally:
             session.close()
     
+    def _is_recent(self, interval: str, start_time: datetime, end_time: datetime) -> bool:
+        """请求范围是否完全落在进程内缓存可容纳的最近窗口内"""
+        if not self.hot_cache:
+            return False
+        interval_ms = OHLCVResampler.INTERVAL_MS.get(interval)
+        if interval_ms is None:
+            return False
+        horizon = datetime.utcnow() - timedelta(milliseconds=interval_ms * self.hot_cache.capacity)
+        return start_time >= horizon and end_time >= datetime.utcnow() - timedelta(milliseconds=interval_ms)
+    
+    @staticmethod
+    def _to_naive_utc(value: datetime) -> datetime:
+        if value.tzinfo:
+            return value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return value
+    
+    def _load_market_data(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> pd.DataFrame:
+        """从数据库读取 [start_time, end_time] 的K线，以时间戳为索引"""
+        if self.store:
+            return self.store.read(symbol, interval, start_time, end_time, ColumnarBarCache.COLUMNS)
+        
+        query = ChunkedReader.range_query(
+            MarketData, symbol, interval, start_time, end_time, ColumnarBarCache.COLUMNS
+        )
+        df = self.reader.read(query)
+        if df.empty:
+            return pd.DataFrame(columns=ColumnarBarCache.COLUMNS, index=pd.DatetimeIndex([], name='timestamp'))
+        return df
+    
+    async def iter_market_data(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        chunk_size: int = 50000,
+        as_numpy: bool = False
+    ) -> AsyncIterator[Union[pd.DataFrame, Dict[str, np.ndarray]]]:
+        """按时间顺序分块读取市场数据，每块最多 chunk_size 行
+        
+        as_numpy 为 True 时每块为 {列名: 数组}，否则为以时间戳为索引的 DataFrame。
+        """
+        start_time = self._to_naive_utc(start_time)
+        end_time = self._to_naive_utc(end_time or datetime.utcnow())
+        columns = columns or ColumnarBarCache.COLUMNS
+        
+        if self.store:
+            chunks = self.store.aiter_read(symbol, interval, start_time, end_time, columns, chunk_size, as_numpy)
+        else:
+            query = ChunkedReader.range_query(MarketData, symbol, interval, start_time, end_time, columns)
+            chunks = self.reader.aiter_query(query, chunk_size, as_numpy)
+        async for chunk in chunks:
+            yield chunk
+    
+    def refresh_cache(self, symbol: str, interval: str, start_time: datetime, end_time: datetime):
+        """数据写入后刷新列式缓存中受影响的分区"""
+        if not self.bar_cache:
+            return
+        self.bar_cache.refresh(
+            symbol,
+            interval,
+            self._to_naive_utc(start_time),
+            self._to_naive_utc(end_time),
+            lambda range_start, range_end: self._load_market_data(symbol, interval, range_start, range_end)
+        )
+    
+    def refresh_hot_cache(self, symbol: str, interval: str, start_time: datetime, end_time: datetime):
+        """数据写入后同步进程内缓存中的窗口"""
+        if not self.hot_cache:
+            return
+        self.hot_cache.refresh(
+            symbol,
+            interval,
+            self._to_naive_utc(start_time),
+            self._to_naive_utc(end_time),
+            lambda range_start, range_end: self._load_market_data(symbol, interval, range_start, range_end)
+        )
+    
+    def _stored_timestamp(self, session, symbol: str, interval: str, latest: bool = False) -> Optional[datetime]:
+        """已存储的最早（latest=True 时为最晚）K线开盘时间"""
+        if self.store:
+            bounds = self.store.bounds(session, symbol, interval)
+            return bounds[1 if latest else 0] if bounds else None
+        
+        order = MarketData.timestamp.desc() if latest else MarketData.timestamp.asc()
+        record = session.query(MarketData.timestamp)\
+            .filter(
+                MarketData.symbol == symbol,
+                MarketData.interval == interval
+            )\
+            .order_by(order)\
+            .first()
+        return record[0] if record else None
+    
     async def _get_sync_status(
         self,
         session,
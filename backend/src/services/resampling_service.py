@@ -0,0 +1,231 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import select, and_
+
+from ..models.database import DatabaseManager, MarketData
+from ..models.bulk_writer import BulkWriter
+from ..models.bar_store import open_bar_store
+from ..data.storage.bar_cache import ColumnarBarCache
+from ..data.storage.hot_cache import HotBarCache
+from ..data.processors.resampler import OHLCVResampler
+from ..utils.logger import Logger
+from ..config.config import Config
+
+logger = Logger(__name__)
+
+
+class ResamplingService:
+    """高周期K线本地聚合服务
+
+    由已存储的 1m K线聚合出 5m/15m/1h/4h/1d 等高周期K线并写入 market_data，
+    避免重复从交易所下载同一段行情。1m 数据写入后按受影响的时间桶增量重算，
+    未走完的时间桶在后续更新中被覆盖。已收盘但源K线不全的时间桶不写入，
+    缺口补齐（写入 1m）后会再次触发重算。
+    """
+
+    SOURCE_INTERVAL = '1m'
+    DEFAULT_DERIVED_INTERVALS = ['5m', '15m', '30m', '1h', '4h', '1d']
+
+    def __init__(self, target_intervals: Optional[List[str]] = None):
+        self.db = DatabaseManager()
+        self.config = Config()
+        self.writer = BulkWriter()
+        self.bar_cache = ColumnarBarCache.from_config(self.config)
+        self.hot_cache = HotBarCache.from_config(self.config)
+        self.store = open_bar_store(self.config)
+
+        if target_intervals is None:
+            derived = self.config.get('data.derived_intervals', self.DEFAULT_DERIVED_INTERVALS)
+            intervals = self.config.get('api.binance.intervals', ['1m', '5m', '15m'])
+            # 只有同步 1m 数据时才能在本地聚合
+            if self.SOURCE_INTERVAL in intervals:
+                target_intervals = [i for i in intervals if i in derived]
+            else:
+                target_intervals = []
+
+        self.target_intervals = [
+            interval for interval in target_intervals
+            if OHLCVResampler.can_resample(self.SOURCE_INTERVAL, interval)
+        ]
+
+    def is_derived(self, interval: str) -> bool:
+        """该周期是否由本地聚合生成"""
+        return interval in self.target_intervals
+
+    @staticmethod
+    def _to_naive_utc(value: datetime) -> datetime:
+        if value.tzinfo:
+            return value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return value
+
+    def _load_source(
+        self,
+        session,
+        symbol: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> pd.DataFrame:
+        """读取源周期K线"""
+        if self.store:
+            return self.store.read(
+                symbol, self.SOURCE_INTERVAL, start_time, end_time,
+                list(OHLCVResampler.AGGREGATIONS), session=session
+            )
+
+        columns = ['timestamp'] + list(OHLCVResampler.AGGREGATIONS)
+        query = select(*[getattr(MarketData, name) for name in columns]).where(
+            and_(
+                MarketData.symbol == symbol,
+                MarketData.interval == self.SOURCE_INTERVAL,
+                MarketData.timestamp >= start_time,
+                MarketData.timestamp <= end_time
+            )
+        ).order_by(MarketData.timestamp)
+
+        rows = session.execute(query).fetchall()
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.set_index('timestamp')
+
+    def _aligned_range(self, interval: str, start_time: datetime, end_time: datetime):
+        """将时间范围扩展到完整的时间桶边界（毫秒，闭区间）"""
+        bucket_ms = OHLCVResampler.INTERVAL_MS[interval]
+        start_ms, end_ms = OHLCVResampler.to_epoch_ms([start_time, end_time])
+        return start_ms - start_ms % bucket_ms, end_ms - end_ms % bucket_ms + bucket_ms - 1
+
+    def _complete_buckets(self, interval: str, bars: pd.DataFrame, now_ms: int) -> pd.DataFrame:
+        """去掉已收盘但源K线数量不足的时间桶（仍在进行中的时间桶保留）"""
+        bucket_ms = OHLCVResampler.INTERVAL_MS[interval]
+        expected = bucket_ms // OHLCVResampler.INTERVAL_MS[self.SOURCE_INTERVAL]
+        closed = OHLCVResampler.to_epoch_ms(bars.index) + bucket_ms <= now_ms
+        incomplete = closed & (bars['count'].to_numpy() < expected)
+        if incomplete.any():
+            logger.warning(f"跳过 {int(incomplete.sum())} 个源K线不全的 {interval} 时间桶, "
+                           f"首个: {bars.index[incomplete][0]}")
+            bars = bars[~incomplete]
+        return bars
+
+    def _write(self, session, symbol: str, interval: str, bars: pd.DataFrame):
+        """写入聚合结果，已存在的时间桶被覆盖"""
+        if self.store:
+            self.store.write(
+                symbol, interval, bars.drop(columns=['count']), update=True,
+                update_columns=list(OHLCVResampler.AGGREGATIONS), session=session
+            )
+            return
+        self.writer.write(
+            MarketData,
+            bars.drop(columns=['count']),
+            key_columns=['symbol', 'interval', 'timestamp'],
+            update=True,
+            update_columns=list(OHLCVResampler.AGGREGATIONS),
+            constants={'symbol': symbol, 'interval': interval},
+            index_column='timestamp',
+            session=session
+        )
+
+    async def update_rollups(
+        self,
+        symbol: str,
+        start_time: datetime,
+        end_time: datetime,
+        intervals: Optional[List[str]] = None,
+        session=None,
+        keep_incomplete: bool = False
+    ) -> Dict[str, int]:
+        """1m 数据更新后，重算受影响时间桶的高周期K线，返回各周期写入条数
+
+        传入 session 时在该会话上提交（或回滚）聚合结果，由调用方关闭；
+        否则使用独立会话。keep_incomplete 为 True 时源K线不全的时间桶也写入
+        （源数据即将删除、缺口无法再补齐时使用）。
+        """
+        return self.recompute_rollups(symbol, start_time, end_time, intervals, session, keep_incomplete)
+
+    def recompute_rollups(
+        self,
+        symbol: str,
+        start_time: datetime,
+        end_time: datetime,
+        intervals: Optional[List[str]] = None,
+        session=None,
+        keep_incomplete: bool = False
+    ) -> Dict[str, int]:
+        """update_rollups 的同步版本，供线程池中的调用方在持有写锁时使用"""
+        intervals = intervals or self.target_intervals
+        if not intervals:
+            return {}
+
+        start_time = self._to_naive_utc(start_time)
+        end_time = self._to_naive_utc(end_time)
+
+        # 按最大周期对齐读取一次源数据，各周期再按自身边界切片
+        ranges = {interval: self._aligned_range(interval, start_time, end_time) for interval in intervals}
+        load_start = min(start for start, _ in ranges.values())
+        load_end = max(end for _, end in ranges.values())
+
+        own_session = session is None
+        session = session or self.db.new_session()
+        try:
+            source = self._load_source(
+                session,
+                symbol,
+                pd.Timestamp(load_start, unit='ms').to_pydatetime(),
+                pd.Timestamp(load_end, unit='ms').to_pydatetime()
+            )
+            if source.empty:
+                return {}
+
+            source_ms = OHLCVResampler.to_epoch_ms(source.index)
+            now_ms = int(time.time() * 1000)
+            written = {}
+            for interval, (range_start, range_end) in ranges.items():
+                lo = np.searchsorted(source_ms, range_start, side='left')
+                hi = np.searchsorted(source_ms, range_end, side='right')
+                if lo >= hi:
+                    continue
+                bars = OHLCVResampler.resample(source.iloc[lo:hi], interval)
+                if not keep_incomplete:
+                    bars = self._complete_buckets(interval, bars, now_ms)
+                if bars.empty:
+                    continue
+                self._write(session, symbol, interval, bars)
+                written[interval] = bars
+
+            session.commit()
+
+            # 聚合结果变化的分区从列式缓存中失效，下次读取时重建；
+            # 进程内窗口直接合并写入的时间桶（覆盖写入，与数据库一致）
+            for interval, bars in written.items():
+                first, last = bars.index[0].to_pydatetime(), bars.index[-1].to_pydatetime()
+                if self.bar_cache:
+                    self.bar_cache.invalidate(symbol, interval, first, last)
+                if self.hot_cache:
+                    self.hot_cache.update(symbol, interval, bars, first, last)
+
+            written = {interval: len(bars) for interval, bars in written.items()}
+            logger.info(f"更新聚合K线: {symbol} {written}")
+            return written
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"聚合K线失败: {symbol} - {e}")
+            raise e
+        finally:
+            if own_session:
+                session.close()
+
+    async def rollup(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> int:
+        """聚合指定周期在时间范围内的K线"""
+        written = await self.update_rollups(symbol, start_time, end_time, [interval])
+        return written.get(interval, 0)
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pytz
+from sqlalchemy import func
+
+from ..models.database import DatabaseManager, MarketData
+from ..data.processors.resampler import OHLCVResampler
+from .resampling_service import ResamplingService
+from .coverage_service import CoverageService
+from ..utils.logger import Logger
+from ..config.config import Config
+
+logger = Logger(__name__)
+
+
+class RetentionService:
+    """K线保留策略
+
+    data.retention 配置各周期K线的保留天数，如 {'1m': 180}，未配置的周期永久保留。
+    保留期按 UTC 零点对齐，早于保留期的 1m K线删除前先按月重算本地聚合的高周期K线，
+    删除后从覆盖索引和缓存中移除对应范围；按月分区布局下清空的分区整表删除。
+    同步时早于保留期的范围不再下载。
+    """
+
+    def __init__(
+        self,
+        resampler: Optional[ResamplingService] = None,
+        coverage: Optional[CoverageService] = None
+    ):
+        self.db = DatabaseManager()
+        self.config = Config()
+        self.resampler = resampler or ResamplingService()
+        self.coverage = coverage or CoverageService()
+        self.store = self.resampler.store
+        self.bar_cache = self.resampler.bar_cache
+        self.hot_cache = self.resampler.hot_cache
+
+        self.policies = {}
+        for interval, days in (self.config.get('data.retention') or {}).items():
+            if interval not in OHLCVResampler.INTERVAL_MS:
+                raise ValueError(f"保留策略中的周期无效: {interval}")
+            self.policies[interval] = int(days)
+
+    def horizon(self, interval: str, now: Optional[datetime] = None) -> Optional[datetime]:
+        """该周期保留的最早开盘时间，未配置保留策略时返回 None"""
+        days = self.policies.get(interval)
+        if days is None:
+            return None
+        now = now or datetime.now(pytz.UTC)
+        return now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+
+    @staticmethod
+    def _to_naive_utc(value: datetime) -> datetime:
+        if value.tzinfo:
+            return value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _months(start_time: datetime, end_time: datetime) -> List[Tuple[datetime, datetime]]:
+        """按自然月切分 [start_time, end_time]"""
+        bounds = np.arange(
+            np.datetime64(start_time, 'M'), np.datetime64(end_time, 'M') + 2
+        ).astype('datetime64[ms]').astype(datetime)
+        bounds[0] = start_time
+        return [
+            (bounds[i], min(bounds[i + 1] - timedelta(milliseconds=1), end_time))
+            for i in range(len(bounds) - 1)
+        ]
+
+    def _earliest(self, session, symbol: str, interval: str) -> Optional[datetime]:
+        if self.store:
+            bounds = self.store.bounds(session, symbol, interval)
+            return bounds[0] if bounds else None
+        return session.query(func.min(MarketData.timestamp)).filter(
+            MarketData.symbol == symbol,
+            MarketData.interval == interval
+        ).scalar()
+
+    async def apply_policy(self, symbol: str, interval: str, now: Optional[datetime] = None) -> int:
+        """对一个交易对/周期执行保留策略，返回删除的K线数"""
+        horizon = self.horizon(interval, now)
+        if horizon is None:
+            return 0
+        end_time = self._to_naive_utc(horizon) - timedelta(milliseconds=1)
+
+        session = self.db.get_session()
+        try:
+            start_time = self._earliest(session, symbol, interval)
+        finally:
+            session.close()
+        if start_time is None or start_time > end_time:
+            return 0
+
+        if interval == self.resampler.SOURCE_INTERVAL:
+            if not self.resampler.target_intervals:
+                logger.warning(f"未配置本地聚合周期，跳过保留策略: {symbol} {interval}（删除前需先降采样）")
+                return 0
+            # 按月重算，避免一次载入全部历史 1m 数据；1m 删除后缺口无法再补，不完整的时间桶也保留
+            for month_start, month_end in self._months(start_time, end_time):
+                await self.resampler.update_rollups(symbol, month_start, month_end, keep_incomplete=True)
+
+        session = self.db.get_session()
+        try:
+            if self.store:
+                deleted = self.store.delete(session, symbol, interval, start_time, end_time)
+            else:
+                deleted = session.query(MarketData).filter(
+                    MarketData.symbol == symbol,
+                    MarketData.interval == interval,
+                    MarketData.timestamp <= end_time
+                ).delete(synchronize_session=False)
+            self.coverage.remove_coverage(session, symbol, interval, start_time, end_time)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"执行保留策略失败: {symbol} {interval} - {e}")
+            raise e
+        finally:
+            session.close()
+
+        if self.bar_cache:
+            self.bar_cache.invalidate(symbol, interval, start_time, end_time)
+        if self.hot_cache:
+            self.hot_cache.invalidate(symbol, interval)
+
+        logger.info(f"保留策略: {symbol} {interval} 删除 {start_time} 到 {end_time} 的 {deleted} 条K线")
+        return deleted
+
+    async def apply(
+        self,
+        symbols: Optional[List[str]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[Tuple[str, str], int]:
+        """对所有配置了保留策略的周期执行，返回各交易对/周期删除的K线数"""
+        symbols = symbols or self.config.get('api.binance.symbols', ['BTCUSDT'])
+        removed = {}
+        for interval in self.policies:
+            for symbol in symbols:
+                removed[(symbol, interval)] = await self.apply_policy(symbol, interval, now)
+        return removed
@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import pytz
+
+from .market_data_service import MarketDataService
+from ..utils.logger import Logger
+
+logger = Logger(__name__)
+
+
+class SyncJob:
+    """同步任务：一个交易对/周期在一段时间范围内的同步"""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+
+    _sequence = itertools.count()
+
+    def __init__(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        priority: int = 0
+    ):
+        self.symbol = symbol
+        self.interval = interval
+        self.start_time = start_time
+        self.end_time = end_time
+        self.priority = priority
+        # 同优先级按提交顺序执行
+        self.sequence = next(self._sequence)
+
+        self.status = self.PENDING
+        self.completed_seconds = 0.0
+        self.batches = 0
+        self.failed_batches = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.symbol} {self.interval} {self.start_time:%Y-%m-%d %H:%M}~{self.end_time:%Y-%m-%d %H:%M}"
+
+    @property
+    def total_seconds(self) -> float:
+        return max((self.end_time - self.start_time).total_seconds(), 1.0)
+
+    @property
+    def progress(self) -> float:
+        """完成比例（0~1）"""
+        if self.status == self.SUCCESS:
+            return 1.0
+        return min(self.completed_seconds / self.total_seconds, 1.0)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def record_batch(self, batch_start: datetime, batch_end: datetime, success: bool):
+        """记录一个批次的完成情况"""
+        self.batches += 1
+        self.completed_seconds += (batch_end - batch_start).total_seconds()
+        if not success:
+            self.failed_batches += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'interval': self.interval,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'priority': self.priority,
+            'status': self.status,
+            'progress': self.progress,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+            'elapsed': self.elapsed,
+            'error': self.error
+        }
+
+    def __lt__(self, other: 'SyncJob') -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class SyncScheduler:
+    """多交易对/多周期并发同步调度器
+
+    任务按优先级出队（数值越小越先执行），由固定数量的 worker 并发执行。
+    所有任务共用 MarketDataService 的采集器，因此共享同一个请求权重令牌桶，
+    并发度再高也不会超出交易所的权重限制。
+    """
+
+    RECENT_PRIORITY = 0
+    HISTORY_PRIORITY = 10
+
+    def __init__(
+        self,
+        service: Optional[MarketDataService] = None,
+        max_concurrency: int = 4,
+        on_progress: Optional[Callable[[SyncJob], None]] = None
+    ):
+        self.service = service or MarketDataService()
+        self.max_concurrency = max_concurrency
+        self.on_progress = on_progress or self._log_progress
+        self.jobs: List[SyncJob] = []
+
+    def add_job(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime,
+        priority: int = 0
+    ) -> SyncJob:
+        """添加同步任务"""
+        job = SyncJob(symbol, interval, start_time, end_time, priority)
+        self.jobs.append(job)
+        return job
+
+    def plan(
+        self,
+        symbols: List[str],
+        intervals: List[str],
+        history_days: int = 30,
+        recent_days: int = 1,
+        end_time: Optional[datetime] = None
+    ) -> List[SyncJob]:
+        """为每个交易对/周期生成“近期优先”的任务
+
+        每个组合拆分为近期任务（最近 recent_days 天）与历史任务，
+        所有近期任务排在历史任务之前执行。
+        """
+        now = datetime.now(pytz.UTC)
+        end_time = end_time or now.replace(minute=0, second=0, microsecond=0)
+        start_time = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=history_days)
+        recent_start = max(start_time, end_time - timedelta(days=recent_days))
+
+        jobs = []
+        for symbol in symbols:
+            for interval in intervals:
+                jobs.append(self.add_job(
+                    symbol, interval, recent_start, end_time, self.RECENT_PRIORITY
+                ))
+                if recent_start > start_time:
+                    jobs.append(self.add_job(
+                        symbol, interval, start_time, recent_start, self.HISTORY_PRIORITY
+                    ))
+        return jobs
+
+    def _log_progress(self, job: SyncJob):
+        """默认进度输出"""
+        logger.info(f"[{job.name}] {job.status} {job.progress:.0%} "
+                    f"({job.batches} 批, 失败 {job.failed_batches}, {job.elapsed:.1f}s)")
+
+    async def _run_job(self, job: SyncJob):
+        job.status = SyncJob.RUNNING
+        job.started_at = time.monotonic()
+        self.on_progress(job)
+
+        def progress_callback(batch_start: datetime, batch_end: datetime, success: bool):
+            job.record_batch(batch_start, batch_end, success)
+            self.on_progress(job)
+
+        try:
+            await self.service.sync_market_data(
+                job.symbol,
+                job.interval,
+                start_time=job.start_time,
+                end_time=job.end_time,
+                progress_callback=progress_callback
+            )
+            if job.failed_batches:
+                job.status = SyncJob.FAILED
+                job.error = f"{job.failed_batches} 个批次同步失败"
+            else:
+                job.status = SyncJob.SUCCESS
+        except Exception as e:
+            job.status = SyncJob.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.monotonic()
+            self.on_progress(job)
+
+    async def _worker(self, queue: asyncio.PriorityQueue):
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self._run_job(job)
+
+    async def run(self) -> List[SyncJob]:
+        """执行所有待处理任务"""
+        queue = asyncio.PriorityQueue()
+        for job in self.jobs:
+            if job.status == SyncJob.PENDING:
+                queue.put_nowait(job)
+
+        started = time.monotonic()
+        logger.info(f"开始同步 {queue.qsize()} 个任务, 并发 {self.max_concurrency}")
+        await asyncio.gather(*[
+            self._worker(queue) for _ in range(self.max_concurrency)
+        ])
+
+        failed = [job for job in self.jobs if job.status == SyncJob.FAILED]
+        logger.info(f"同步完成: {len(self.jobs) - len(failed)} 成功, {len(failed)} 失败, "
+                    f"耗时 {time.monotonic() - started:.1f}s")
+        for job in failed:
+            logger.error(f"同步失败: {job.name} - {job.error}")
+        return self.jobs
+
+    def report(self) -> List[Dict]:
+        """各任务进度"""
+        return [job.to_dict() for job in sorted(self.jobs)]
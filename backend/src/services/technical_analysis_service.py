@@ -1,18 +1,27 @@
+import json
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple, Union
 import pandas as pd
 import numpy as np
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
 
-from ..models.database import DatabaseManager, MarketData, TechnicalIndicators
+from ..models.database import DatabaseManager, MarketData, TechnicalIndicators, IndicatorState
+from ..models.bulk_writer import BulkWriter
+from ..models.chunked_reader import ChunkedReader
+from ..models.bar_store import open_bar_store
+from ..models.indicators.graph import IndicatorGraph, INDICATOR_TABLE
+from ..models.indicators.streaming import StreamingIndicatorSet
 from ..utils.logger import Logger
+from ..config.config import Config
 
 logger = Logger(__name__)
 
 class TechnicalAnalysisService:
     def __init__(self):
         self.db = DatabaseManager()
+        self.writer = BulkWriter()
+        self.reader = ChunkedReader()
+        self.store = open_bar_store(Config())
     
     async def calculate_indicators(
         self,
@@ -20,67 +29,80 @@ class TechnicalAnalysisService:
         interval: str,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        force_update: bool = False
+        force_update: bool = False,
+        incremental: bool = False
     ):
-        """计算技术指标"""
+        """计算技术指标
+
+        incremental 为 True 时从保存的流式指标状态继续，只读取上次计算之后的新K线，
+        逐根更新后追加到指标表；没有可用状态（首次运行、状态与指标表最后一行不一致）时
+        从已有指标的起点（没有则 start_time）批量计算一次，并由计算结果设置状态。
+        非增量计算未指定 start_time（自最早K线起计算）时同样保存状态，否则清除状态。
+        """
+        session = None
         try:
             session = self.db.get_session()
+            end_time = end_time or datetime.utcnow()
             
-            # 获取市场数据
-            query = select(MarketData).where(
-                and_(
-                    MarketData.symbol == symbol,
-                    MarketData.interval == interval,
-                    MarketData.timestamp >= (start_time or datetime.min),
-                    MarketData.timestamp <= (end_time or datetime.utcnow())
-                )
-            ).order_by(MarketData.timestamp)
-            
-            result = session.execute(query)
-            records = result.fetchall()
+            engine, resumed = None, False
+            if incremental:
+                state = self._load_state(session, symbol, interval)
+                if state:
+                    last_time, engine = state
+                    resumed = True
+                    df = self._load_bars(session, symbol, interval, last_time, end_time)
+                    df = df[df.index > last_time]
+                    if df.empty:
+                        logger.debug(f"没有新的K线: {symbol} {interval}")
+                        return
+                    update = False
+                else:
+                    first_time = session.execute(
+                        select(func.min(TechnicalIndicators.timestamp)).where(
+                            TechnicalIndicators.symbol == symbol,
+                            TechnicalIndicators.interval == interval
+                        )
+                    ).scalar()
+                    engine = StreamingIndicatorSet()
+                    df = self._load_bars(session, symbol, interval, first_time or start_time or datetime.min, end_time)
+                    update = True
+            else:
+                if start_time is None:
+                    engine = StreamingIndicatorSet()
+                df = self._load_bars(session, symbol, interval, start_time or datetime.min, end_time)
+                update = force_update
             
-            if not records:
+            if df.empty:
                 logger.warning(f"没有找到市场数据: {symbol} {interval}")
                 return
             
-            # 转换为DataFrame
-            df = pd.DataFrame([r._asdict() for r in records])
-            df.set_index('timestamp', inplace=True)
-            
-            # 计算技术指标
-            indicators = self._calculate_all_indicators(df)
-            
-            # 准备数据记录
-            records = []
-            for timestamp, row in indicators.iterrows():
-                record = {
-                    'symbol': symbol,
-                    'interval': interval,
-                    'timestamp': timestamp,
-                    **{col: row[col] for col in row.index if not pd.isna(row[col])}
-                }
-                records.append(record)
+            # 计算技术指标：有状态时逐根更新，否则批量计算（需要时顺带设置状态）
+            if resumed:
+                indicators = self._stream_indicators(engine, df)
+            else:
+                indicators = self._calculate_all_indicators(df, engine)
             
-            # 使用 upsert 插入数据
-            stmt = insert(TechnicalIndicators).values(records)
+            # 批量写入，NaN 写为 NULL；与指标状态在同一事务中提交
+            stats = self.writer.write(
+                TechnicalIndicators,
+                indicators,
+                key_columns=['symbol', 'interval', 'timestamp'],
+                update=update,
+                constants={'symbol': symbol, 'interval': interval},
+                index_column='timestamp',
+                session=session
+            )
             
-            # 如果强制更新或者有新数据，则更新已存在的记录
-            if force_update:
-                update_cols = {col.name: stmt.excluded[col.name] 
-                             for col in TechnicalIndicators.__table__.columns 
-                             if col.name not in ['id', 'symbol', 'interval', 'timestamp']}
-                
-                stmt = stmt.on_conflict_do_update(
-                    constraint='unique_technical_indicators',
-                    set_=update_cols
-                )
+            if engine is not None:
+                self._save_state(session, symbol, interval, pd.Timestamp(df.index[-1]).to_pydatetime(), engine)
             else:
-                stmt = stmt.on_conflict_do_nothing()
-            
-            session.execute(stmt)
+                session.query(IndicatorState).filter(
+                    IndicatorState.symbol == symbol,
+                    IndicatorState.interval == interval
+                ).delete()
             session.commit()
             
-            logger.info(f"成功计算并保存技术指标: {symbol} {interval} ({len(records)} 条记录)")
+            logger.info(f"成功计算并保存技术指标: {symbol} {interval} ({stats['rows']} 条记录)")
             
         except Exception as e:
             logger.error(f"计算技术指标失败: {symbol} {interval} - {e}")
@@ -90,53 +112,109 @@ class TechnicalAnalysisService:
             if session:
                 session.close()
     
-    def _calculate_all_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """计算所有技术指标"""
-        result = pd.DataFrame(index=df.index)
-        
-        # 计算移动平均线
-        for period in [5, 10, 20, 50, 200]:
-            result[f'ma_{period}'] = df['close'].rolling(window=period).mean()
-            result[f'ema_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
-        
-        # 计算RSI
-        for period in [6, 12, 24]:
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            result[f'rsi_{period}'] = 100 - (100 / (1 + rs))
-        
-        # 计算MACD
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        result['macd'] = exp1 - exp2
-        result['macd_signal'] = result['macd'].ewm(span=9, adjust=False).mean()
-        result['macd_hist'] = result['macd'] - result['macd_signal']
-        
-        # 计算布林带
-        result['bb_middle'] = df['close'].rolling(window=20).mean()
-        std = df['close'].rolling(window=20).std()
-        result['bb_upper'] = result['bb_middle'] + (std * 2)
-        result['bb_lower'] = result['bb_middle'] - (std * 2)
+    def _load_bars(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> pd.DataFrame:
+        """读取K线，索引为 timestamp"""
+        if self.store:
+            return self.store.read(symbol, interval, start_time, end_time, session=session)
         
-        # 计算ATR
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
-        result['atr'] = true_range.rolling(window=14).mean()
+        # 获取市场数据（按列查询，_asdict 才能得到各字段）
+        query = select(*MarketData.__table__.columns).where(
+            and_(
+                MarketData.symbol == symbol,
+                MarketData.interval == interval,
+                MarketData.timestamp >= start_time,
+                MarketData.timestamp <= end_time
+            )
+        ).order_by(MarketData.timestamp)
         
-        # 计算VWAP
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        result['vwap'] = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
+        records = session.execute(query).fetchall()
+        df = pd.DataFrame([r._asdict() for r in records])
+        if records:
+            df.set_index('timestamp', inplace=True)
+        return df
+    
+    def _load_state(
+        self,
+        session,
+        symbol: str,
+        interval: str
+    ) -> Optional[Tuple[datetime, StreamingIndicatorSet]]:
+        """读取流式指标状态，返回 (最后计算的K线时间, 指标对象)；不可用时返回 None"""
+        row = session.query(IndicatorState).filter(
+            IndicatorState.symbol == symbol,
+            IndicatorState.interval == interval
+        ).first()
+        if row is None:
+            return None
         
-        # 计算OBV
-        obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-        result['obv'] = obv
+        last_time = session.execute(
+            select(func.max(TechnicalIndicators.timestamp)).where(
+                TechnicalIndicators.symbol == symbol,
+                TechnicalIndicators.interval == interval
+            )
+        ).scalar()
+        if last_time != row.timestamp:
+            logger.warning(f"指标状态与指标表不一致，重新全量计算: {symbol} {interval}")
+            return None
         
-        return result
+        engine = StreamingIndicatorSet()
+        try:
+            engine.set_state(json.loads(row.state))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"指标状态无法恢复，重新全量计算: {symbol} {interval} - {e}")
+            return None
+        return row.timestamp, engine
+    
+    def _save_state(
+        self,
+        session,
+        symbol: str,
+        interval: str,
+        timestamp: datetime,
+        engine: StreamingIndicatorSet
+    ):
+        """保存流式指标状态（由调用方提交）"""
+        existing = session.query(IndicatorState).filter(
+            IndicatorState.symbol == symbol,
+            IndicatorState.interval == interval
+        ).first()
+        if not existing:
+            existing = IndicatorState(symbol=symbol, interval=interval)
+            session.add(existing)
+        existing.timestamp = timestamp
+        existing.state = json.dumps(engine.get_state())
+    
+    @staticmethod
+    def _stream_indicators(engine: StreamingIndicatorSet, df: pd.DataFrame) -> pd.DataFrame:
+        """逐根K线更新流式指标，结果与 _calculate_all_indicators 逐位一致"""
+        bars = df[['high', 'low', 'close', 'volume']].to_dict('records')
+        return pd.DataFrame([engine.update(bar) for bar in bars], index=df.index)
+    
+    def _calculate_all_indicators(
+        self,
+        df: pd.DataFrame,
+        engine: Optional[StreamingIndicatorSet] = None
+    ) -> pd.DataFrame:
+        """计算所有技术指标（与 StreamingIndicatorSet 逐根更新的结果逐位一致）
+
+        传入 engine 时由同一计算图设置其状态，等同于对 df 逐根 update 之后的状态。
+        """
+        bars = {
+            column: df[column].to_numpy(dtype=np.float64)
+            for column in ('high', 'low', 'close', 'volume')
+        }
+        graph = IndicatorGraph(bars)
+        indicators = pd.DataFrame(graph.compute(INDICATOR_TABLE), index=df.index)
+        if engine is not None:
+            engine.seed(graph)
+        return indicators
 
     async def get_indicators(
         self,
@@ -147,29 +225,34 @@ class TechnicalAnalysisService:
         indicators: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """获取技术指标数据"""
-        session = self.db.get_session()
-        try:
-            query = select(TechnicalIndicators).where(
-                and_(
-                    TechnicalIndicators.symbol == symbol,
-                    TechnicalIndicators.interval == interval,
-                    TechnicalIndicators.timestamp >= start_time,
-                    TechnicalIndicators.timestamp <= (end_time or datetime.utcnow())
-                )
-            ).order_by(TechnicalIndicators.timestamp)
-            
-            result = session.execute(query)
-            records = result.fetchall()
-            
-            if not records:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame([r._asdict() for r in records])
-            df.set_index('timestamp', inplace=True)
-            
-            if indicators:
-                return df[indicators]
-            return df
-            
-        finally:
-            session.close() 
\ No newline at end of file
+        query = ChunkedReader.range_query(
+            TechnicalIndicators,
+            symbol,
+            interval,
+            start_time,
+            end_time or datetime.utcnow(),
+            indicators
+        )
+        return await self.reader.aread(query)
+    
+    async def iter_indicators(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        indicators: Optional[List[str]] = None,
+        chunk_size: int = 50000,
+        as_numpy: bool = False
+    ) -> AsyncIterator[Union[pd.DataFrame, Dict[str, np.ndarray]]]:
+        """按时间顺序分块读取技术指标，每块最多 chunk_size 行"""
+        query = ChunkedReader.range_query(
+            TechnicalIndicators,
+            symbol,
+            interval,
+            start_time,
+            end_time or datetime.utcnow(),
+            indicators
+        )
+        async for chunk in self.reader.aiter_query(query, chunk_size, as_numpy):
+            yield chunk
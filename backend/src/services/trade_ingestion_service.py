@@ -0,0 +1,150 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..data.collectors.binance_collector import BinanceDataCollector
+from ..data.storage.tick_store import TickStore
+from ..utils.logger import Logger
+from ..config.config import Config
+
+logger = Logger(__name__)
+
+
+class TradeIngestionService:
+    """逐笔成交采集：REST 回补 + WebSocket 实时写入 TickStore
+
+    实时推送按条数或时间批量落盘；发现归集成交ID不连续时先通过 REST
+    按ID补齐缺失的成交再继续，保证存储中的成交ID连续。
+    """
+
+    TRADE_FIELDS = ['timestamp', 'trade_id', 'price', 'quantity', 'is_buyer_maker']
+
+    def __init__(
+        self,
+        collector: Optional[BinanceDataCollector] = None,
+        store: Optional[TickStore] = None
+    ):
+        self.config = Config()
+        self.collector = collector or BinanceDataCollector(
+            api_key=self.config.get('api.binance.api_key'),
+            api_secret=self.config.get('api.binance.api_secret'),
+            weight_limit=self.config.get('api.binance.weight_limit', 6000),
+            max_concurrency=self.config.get('api.binance.max_concurrency', 8)
+        )
+        self.store = store or TickStore(self.config.get('data.tick_path', 'data/ticks'))
+
+    async def close(self):
+        await self.collector.close()
+
+    async def backfill(
+        self,
+        symbol: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> int:
+        """回补成交，已有数据时从最后一笔成交之后继续，返回写入条数"""
+        last_id = self.store.last_trade_id(symbol)
+        if last_id is None and start_time is None:
+            raise ValueError("首次回补需要指定 start_time")
+
+        started = time.perf_counter()
+        written = 0
+        pages = self.collector.iter_agg_trades(
+            symbol,
+            start_time=start_time,
+            end_time=end_time,
+            from_id=last_id + 1 if last_id is not None else None
+        )
+        async for page in pages:
+            written += self.store.append(symbol, page)
+
+        seconds = time.perf_counter() - started
+        logger.info(f"回补成交: {symbol} {written} 条, {seconds:.1f}s")
+        return written
+
+    async def _fill_ids(self, symbol: str, from_id: int, to_id: int) -> int:
+        """按ID补齐 [from_id, to_id] 的成交"""
+        written = 0
+        while from_id <= to_id:
+            page = await self.collector.fetch_agg_trades(
+                symbol, from_id=from_id, limit=self.collector.max_limit
+            )
+            if not len(page['trade_id']):
+                break
+            mask = page['trade_id'] <= to_id
+            written += self.store.append(symbol, {name: values[mask] for name, values in page.items()})
+            from_id = int(page['trade_id'][-1]) + 1
+        return written
+
+    def _flush(self, symbol: str, buffer: List[Dict]) -> int:
+        if not buffer:
+            return 0
+        trades = {name: np.array([trade[name] for trade in buffer]) for name in self.TRADE_FIELDS}
+        written = self.store.append(symbol, trades)
+        buffer.clear()
+        return written
+
+    async def stream(
+        self,
+        symbol: str,
+        flush_size: int = 1000,
+        flush_interval: float = 1.0,
+        stop_event: Optional[asyncio.Event] = None
+    ) -> int:
+        """订阅实时成交并写入存储，直到 stop_event 被设置，返回写入条数"""
+        buffer: List[Dict] = []
+        written = 0
+        last_flush = time.monotonic()
+        expected_id = None
+
+        # 订阅在独立任务中读取，主循环可以按时间落盘并及时响应停止
+        stream = self.collector.stream_agg_trades(symbol)
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def reader():
+            async for trade in stream:
+                await queue.put(trade)
+
+        reader_task = asyncio.create_task(reader())
+        try:
+            while not (stop_event is not None and stop_event.is_set()):
+                if reader_task.done():
+                    reader_task.result()
+                    if queue.empty():
+                        break
+                try:
+                    timeout = max(flush_interval - (time.monotonic() - last_flush), 0.0)
+                    trade = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    written += self._flush(symbol, buffer)
+                    last_flush = time.monotonic()
+                    continue
+
+                if expected_id is None:
+                    last_id = self.store.last_trade_id(symbol)
+                    expected_id = last_id + 1 if last_id is not None else trade['trade_id']
+
+                if trade['trade_id'] < expected_id:
+                    continue
+                if trade['trade_id'] > expected_id:
+                    # 重连或丢包导致的缺口：先落盘已缓冲的成交，再按ID补齐
+                    written += self._flush(symbol, buffer)
+                    logger.warning(f"成交ID缺口: {symbol} {expected_id} ~ {trade['trade_id'] - 1}")
+                    written += await self._fill_ids(symbol, expected_id, trade['trade_id'] - 1)
+
+                buffer.append(trade)
+                expected_id = trade['trade_id'] + 1
+
+                if len(buffer) >= flush_size:
+                    written += self._flush(symbol, buffer)
+                    last_flush = time.monotonic()
+        finally:
+            stream.close()
+            reader_task.cancel()
+            written += self._flush(symbol, buffer)
+
+        logger.info(f"实时成交写入结束: {symbol} {written} 条")
+        return written
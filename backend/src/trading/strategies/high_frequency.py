@@ -1,10 +1,12 @@
 import asyncio
+import inspect
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Optional
 import numpy as np
 import pandas as pd
 from ...utils.logger import Logger
-from ...data.collectors.okx_collector import OKXDataCollector
+from ...data.order_book import LocalOrderBook
+from ...data.collectors.base_collector import BaseDataCollector
 from ...trading.executors.okx_executor import OKXExecutor
 
 logger = Logger(__name__)
@@ -15,7 +17,7 @@ class HighFrequencyStrategy:
     def __init__(
         self,
         symbol: str,
-        collector: OKXDataCollector,
+        collector: BaseDataCollector,
         executor: OKXExecutor,
         tick_interval: float = 0.1,  # 100ms
         position_limit: float = 0.1,  # 最大仓位比例
@@ -39,12 +41,42 @@ class HighFrequencyStrategy:
         self.running = True
         logger.info(f"启动高频交易策略: {self.symbol}")
         
+        if hasattr(self.collector, 'stream_order_book'):
+            await self._run_streaming()
+        else:
+            await self._run_polling()
+    
+    async def _run_streaming(self):
+        """订阅增量深度，基于本地订单簿驱动策略"""
+        while self.running:
+            try:
+                async for book in self.collector.stream_order_book(self.symbol):
+                    if not self.running:
+                        break
+                    if not book.empty:
+                        await self.process_orderbook(book)
+            except Exception as e:
+                logger.error(f"策略执行异常: {e}")
+                await asyncio.sleep(1)
+    
+    async def _run_polling(self):
+        """按 tick 轮询订单簿快照
+        
+        采集器支持 as_book 时直接取 LocalOrderBook，否则用 DataFrame 快照刷新同一个本地订单簿。
+        """
+        as_book = 'as_book' in inspect.signature(self.collector.fetch_orderbook).parameters
+        options = {'as_book': True} if as_book else {}
+        book = LocalOrderBook(self.symbol)
         while self.running:
             try:
                 # 获取订单簿数据
-                orderbook = await self.collector.fetch_orderbook(self.symbol)
-                if not orderbook['bids'].empty and not orderbook['asks'].empty:
-                    await self.process_orderbook(orderbook)
+                orderbook = await self.collector.fetch_orderbook(self.symbol, **options)
+                if isinstance(orderbook, LocalOrderBook):
+                    book = orderbook
+                else:
+                    self._load_snapshot(book, orderbook)
+                if not book.empty:
+                    await self.process_orderbook(book)
                 
                 # 等待下一个tick
                 await asyncio.sleep(self.tick_interval)
@@ -53,10 +85,20 @@ class HighFrequencyStrategy:
                 logger.error(f"策略执行异常: {e}")
                 await asyncio.sleep(1)
     
-    async def process_orderbook(self, orderbook: Dict):
+    @staticmethod
+    def _load_snapshot(book: LocalOrderBook, orderbook: dict):
+        """用 DataFrame 形式的快照刷新本地订单簿（复用其价位数组）"""
+        bids, asks = orderbook['bids'], orderbook['asks']
+        book.load_snapshot(
+            0,
+            bids[['price', 'quantity']].to_numpy() if not bids.empty else [],
+            asks[['price', 'quantity']].to_numpy() if not asks.empty else []
+        )
+    
+    async def process_orderbook(self, book: LocalOrderBook):
         """处理订单簿数据"""
-        best_bid = float(orderbook['bids'].iloc[0]['price'])
-        best_ask = float(orderbook['asks'].iloc[0]['price'])
+        best_bid = book.best_bid()[0]
+        best_ask = book.best_ask()[0]
         spread = (best_ask - best_bid) / best_bid
         
         # 检查价差是否足够大
@@ -1,13 +1,13 @@
 from typing import Dict, Optional, List
 from datetime import datetime
-from binance.client import Client
-from binance.exceptions import BinanceAPIException
+from ..utils.http_client import BinanceRestClient, BinanceAPIError
 
 class TradeExecutor:
     """交易执行器"""
     
-    def __init__(self, api_key: str, api_secret: str):
-        self.client = Client(api_key, api_secret)
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
+        # 与数据采集器共用同一套异步传输层，不阻塞事件循环
+        self.client = BinanceRestClient(api_key, api_secret, testnet=testnet)
         
     async def place_order(
         self,
@@ -20,14 +20,14 @@ class TradeExecutor:
         """下单"""
         try:
             if order_type == 'MARKET':
-                order = self.client.create_order(
+                order = await self.client.create_order(
                     symbol=symbol,
                     side=side,
                     type=order_type,
                     quantity=quantity
                 )
             else:
-                order = self.client.create_order(
+                order = await self.client.create_order(
                     symbol=symbol,
                     side=side,
                     type=order_type,
@@ -37,22 +37,26 @@ class TradeExecutor:
                 )
             return order
             
-        except BinanceAPIException as e:
+        except BinanceAPIError as e:
             print(f"下单失败: {e}")
             return {}
             
     async def get_account_info(self) -> Dict:
         """获取账户信息"""
         try:
-            return self.client.get_account()
-        except BinanceAPIException as e:
+            return await self.client.get_account()
+        except BinanceAPIError as e:
             print(f"获取账户信息失败: {e}")
             return {}
             
     async def get_open_orders(self, symbol: str) -> List:
         """获取未成交订单"""
         try:
-            return self.client.get_open_orders(symbol=symbol)
-        except BinanceAPIException as e:
+            return await self.client.get_open_orders(symbol=symbol)
+        except BinanceAPIError as e:
             print(f"获取未成交订单失败: {e}")
-            return [] 
\ No newline at end of file
+            return []
+            
+    async def close(self):
+        """关闭HTTP连接池"""
+        await self.client.close()
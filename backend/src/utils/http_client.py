@@ -0,0 +1,326 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+import aiohttp
+
+from .logger import Logger
+from .rate_limiter import WeightRateLimiter
+
+logger = Logger(__name__)
+
+
+class BinanceAPIError(Exception):
+    """币安接口错误"""
+
+    def __init__(self, status_code: int, code: Optional[int], message: str):
+        super().__init__(f"APIError(status={status_code}, code={code}): {message}")
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+class AsyncHttpClient:
+    """异步HTTP客户端
+
+    基于 aiohttp 的连接池（keep-alive），统一处理超时与重试。
+    会话在首次请求时于当前事件循环中创建，事件循环变化时自动重建。
+    """
+
+    # 可重试的状态码：限流、封禁预警、服务端错误
+    RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+    # 幂等方法，服务端错误时可安全重试
+    IDEMPOTENT_METHODS = {'GET', 'DELETE'}
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        pool_size: int = 100,
+        keepalive_timeout: float = 30.0
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取（必要时创建）当前事件循环的会话"""
+        loop = asyncio.get_event_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout
+            )
+            self._loop = loop
+        return self._session
+
+    def _should_retry(self, method: str, status: int) -> bool:
+        """判断响应状态是否可重试"""
+        if status in (418, 429):
+            # 限流响应表示请求未被处理，任何方法都可重试
+            return True
+        return status in self.RETRY_STATUS and method in self.IDEMPOTENT_METHODS
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """计算重试等待时间（指数退避，优先使用 Retry-After）"""
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt)
+
+    def _prepare(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, Any],
+        headers: Dict[str, str]
+    ):
+        """请求发送前的钩子（签名等），返回 (params, headers)"""
+        return params, headers
+
+    async def _before_attempt(self, method: str, path: str, params: Dict[str, Any]):
+        """每次发送（含重试）前的钩子（如扣减限流权重）"""
+        pass
+
+    def _on_response(self, response: aiohttp.ClientResponse):
+        """响应钩子（如记录限流头）"""
+        pass
+
+    async def _raise_for_status(self, response: aiohttp.ClientResponse):
+        """非 2xx 响应转换为异常"""
+        if response.status >= 400:
+            raise aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=await response.text()
+            )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """发送请求并返回解析后的JSON"""
+        method = method.upper()
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            req_params = dict(params or {})
+            await self._before_attempt(method, path, req_params)
+            # 每次重试重新签名（时间戳需要更新）
+            req_params, req_headers = self._prepare(
+                method, path, req_params, dict(headers or {})
+            )
+            try:
+                session = self._get_session()
+                async with session.request(
+                    method,
+                    url,
+                    params=req_params,
+                    headers=req_headers
+                ) as response:
+                    self._on_response(response)
+
+                    if attempt < self.max_retries and self._should_retry(method, response.status):
+                        delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                        logger.warning(f"请求失败 {method} {path} 状态码 {response.status}, "
+                                       f"{delay:.2f}s 后重试")
+                        await asyncio.sleep(delay)
+                        continue
+
+                    await self._raise_for_status(response)
+                    return await response.json(content_type=None)
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # 连接建立失败或超时：幂等请求重试
+                if attempt >= self.max_retries or method not in self.IDEMPOTENT_METHODS:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"请求异常 {method} {path}: {e!r}, {delay:.2f}s 后重试")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class BinanceRestClient(AsyncHttpClient):
+    """币安现货 REST 异步客户端
+
+    负责请求签名与请求权重预算，接口命名与 python-binance 的 Client 保持一致。
+    """
+
+    BASE_URL = 'https://api.binance.com'
+    TESTNET_URL = 'https://testnet.binance.vision'
+
+    # 各接口的请求权重
+    WEIGHTS = {
+        '/api/v3/klines': 2,
+        '/api/v3/aggTrades': 2,
+        '/api/v3/ticker/24hr': 2,
+        '/api/v3/order': 1,
+        '/api/v3/account': 20,
+        '/api/v3/openOrders': 6,
+    }
+
+    def __init__(
+        self,
+        api_key: str = '',
+        api_secret: str = '',
+        testnet: bool = False,
+        weight_limit: int = 6000,
+        recv_window: int = 5000,
+        **kwargs
+    ):
+        super().__init__(self.TESTNET_URL if testnet else self.BASE_URL, **kwargs)
+        self.api_key = api_key or ''
+        self.api_secret = api_secret or ''
+        self.recv_window = recv_window
+        self.rate_limiter = WeightRateLimiter(weight_limit)
+
+    @staticmethod
+    def _depth_weight(limit: int) -> int:
+        """订单簿接口权重随档位数变化"""
+        if limit <= 100:
+            return 5
+        if limit <= 500:
+            return 25
+        if limit <= 1000:
+            return 50
+        return 250
+
+    async def _before_attempt(self, method, path, params):
+        """每次发送前扣减权重：重试同样消耗交易所的权重额度"""
+        weight = params.pop('_weight', None)
+        await self.rate_limiter.acquire(weight or self.WEIGHTS.get(path, 1))
+
+    def _prepare(self, method, path, params, headers):
+        """为需要签名的请求附加时间戳与签名
+
+        签名请求直接返回编码后的查询串，保证发送内容与签名内容逐字节一致。
+        """
+        if self.api_key:
+            headers['X-MBX-APIKEY'] = self.api_key
+        if params.pop('_signed', False):
+            params['timestamp'] = int(time.time() * 1000)
+            params['recvWindow'] = self.recv_window
+            query = urlencode(params)
+            signature = hmac.new(
+                self.api_secret.encode(),
+                query.encode(),
+                hashlib.sha256
+            ).hexdigest()
+            return f"{query}&signature={signature}", headers
+        return params, headers
+
+    def _on_response(self, response):
+        """用交易所返回的已用权重校正令牌桶"""
+        used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if used is not None:
+            self.rate_limiter.sync_used_weight(int(used))
+
+    async def _raise_for_status(self, response):
+        """解析币安错误码"""
+        if response.status >= 400:
+            try:
+                payload = await response.json(content_type=None)
+                code, message = payload.get('code'), payload.get('msg', '')
+            except Exception:
+                code, message = None, await response.text()
+            raise BinanceAPIError(response.status, code, message)
+
+    async def _call(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        signed: bool = False,
+        weight: Optional[int] = None
+    ) -> Any:
+        """在权重预算内调用接口"""
+        params = {k: str(v) for k, v in (params or {}).items() if v is not None}
+        if signed:
+            params['_signed'] = True
+        if weight:
+            params['_weight'] = weight
+        return await self.request(method, path, params=params)
+
+    async def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 500,
+        startTime: Optional[int] = None,
+        endTime: Optional[int] = None
+    ) -> list:
+        """获取K线"""
+        return await self._call('GET', '/api/v3/klines', {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit,
+            'startTime': startTime,
+            'endTime': endTime
+        })
+
+    async def get_agg_trades(
+        self,
+        symbol: str,
+        fromId: Optional[int] = None,
+        startTime: Optional[int] = None,
+        endTime: Optional[int] = None,
+        limit: int = 500
+    ) -> list:
+        """获取归集成交（startTime 与 endTime 同时指定时跨度需小于1小时）"""
+        return await self._call('GET', '/api/v3/aggTrades', {
+            'symbol': symbol,
+            'fromId': fromId,
+            'startTime': startTime,
+            'endTime': endTime,
+            'limit': limit
+        })
+
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        """获取订单簿快照"""
+        return await self._call(
+            'GET',
+            '/api/v3/depth',
+            {'symbol': symbol, 'limit': limit},
+            weight=self._depth_weight(limit)
+        )
+
+    async def get_ticker(self, symbol: str) -> Dict:
+        """获取24小时价格变动统计"""
+        return await self._call('GET', '/api/v3/ticker/24hr', {'symbol': symbol})
+
+    async def create_order(self, **params) -> Dict:
+        """下单"""
+        return await self._call('POST', '/api/v3/order', params, signed=True)
+
+    async def get_account(self) -> Dict:
+        """获取账户信息"""
+        return await self._call('GET', '/api/v3/account', signed=True)
+
+    async def get_open_orders(self, symbol: Optional[str] = None) -> list:
+        """获取未成交订单"""
+        return await self._call('GET', '/api/v3/openOrders', {'symbol': symbol}, signed=True)
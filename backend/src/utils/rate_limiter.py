@@ -0,0 +1,50 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class WeightRateLimiter:
+    """请求权重令牌桶
+
+    对应币安 REQUEST_WEIGHT 限制（默认每分钟 6000 权重）。令牌按固定速率回补，
+    每次请求前按接口权重扣减，不足时等待回补，从而在不触发 429 的前提下
+    尽量用满允许的权重。
+    """
+
+    def __init__(
+        self,
+        weight_limit: int = 6000,
+        interval: float = 60.0,
+        safety_ratio: float = 0.9
+    ):
+        # 预留一部分余量给其他进程/接口
+        self.capacity = weight_limit * safety_ratio
+        self.interval = interval
+        self.refill_rate = self.capacity / interval
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        """按流逝时间回补令牌"""
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated_at = now
+
+    async def acquire(self, weight: int = 1):
+        """获取指定权重的令牌，不足时挂起等待"""
+        weight = min(weight, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= weight:
+                self.tokens -= weight
+                return
+            await asyncio.sleep((weight - self.tokens) / self.refill_rate)
+
+    def sync_used_weight(self, used_weight: Optional[int]):
+        """根据交易所返回的已用权重校正令牌数"""
+        if used_weight is None:
+            return
+        self._refill()
+        self.tokens = max(0.0, min(self.tokens, self.capacity - used_weight))
@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.models.database import DatabaseManager
+from src.data.storage.hot_cache import HotBarCache
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """在临时目录中运行：独立的 config.yaml 与 data/ 下的 SQLite 数据库"""
+    monkeypatch.chdir(tmp_path)
+    config = {
+        'database': {'url': 'sqlite:///trading.db', 'echo': False},
+        'data': {'cache_path': 'data/cache/bars'}
+    }
+    (tmp_path / 'config.yaml').write_text(yaml.safe_dump(config), encoding='utf-8')
+
+    # 数据库管理器与热缓存是进程内单例，每个测试重新创建
+    DatabaseManager._instance = None
+    HotBarCache._instance = None
+    yield tmp_path
+    if DatabaseManager._instance is not None:
+        DatabaseManager._instance.engine.dispose()
+    DatabaseManager._instance = None
+    HotBarCache._instance = None
+
+
+@pytest.fixture
+def make_bars():
+    """生成随机游走的 1m K线：make_bars(count, start='2024-01-01', seed=0)"""
+    def make(count: int, start: str = '2024-01-01', seed: int = 0) -> pd.DataFrame:
+        random = np.random.RandomState(seed)
+        index = pd.date_range(start, periods=count, freq='1min', name='timestamp')
+        close = np.round(30000 + np.cumsum(random.randn(count) * 10), 2)
+        volume = np.round(random.rand(count) * 100, 5)
+        return pd.DataFrame({
+            'open': close, 'high': np.round(close + 5, 2), 'low': np.round(close - 5, 2), 'close': close,
+            'volume': volume, 'quote_volume': np.round(volume * close, 8)
+        }, index=index)
+    return make
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+import pytz
+
+from src.data.collectors.binance_collector import BinanceDataCollector
+
+HOUR_MS = 3600 * 1000
+START_MS = 1704067200000  # 2024-01-01 00:00 UTC
+
+
+def trade(trade_id: int, timestamp: int) -> dict:
+    return {'a': trade_id, 'p': '42000.0', 'q': '0.01', 'f': trade_id, 'l': trade_id, 'T': timestamp, 'm': False}
+
+
+class TradeClient:
+    """第二个小时开始每分钟一笔成交"""
+
+    def __init__(self):
+        self.trades = [trade(i, START_MS + HOUR_MS + i * 60000) for i in range(120)]
+        self.requests = []
+
+    async def get_agg_trades(self, symbol, fromId=None, startTime=None, endTime=None, limit=500):
+        self.requests.append((fromId, startTime, endTime))
+        if fromId is not None:
+            selected = [t for t in self.trades if t['a'] >= fromId]
+        else:
+            selected = [t for t in self.trades if startTime <= t['T'] <= endTime]
+        return selected[:limit]
+
+
+def collect(collector: BinanceDataCollector, **kwargs):
+    async def run():
+        return [page async for page in collector.iter_agg_trades('BTCUSDT', **kwargs)]
+    return asyncio.run(run())
+
+
+def test_iter_agg_trades_requires_start_time_or_from_id():
+    collector = BinanceDataCollector('', '')
+    collector.client = TradeClient()
+
+    with pytest.raises(ValueError):
+        collect(collector)
+    assert collector.client.requests == []
+
+
+def test_iter_agg_trades_skips_empty_windows_then_pages_by_id():
+    collector = BinanceDataCollector('', '')
+    collector.client = TradeClient()
+    collector.max_limit = 50
+
+    pages = collect(
+        collector,
+        start_time=datetime(2024, 1, 1, tzinfo=pytz.UTC),
+        end_time=datetime(2024, 1, 1, 2, 30, tzinfo=pytz.UTC)
+    )
+
+    trade_ids = [int(i) for page in pages for i in page['trade_id']]
+    # 截止 02:30 的成交为第二个小时的 0..59 与第三个小时的 60..90
+    assert trade_ids == list(range(91))
+    # 第一个小时无成交，第二个窗口定位到首笔成交后按ID翻页
+    assert collector.client.requests[0][0] is None and collector.client.requests[1][0] is None
+    assert all(from_id is not None for from_id, _, _ in collector.client.requests[2:])
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+import yaml
+
+from src.models.database import MarketData
+from src.models.bulk_writer import BulkWriter
+from src.models.bar_store import open_bar_store
+from src.services.analytics_service import AnalyticsService
+
+
+def configure(workdir, layout: str):
+    path = workdir / 'config.yaml'
+    config = yaml.safe_load(path.read_text(encoding='utf-8'))
+    config['database']['layout'] = layout
+    path.write_text(yaml.safe_dump(config), encoding='utf-8')
+
+
+def write_bars(store, bars, update: bool = False):
+    if store:
+        store.write('BTCUSDT', '1m', bars, update=update)
+    else:
+        BulkWriter().write(
+            MarketData, bars, key_columns=['symbol', 'interval', 'timestamp'],
+            constants={'symbol': 'BTCUSDT', 'interval': '1m'}, index_column='timestamp', update=update
+        )
+
+
+def mirrored_close(service: AnalyticsService, timestamp: datetime) -> float:
+    result = service.query(
+        "SELECT close FROM market_data WHERE symbol = 'BTCUSDT' AND \"interval\" = '1m' AND timestamp = ?",
+        [timestamp]
+    )
+    return result.column('close').to_pylist()[0]
+
+
+@pytest.mark.parametrize('layout', ['row', 'compact'])
+def test_refresh_picks_up_overwrites_at_existing_timestamps(workdir, make_bars, layout):
+    configure(workdir, layout)
+    service = AnalyticsService(root=str(workdir / 'analytics'))
+    store = open_bar_store(service.config)
+
+    # 01-31 23:50 到 02-01 00:09，跨两个月
+    bars = make_bars(20, start='2024-01-31 23:50')
+    write_bars(store, bars)
+    assert service.refresh()['months'] == 2
+    assert service.refresh()['months'] == 0
+
+    # 只改数值不改时间戳（如未收盘K线被重新拉取），行数与首尾时间戳都不变
+    candle = datetime(2024, 2, 1, 0, 5)
+    changed = bars.loc[[candle]].copy()
+    changed['close'] = changed['close'] + 1
+    changed['high'] = changed[['high', 'close']].max(axis=1)
+    write_bars(store, changed, update=True)
+
+    summary = service.refresh()
+    assert summary['months'] == 1
+    assert summary['rows'] == 10
+    assert mirrored_close(service, candle) == changed['close'].iloc[0]
+    assert service.refresh()['months'] == 0
@@ -0,0 +1,62 @@
+import asyncio
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import func
+
+from src.models.database import DatabaseManager, MarketData
+from src.services.archive_import_service import ArchiveImportService
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'binance_archive'
+
+
+def stored(symbol: str, interval: str):
+    session = DatabaseManager().get_session()
+    try:
+        return session.query(
+            func.count(MarketData.id), func.min(MarketData.timestamp), func.max(MarketData.timestamp)
+        ).filter(MarketData.symbol == symbol, MarketData.interval == interval).one()
+    finally:
+        session.close()
+
+
+def test_import_fixture_archives(workdir):
+    service = ArchiveImportService(max_workers=2, chunk_rows=50)
+    summary = asyncio.run(service.import_directory(FIXTURES, intervals=['1m']))
+
+    # 月文件（无表头）180 条 + 日文件（带表头）60 条 + 微秒时间戳的日文件 60 条
+    assert summary['files'] == 3
+    assert summary['failed'] == []
+    assert summary['rows'] == 300
+    count, first, last = stored('BTCUSDT', '1m')
+    assert count == 300
+    assert first == datetime(2024, 1, 31, 21, 0)
+    assert last == datetime(2025, 1, 1, 0, 59)
+
+    # 月文件与次日的日文件首尾相接，合并为一个覆盖区段
+    gaps = service.coverage.find_gaps('BTCUSDT', '1m', datetime(2024, 1, 31, 21, 0), datetime(2025, 1, 1, 0, 59))
+    assert gaps == [(datetime(2024, 2, 1, 1, 0), datetime(2024, 12, 31, 23, 59))]
+
+    # 高周期K线在工作线程中随导入聚合
+    assert stored('BTCUSDT', '5m') == (60, datetime(2024, 1, 31, 21, 0), datetime(2025, 1, 1, 0, 55))
+
+    # 重复导入不产生重复数据，覆盖索引不变
+    summary = asyncio.run(service.import_directory(FIXTURES, intervals=['1m']))
+    assert summary['failed'] == []
+    assert stored('BTCUSDT', '1m')[0] == 300
+    assert service.coverage.find_gaps(
+        'BTCUSDT', '1m', datetime(2024, 1, 31, 21, 0), datetime(2025, 1, 1, 0, 59)
+    ) == gaps
+
+
+def test_checksum_mismatch_is_reported(workdir, tmp_path):
+    directory = tmp_path / 'archive'
+    directory.mkdir()
+    name = 'BTCUSDT-1m-2025-01-01.zip'
+    shutil.copy(FIXTURES / name, directory / name)
+    (directory / f'{name}.CHECKSUM').write_text(f'{"0" * 64}  {name}\n')
+
+    summary = asyncio.run(ArchiveImportService().import_directory(directory))
+    assert summary['rows'] == 0
+    assert [failed['file'] for failed in summary['failed']] == [name]
@@ -0,0 +1,41 @@
+import asyncio
+
+from src.data.collectors.binance_stream import BinanceStream, parse_agg_trade
+from src.data.collectors.replay_server import RecordedStreamServer
+
+STREAM = 'btcusdt@aggTrade'
+
+
+def agg_trade(trade_id: int) -> dict:
+    return {
+        'e': 'aggTrade', 'E': 1700000000000 + trade_id, 's': 'BTCUSDT', 'a': trade_id,
+        'p': '42000.00', 'q': '0.01', 'f': trade_id * 10, 'l': trade_id * 10,
+        'T': 1700000000000 + trade_id, 'm': False
+    }
+
+
+def test_stream_reconnects_and_reports_gap():
+    # 每 3 条断开一次连接，第 8 条（ID 8）被跳过
+    recordings = {STREAM: [agg_trade(trade_id) for trade_id in range(1, 13)]}
+    gaps = []
+
+    async def consume():
+        async with RecordedStreamServer(recordings, disconnect_after=3, skip={7}) as server:
+            stream = BinanceStream(
+                STREAM,
+                parse_agg_trade,
+                base_url=server.base_url,
+                on_gap=lambda stream, expected, actual: gaps.append((stream, expected, actual)),
+                max_reconnects=3,
+                backoff=0.01
+            )
+            messages = [message async for message in stream]
+            return stream, server, messages
+
+    stream, server, messages = asyncio.run(asyncio.wait_for(consume(), timeout=30))
+
+    assert [message['trade_id'] for message in messages] == [1, 2, 3, 4, 5, 6, 7, 9, 10, 11, 12]
+    assert gaps == [(STREAM, 8, 9)]
+    assert stream.gaps == 1
+    assert stream.reconnects == 3
+    assert server.connections == 4
@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import BigInteger, DateTime, Float, Integer, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.database import MarketData
+from src.models.bulk_writer import BulkWriter
+
+KEYS = ['symbol', 'interval', 'timestamp']
+
+
+def write(writer: BulkWriter, bars: pd.DataFrame, **kwargs):
+    return writer.write(
+        MarketData, bars, key_columns=KEYS,
+        constants={'symbol': 'BTCUSDT', 'interval': '1m'}, index_column='timestamp', **kwargs
+    )
+
+
+def stored(writer: BulkWriter) -> pd.DataFrame:
+    session = writer.db.get_session()
+    try:
+        rows = session.query(
+            MarketData.timestamp, MarketData.close, MarketData.volume, MarketData.trades_count
+        ).order_by(MarketData.timestamp).all()
+    finally:
+        session.close()
+    return pd.DataFrame.from_records(rows, columns=['timestamp', 'close', 'volume', 'trades_count']).set_index('timestamp')
+
+
+class FakeCursor:
+    """记录 COPY 内容的游标：copy_expert 为 psycopg2 接口，copy 为 psycopg 3 接口"""
+
+    def __init__(self, psycopg3: bool):
+        self.copied = []
+        if psycopg3:
+            self.copy = self._copy
+        else:
+            self.copy_expert = self._copy_expert
+
+    def _copy_expert(self, sql, buffer):
+        self.copied.append((sql, buffer.read()))
+
+    def _copy(self, sql):
+        cursor = self
+
+        class Copy:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def write(self, data):
+                cursor.copied.append((sql, data))
+
+        return Copy()
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, psycopg3: bool = False):
+        self.statements = []
+        self.copy_cursor = FakeCursor(psycopg3)
+        # DBAPI 连接
+        self.connection = self
+
+    def cursor(self):
+        return self.copy_cursor
+
+    def exec_driver_sql(self, sql, parameters=None):
+        self.statements.append(sql)
+
+
+def test_sqlite_conflicts_skip_or_update(workdir, make_bars):
+    writer = BulkWriter(chunk_size=3)
+    bars = make_bars(10)
+    assert write(writer, bars)['rows'] == 10
+
+    changed = bars.copy()
+    changed['close'] += 1
+    changed['volume'] += 1
+    write(writer, changed)
+    np.testing.assert_array_equal(stored(writer)['close'].to_numpy(), bars['close'].to_numpy())
+
+    # update=True 只覆盖 update_columns 中的列
+    write(writer, changed, update=True, update_columns=['close'])
+    result = stored(writer)
+    np.testing.assert_array_equal(result['close'].to_numpy(), changed['close'].to_numpy())
+    np.testing.assert_array_equal(result['volume'].to_numpy(), bars['volume'].to_numpy())
+
+    write(writer, changed, update=True)
+    np.testing.assert_array_equal(stored(writer)['volume'].to_numpy(), changed['volume'].to_numpy())
+
+
+def test_sqlite_writes_nan_as_null(workdir, make_bars):
+    writer = BulkWriter()
+    bars = make_bars(3)
+    bars['trades_count'] = [5.0, np.nan, 7.0]
+    bars['taker_buy_volume'] = [1.0, 2.0, np.nan]
+    write(writer, bars)
+
+    session = writer.db.get_session()
+    try:
+        rows = session.query(MarketData.trades_count, MarketData.taker_buy_volume).order_by(MarketData.timestamp).all()
+    finally:
+        session.close()
+    assert [tuple(row) for row in rows] == [(5, 1.0), (None, 2.0), (7, None)]
+
+
+def test_to_python_converts_missing_values_to_none():
+    floats = BulkWriter._to_python(np.array([1.5, np.nan]), Float(), 'sqlite')
+    assert floats == [1.5, None]
+
+    integers = BulkWriter._to_python(np.array([3.0, np.nan]), Integer(), 'sqlite')
+    assert integers == [3, None]
+    assert type(integers[0]) is int
+
+    big = BulkWriter._to_python(np.array([2 ** 53 + 1], dtype=np.int64), BigInteger(), 'postgresql')
+    assert big == [2 ** 53 + 1]
+
+    timestamps = pd.DatetimeIndex(['2024-01-01 08:00:00+08:00', pd.NaT])
+    assert BulkWriter._to_python(timestamps, DateTime(), 'sqlite') == ['2024-01-01 00:00:00.000000', None]
+    assert BulkWriter._to_python(timestamps, DateTime(), 'postgresql') == ['2024-01-01T00:00:00.000000', None]
+
+
+@pytest.mark.parametrize('psycopg3', [False, True])
+def test_postgresql_copies_into_staging_table_then_upserts(psycopg3):
+    connection = FakeConnection(psycopg3)
+    quote = lambda name: f'"{name}"'
+    column_list = ', '.join(quote(name) for name in ['symbol', 'timestamp', 'close'])
+    conflict = BulkWriter._conflict_clause(quote, ['symbol', 'timestamp'], ['close'])
+    rows = [('BTCUSDT', '2024-01-01T00:00:00.000000', 1.5), ('BTCUSDT', '2024-01-01T00:01:00.000000', None)]
+
+    BulkWriter._write_postgresql(None, connection, MarketData.__table__, column_list, rows, conflict)
+
+    assert connection.statements == [
+        'DROP TABLE IF EXISTS _staging_market_data',
+        f'CREATE TEMP TABLE _staging_market_data ON COMMIT DROP AS '
+        f'SELECT {column_list} FROM market_data WITH NO DATA',
+        f'INSERT INTO market_data ({column_list}) SELECT {column_list} FROM _staging_market_data '
+        f'ON CONFLICT ("symbol", "timestamp") DO UPDATE SET "close" = excluded."close"'
+    ]
+    [(copy_sql, data)] = connection.copy_cursor.copied
+    assert copy_sql == f'COPY _staging_market_data ({column_list}) FROM STDIN WITH (FORMAT csv)'
+    # None 写为未加引号的空字段，COPY 读作 NULL
+    assert data.splitlines() == [
+        'BTCUSDT,2024-01-01T00:00:00.000000,1.5',
+        'BTCUSDT,2024-01-01T00:01:00.000000,'
+    ]
+
+
+def test_conflict_clause_without_update_columns_does_nothing():
+    quote = lambda name: f'"{name}"'
+    assert BulkWriter._conflict_clause(quote, ['symbol', 'timestamp'], []) == \
+        'ON CONFLICT ("symbol", "timestamp") DO NOTHING'
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'), reason='需要 TEST_POSTGRES_URL 指向可写的 PostgreSQL')
+def test_postgresql_round_trip(workdir, make_bars):
+    engine = create_engine(os.environ['TEST_POSTGRES_URL'])
+    MarketData.__table__.drop(engine, checkfirst=True)
+    MarketData.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        writer = BulkWriter()
+        bars = make_bars(5)
+        bars['trades_count'] = [1.0, np.nan, 3.0, 4.0, 5.0]
+        write(writer, bars, session=session)
+        changed = bars.assign(close=bars['close'] + 1)
+        write(writer, changed, session=session)
+        session.commit()
+        closes = [row[0] for row in session.query(MarketData.close).order_by(MarketData.timestamp)]
+        assert closes == bars['close'].tolist()
+
+        write(writer, changed, update=True, session=session)
+        session.commit()
+        rows = session.query(MarketData.close, MarketData.trades_count).order_by(MarketData.timestamp).all()
+        assert [row[0] for row in rows] == changed['close'].tolist()
+        assert rows[1][1] is None
+    finally:
+        session.close()
+        MarketData.__table__.drop(engine, checkfirst=True)
+        engine.dispose()
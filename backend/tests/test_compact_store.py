@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.compact_store import CompactBarStore
+
+START, END = datetime(2024, 1, 1), datetime(2024, 1, 2)
+
+
+def with_taker_columns(bars: pd.DataFrame) -> pd.DataFrame:
+    return bars.assign(
+        trades_count=np.arange(len(bars), dtype=np.float64),
+        taker_buy_volume=np.round(bars['volume'] / 2, 5),
+        taker_buy_quote_volume=np.round(bars['quote_volume'] / 2, 4)
+    )
+
+
+def test_round_trip(workdir, make_bars):
+    store = CompactBarStore()
+    bars = with_taker_columns(make_bars(100))
+    bars.iloc[3, bars.columns.get_loc('taker_buy_volume')] = np.nan
+    store.write('BTCUSDT', '1m', bars)
+
+    result = store.read('BTCUSDT', '1m', START, END)
+
+    pd.testing.assert_index_equal(result.index, bars.index, check_names=False)
+    for name in ['open', 'high', 'low', 'close', 'volume', 'trades_count', 'taker_buy_volume']:
+        np.testing.assert_array_equal(result[name].to_numpy(dtype=float), bars[name].to_numpy(), err_msg=name)
+    session = store.db.get_session()
+    try:
+        quote_scale = store.symbol_info(session, 'BTCUSDT')['quote_scale']
+    finally:
+        session.close()
+    np.testing.assert_allclose(result['quote_volume'], bars['quote_volume'], rtol=0, atol=1.0 / quote_scale)
+
+
+def test_overflow_lowers_scale_and_reencodes_stored_bars(workdir, make_bars):
+    store = CompactBarStore()
+    cheap = make_bars(10)
+    for name in ['open', 'high', 'low', 'close']:
+        cheap[name] = np.round(cheap[name] / 30000, 8)
+    store.write('BTCUSDT', '1m', cheap)
+
+    # 价格放大约 1e9 倍，超出首写时按 100 倍预留选出的缩放系数
+    expensive = make_bars(10, start='2024-01-01 00:10')
+    for name in ['open', 'high', 'low', 'close']:
+        expensive[name] = np.round(expensive[name] * 30000, 1)
+    store.write('BTCUSDT', '1m', expensive)
+
+    session = store.db.get_session()
+    try:
+        info = store.symbol_info(session, 'BTCUSDT')
+    finally:
+        session.close()
+    assert info['price_scale'] == CompactBarStore.choose_scale(expensive['high'].max(), CompactBarStore.PRICE_HEADROOM)
+    assert info['price_scale'] < CompactBarStore.MAX_SCALE
+
+    result = store.read('BTCUSDT', '1m', START, END)
+    assert len(result) == 20
+    decimals = int(np.log10(info['price_scale']))
+    np.testing.assert_allclose(result['close'].iloc[:10], cheap['close'].round(decimals), atol=1e-12)
+    np.testing.assert_array_equal(result['close'].iloc[10:].to_numpy(), expensive['close'].to_numpy())
+    # 未溢出的列保持原缩放系数
+    np.testing.assert_array_equal(result['volume'].to_numpy(), pd.concat([cheap, expensive])['volume'].to_numpy())
+
+
+def test_unencodable_value_fails_without_changing_stored_bars(workdir, make_bars):
+    store = CompactBarStore()
+    bars = make_bars(5)
+    store.write('BTCUSDT', '1m', bars)
+
+    huge = make_bars(1, start='2024-01-01 00:05')
+    huge['high'] = 2.0 ** 60
+    with pytest.raises(ValueError, match='2\\*\\*53'):
+        store.write('BTCUSDT', '1m', huge)
+
+    result = store.read('BTCUSDT', '1m', START, END)
+    np.testing.assert_array_equal(result['close'].to_numpy(), bars['close'].to_numpy())
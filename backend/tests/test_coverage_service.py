@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from src.models.database import MarketData
+from src.models.bulk_writer import BulkWriter
+from src.services.market_data_service import MarketDataService
+
+MINUTE_MS = 60000
+
+
+class RecordingClient:
+    """按请求范围生成 1m K线，并记录每次请求的起止时间"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def get_klines(self, symbol, interval, limit, startTime, endTime):
+        self.requests.append((startTime, endTime))
+        first = -(-startTime // MINUTE_MS) * MINUTE_MS
+        opens = range(first, min(endTime, first + (limit - 1) * MINUTE_MS) + 1, MINUTE_MS)
+        return [
+            [t, '100', '101', '99', '100.5', '10', t + MINUTE_MS - 1, '1005', 3, '4', '402', '0']
+            for t in opens
+        ]
+
+    async def close(self):
+        pass
+
+
+def store_bars(symbol: str, start: str, end: str):
+    """直接写入 1m K线，不记录覆盖索引（升级前的数据库）"""
+    index = pd.date_range(start, end, freq='1min', inclusive='left', name='timestamp')
+    bars = pd.DataFrame({
+        'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.5, 'volume': 10.0, 'quote_volume': 1005.0
+    }, index=index)
+    BulkWriter().write(
+        MarketData,
+        bars,
+        key_columns=['symbol', 'interval', 'timestamp'],
+        constants={'symbol': symbol, 'interval': '1m'},
+        index_column='timestamp'
+    )
+
+
+def test_sync_builds_coverage_from_stored_bars_before_tail_sync(workdir):
+    store_bars('BTCUSDT', '2024-09-01', '2024-09-10')
+
+    async def sync():
+        service = MarketDataService()
+        service.collector.client = RecordingClient()
+        await service.sync_market_data(
+            'BTCUSDT', '1m',
+            start_time=datetime(2024, 9, 1, tzinfo=pytz.UTC),
+            end_time=datetime(2024, 9, 12, tzinfo=pytz.UTC)
+        )
+        return service
+
+    service = asyncio.run(sync())
+
+    # 已存储的 9/1 → 9/10 不应重新下载，只同步之后的部分
+    stored_end_ms = int(pd.Timestamp('2024-09-09 23:59').value // 10**6)
+    requests = np.array(service.collector.client.requests)
+    assert len(requests) > 0
+    assert requests[:, 0].min() >= stored_end_ms
+
+    gaps = service.coverage.find_gaps(
+        'BTCUSDT', '1m', datetime(2024, 9, 1), datetime(2024, 9, 12)
+    )
+    assert gaps == []
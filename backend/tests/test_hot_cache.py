@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage.hot_cache import HotBarCache
+
+
+def seeded_cache(trades_count) -> HotBarCache:
+    cache = HotBarCache(capacity=100)
+    index = pd.date_range('2024-01-01', periods=len(trades_count), freq='1min', name='timestamp')
+    bars = pd.DataFrame({name: 1.0 for name in HotBarCache.COLUMNS}, index=index)
+    bars['trades_count'] = trades_count
+    cache.seed('BTCUSDT', '1m', bars, index[0].to_pydatetime(), index[-1].to_pydatetime())
+    return cache
+
+
+def test_trades_count_stays_integer_without_missing_values():
+    cache = seeded_cache([1, 2, 3])
+    result = cache.read('BTCUSDT', '1m', datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 2), None, ['trades_count'])
+    assert result['trades_count'].dtype == np.int64
+    assert result['trades_count'].tolist() == [1, 2, 3]
+
+
+def test_missing_trades_count_is_nan_not_int64_min():
+    cache = seeded_cache([1, np.nan, 3])
+    result = cache.read('BTCUSDT', '1m', datetime(2024, 1, 1), datetime(2024, 1, 1) + timedelta(minutes=2), None, None)
+    values = result['trades_count'].to_numpy()
+    assert values[0] == 1 and np.isnan(values[1]) and values[2] == 3
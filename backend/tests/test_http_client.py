@@ -0,0 +1,66 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.utils.http_client import BinanceRestClient
+
+
+class RecordingLimiter:
+    """记录每次扣减的权重"""
+
+    def __init__(self):
+        self.acquired = []
+
+    async def acquire(self, weight: int = 1):
+        self.acquired.append(weight)
+
+    def sync_used_weight(self, used_weight):
+        pass
+
+
+def make_app(failures: int):
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.query))
+        if len(requests) <= failures:
+            return web.json_response({'code': -1003, 'msg': 'Too many requests'}, status=429)
+        return web.json_response({'lastUpdateId': 1, 'bids': [], 'asks': []})
+
+    app = web.Application()
+    app.router.add_get('/api/v3/klines', handler)
+    app.router.add_get('/api/v3/depth', handler)
+    return app, requests
+
+
+def run_call(failures: int, call):
+    app, requests = make_app(failures)
+
+    async def main():
+        async with TestServer(app) as server:
+            client = BinanceRestClient(max_retries=3, backoff=0.01)
+            client.base_url = str(server.make_url('')).rstrip('/')
+            client.rate_limiter = RecordingLimiter()
+            try:
+                await call(client)
+            finally:
+                await client.close()
+            return client.rate_limiter.acquired
+
+    return asyncio.run(asyncio.wait_for(main(), timeout=30)), requests
+
+
+def test_every_retry_is_charged_to_the_weight_budget():
+    acquired, requests = run_call(2, lambda client: client.get_klines('BTCUSDT', '1m', limit=10))
+
+    assert len(requests) == 3
+    assert acquired == [2, 2, 2]
+
+
+def test_explicit_weight_is_charged_per_attempt_and_not_sent():
+    acquired, requests = run_call(1, lambda client: client.get_order_book('BTCUSDT', limit=500))
+
+    assert acquired == [25, 25]
+    assert all('_weight' not in query for query in requests)
+    assert requests[-1] == {'symbol': 'BTCUSDT', 'limit': '500'}
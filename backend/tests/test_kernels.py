@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from src.models.indicators import kernels
+from src.models.indicators.technical_indicators import TechnicalIndicators
+
+
+def series_with_gaps() -> pd.Series:
+    np.random.seed(0)
+    values = pd.Series(100 + np.cumsum(np.random.randn(500)))
+    values[[0, 10, 200, 201, 202, 450]] = np.nan
+    return values
+
+
+def assert_matches(actual, expected):
+    expected = np.asarray(expected, dtype=float)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-10)
+
+
+def test_moving_average_recovers_after_nan():
+    values = pd.Series(np.arange(100.0))
+    values[10] = np.nan
+    result = TechnicalIndicators.calculate_ma(values, 5)
+    assert result.iloc[-3:].tolist() == [95.0, 96.0, 97.0]
+
+
+def test_rolling_kernels_match_pandas_with_nan():
+    values = series_with_gaps()
+    for window in (5, 20):
+        rolling = values.rolling(window)
+        assert_matches(kernels.sma(values, window), rolling.mean())
+        assert_matches(kernels.rolling_sum(values, window), rolling.sum())
+        assert_matches(kernels.rolling_max(values, window), rolling.max())
+        assert_matches(kernels.rolling_min(values, window), rolling.min())
+        assert_matches(kernels.rolling_std(values, window), rolling.std())
+
+
+def test_ema_skips_nan():
+    values = series_with_gaps()
+    for span in (5, 20):
+        expected = values.ewm(span=span, adjust=False, ignore_na=True).mean()
+        assert_matches(kernels.ema(values, span), expected)
+        assert_matches(TechnicalIndicators.calculate_ema(values, span), expected)
+
+
+def test_recursive_indicators_stay_finite_after_nan():
+    close = series_with_gaps()
+    high, low, volume = close + 1, close - 1, pd.Series(np.ones(len(close)))
+    for result in (
+        kernels.rsi(close),
+        kernels.atr(high, low, close),
+        kernels.kdj(high, low, close)[0],
+        kernels.macd(close)[2],
+        kernels.vwap(high, low, close, volume),
+        kernels.obv(close, volume),
+    ):
+        assert np.isfinite(result[-10:]).all()
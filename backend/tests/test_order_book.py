@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from src.data.collectors.binance_collector import BinanceDataCollector
+from src.data.collectors.replay_server import RecordedStreamServer
+from src.data.order_book import LocalOrderBook, OrderBookSyncError
+
+STREAM = 'btcusdt@depth@100ms'
+
+
+def depth_update(update_id: int) -> dict:
+    # 每条增量把 100 价位的买量设为更新ID，便于核对应用了哪些增量
+    return {
+        'e': 'depthUpdate', 'E': 1700000000000 + update_id, 's': 'BTCUSDT',
+        'U': update_id, 'u': update_id,
+        'b': [['100.00', str(update_id)]], 'a': []
+    }
+
+
+def diff(first_id: int, final_id: int, bids=(), asks=()) -> dict:
+    return {'first_update_id': first_id, 'final_update_id': final_id, 'bids': bids, 'asks': asks}
+
+
+class SnapshotClient:
+    """按顺序返回预置快照的 REST 客户端"""
+
+    def __init__(self, snapshots):
+        self.snapshots = list(snapshots)
+        self.calls = 0
+
+    async def get_order_book(self, symbol: str, limit: int = 100) -> dict:
+        self.calls += 1
+        return self.snapshots.pop(0)
+
+
+def test_apply_diff_ignores_stale_and_rejects_gaps():
+    book = LocalOrderBook.from_snapshot([[100, 1]], [[101, 1]], last_update_id=10)
+
+    assert not book.apply_diff(diff(5, 10, bids=[[100, 9]]))
+    assert book.depth_at('bid', 100) == 1
+
+    assert book.apply_diff(diff(8, 12, bids=[[100, 2], [99, 3]], asks=[[101, 0], [102, 4]]))
+    assert book.last_update_id == 12
+    assert book.best_bid() == (100.0, 2.0)
+    assert book.best_ask() == (102.0, 4.0)
+
+    with pytest.raises(OrderBookSyncError):
+        book.apply_diff(diff(14, 15))
+    assert not book.synced
+    with pytest.raises(OrderBookSyncError):
+        book.apply_diff(diff(13, 13))
+
+    book.load_snapshot(20, [[100, 5]], [[101, 5]])
+    assert book.synced
+    assert book.apply_diff(diff(21, 21, bids=[[100, 6]]))
+    assert book.depth_at('bid', 100) == 6
+
+
+def test_stream_order_book_resyncs_after_sequence_gap():
+    # 更新ID 101..112，第 107 条被跳过；首个快照在 102，缺口后的快照在 109
+    recordings = {STREAM: [depth_update(update_id) for update_id in range(101, 113)]}
+    client = SnapshotClient([
+        {'lastUpdateId': 102, 'bids': [['100.00', '102']], 'asks': [['101.00', '1']]},
+        {'lastUpdateId': 109, 'bids': [['100.00', '109']], 'asks': [['101.00', '1']]},
+    ])
+
+    async def consume():
+        async with RecordedStreamServer(recordings, skip={6}) as server:
+            collector = BinanceDataCollector('', '', stream_url=server.base_url)
+            collector.client = client
+            seen = []
+            async for book in collector.stream_order_book('BTCUSDT'):
+                seen.append((book.last_update_id, book.depth_at('bid', 100)))
+                if len(seen) == 7:
+                    break
+            return seen
+
+    seen = asyncio.run(asyncio.wait_for(consume(), timeout=30))
+
+    assert seen == [
+        (103, 103), (104, 104), (105, 105), (106, 106),
+        (110, 110), (111, 111), (112, 112)
+    ]
+    assert client.calls == 2
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.models.partitioned_store import PartitionedBarStore
+
+
+def partition_counts(store: PartitionedBarStore):
+    session = store.db.get_session()
+    try:
+        return {
+            name: len(session.execute(store._table(name).select()).fetchall())
+            for name in store.partitions(session)
+        }
+    finally:
+        session.close()
+
+
+def test_write_routes_rows_by_month(workdir, make_bars):
+    store = PartitionedBarStore()
+    # 01-31 23:50 到 02-01 00:10，跨月写入
+    bars = make_bars(21, start='2024-01-31 23:50')
+    assert store.write('BTCUSDT', '1m', bars)['rows'] == 21
+
+    assert partition_counts(store) == {'market_data_2024_01': 10, 'market_data_2024_02': 11}
+
+    result = store.read('BTCUSDT', '1m', datetime(2024, 1, 31, 23, 55), datetime(2024, 2, 1, 0, 5))
+    expected = bars.loc['2024-01-31 23:55':'2024-02-01 00:05']
+    pd.testing.assert_index_equal(result.index, expected.index, check_names=False)
+    np.testing.assert_array_equal(result['close'].to_numpy(), expected['close'].to_numpy())
+
+    # 只查询与范围相交的分区
+    session = store.db.get_session()
+    try:
+        assert store.partitions(session, datetime(2024, 2, 1), datetime(2024, 2, 28)) == ['market_data_2024_02']
+    finally:
+        session.close()
+
+
+def test_delete_drops_emptied_partitions(workdir, make_bars):
+    store = PartitionedBarStore()
+    store.write('BTCUSDT', '1m', make_bars(21, start='2024-01-31 23:50'))
+    store.write('ETHUSDT', '1m', make_bars(5, start='2024-02-01 01:00'))
+
+    session = store.db.get_session()
+    try:
+        deleted = store.delete(session, 'BTCUSDT', '1m', datetime(2024, 1, 1), datetime(2024, 2, 1, 0, 4))
+        session.commit()
+    finally:
+        session.close()
+
+    # 1 月分区被清空后整表删除；2 月分区仍有数据
+    assert deleted == 15
+    assert partition_counts(store) == {'market_data_2024_02': 11}
+
+    session = store.db.get_session()
+    try:
+        store.delete(session, 'BTCUSDT', '1m', datetime(2024, 2, 1), datetime(2024, 2, 29))
+        session.commit()
+    finally:
+        session.close()
+    assert partition_counts(store) == {'market_data_2024_02': 5}
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+
+from src.models.database import MarketData
+from src.models.bulk_writer import BulkWriter
+from src.services.resampling_service import ResamplingService
+
+
+def write_1m(bars: pd.DataFrame):
+    BulkWriter().write(
+        MarketData,
+        bars,
+        key_columns=['symbol', 'interval', 'timestamp'],
+        constants={'symbol': 'BTCUSDT', 'interval': '1m'},
+        index_column='timestamp'
+    )
+
+
+def stored(service: ResamplingService, interval: str) -> pd.DataFrame:
+    session = service.db.get_session()
+    try:
+        rows = session.query(MarketData.timestamp, MarketData.open, MarketData.close, MarketData.volume).filter(
+            MarketData.symbol == 'BTCUSDT', MarketData.interval == interval
+        ).order_by(MarketData.timestamp).all()
+    finally:
+        session.close()
+    return pd.DataFrame.from_records(rows, columns=['timestamp', 'open', 'close', 'volume']).set_index('timestamp')
+
+
+def test_gappy_buckets_are_skipped_until_the_gap_is_repaired(workdir, make_bars):
+    bars = make_bars(30, start='2024-01-01')
+    missing = pd.Timestamp('2024-01-01 00:07')
+    write_1m(bars.drop(index=[missing]))
+    service = ResamplingService(['5m'])
+
+    written = asyncio.run(service.update_rollups('BTCUSDT', datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 29)))
+
+    assert written == {'5m': 5}
+    result = stored(service, '5m')
+    assert pd.Timestamp('2024-01-01 00:05') not in result.index
+    assert len(result) == 5
+
+    # 补齐缺失的 1m 后，重算受影响的时间桶
+    write_1m(bars.loc[[missing]])
+    asyncio.run(service.update_rollups('BTCUSDT', missing.to_pydatetime(), missing.to_pydatetime()))
+
+    result = stored(service, '5m')
+    bucket = bars.loc['2024-01-01 00:05':'2024-01-01 00:09']
+    assert len(result) == 6
+    assert result.loc['2024-01-01 00:05', 'open'] == bucket['open'].iloc[0]
+    assert result.loc['2024-01-01 00:05', 'close'] == bucket['close'].iloc[-1]
+    assert abs(result.loc['2024-01-01 00:05', 'volume'] - bucket['volume'].sum()) < 1e-9
+
+
+def test_keep_incomplete_writes_gappy_buckets(workdir, make_bars):
+    bars = make_bars(10, start='2024-01-01')
+    write_1m(bars.drop(index=[pd.Timestamp('2024-01-01 00:02')]))
+    service = ResamplingService(['5m'])
+
+    written = asyncio.run(service.update_rollups(
+        'BTCUSDT', datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 9), keep_incomplete=True
+    ))
+
+    assert written == {'5m': 2}
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.models.database import MarketData
+from src.models.bulk_writer import BulkWriter
+from src.data.processors.resampler import OHLCVResampler
+from src.services.retention_service import RetentionService
+
+NOW = datetime(2024, 3, 15, 12, 0)
+HORIZON = datetime(2024, 2, 14)  # NOW 当天零点前推 30 天
+
+
+def configure(workdir, layout: str):
+    path = workdir / 'config.yaml'
+    config = yaml.safe_load(path.read_text(encoding='utf-8'))
+    config['database']['layout'] = layout
+    config['data']['retention'] = {'1m': 30}
+    path.write_text(yaml.safe_dump(config), encoding='utf-8')
+
+
+def write_1m(service: RetentionService, bars: pd.DataFrame):
+    if service.store:
+        service.store.write('BTCUSDT', '1m', bars)
+    else:
+        BulkWriter().write(
+            MarketData, bars, key_columns=['symbol', 'interval', 'timestamp'],
+            constants={'symbol': 'BTCUSDT', 'interval': '1m'}, index_column='timestamp'
+        )
+    session = service.db.get_session()
+    try:
+        service.coverage.record_coverage(
+            session, 'BTCUSDT', '1m', bars.index[0].to_pydatetime(), bars.index[-1].to_pydatetime()
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+def read(service: RetentionService, interval: str) -> pd.DataFrame:
+    if service.store:
+        return service.store.read('BTCUSDT', interval, datetime(2024, 1, 1), datetime(2024, 12, 31))
+    session = service.db.get_session()
+    try:
+        rows = session.query(MarketData.timestamp, MarketData.open, MarketData.high, MarketData.low,
+                             MarketData.close, MarketData.volume).filter(
+            MarketData.symbol == 'BTCUSDT', MarketData.interval == interval
+        ).order_by(MarketData.timestamp).all()
+    finally:
+        session.close()
+    return pd.DataFrame.from_records(
+        rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    ).set_index('timestamp')
+
+
+@pytest.mark.parametrize('layout', ['row', 'partitioned', 'compact'])
+def test_apply_policy_rolls_up_then_deletes_then_removes_coverage(workdir, make_bars, layout):
+    configure(workdir, layout)
+    service = RetentionService()
+    assert service.resampler.target_intervals == ['5m', '15m']
+
+    # 跨月的一段与跨保留边界的一段
+    first = make_bars(60, start='2024-01-31 23:30', seed=1)
+    second = make_bars(120, start='2024-02-13 23:00', seed=2)
+    write_1m(service, first)
+    write_1m(service, second)
+    expired = pd.concat([first, second.loc[:'2024-02-13 23:59']])
+
+    # 聚合时 1m 数据必须仍然完整
+    update_rollups = service.resampler.update_rollups
+    seen_at_rollup = []
+
+    async def recording_rollups(symbol, start_time, end_time, *args, **kwargs):
+        seen_at_rollup.append(len(read(service, '1m')))
+        return await update_rollups(symbol, start_time, end_time, *args, **kwargs)
+
+    service.resampler.update_rollups = recording_rollups
+
+    deleted = asyncio.run(service.apply_policy('BTCUSDT', '1m', now=NOW))
+
+    assert deleted == len(expired) == 120
+    assert seen_at_rollup and all(count == 180 for count in seen_at_rollup)
+
+    remaining = read(service, '1m')
+    assert remaining.index.min() == HORIZON
+    assert len(remaining) == 60
+
+    # 删除前聚合出的高周期K线与由原始 1m 计算的结果一致
+    for interval in ['5m', '15m']:
+        expected = OHLCVResampler.resample(expired, interval)
+        stored = read(service, interval)
+        np.testing.assert_array_equal(stored.index.to_numpy(dtype='datetime64[ms]'), expected.index.to_numpy(dtype='datetime64[ms]'))
+        for name in ['open', 'high', 'low', 'close']:
+            np.testing.assert_array_equal(stored[name].to_numpy(), expected[name].to_numpy(), err_msg=f'{interval} {name}')
+        np.testing.assert_allclose(stored['volume'].to_numpy(), expected['volume'].to_numpy(), rtol=1e-12)
+
+    # 覆盖索引只剩保留期内的部分
+    session = service.db.get_session()
+    try:
+        coverage = service.coverage.get_coverage(session, 'BTCUSDT', '1m')
+    finally:
+        session.close()
+    expected_coverage = OHLCVResampler.to_epoch_ms([HORIZON, datetime(2024, 2, 14, 0, 59)])
+    np.testing.assert_array_equal(coverage, [expected_coverage])
+
+    if layout == 'partitioned':
+        session = service.db.get_session()
+        try:
+            # 1 月分区仍保存高周期K线，不会被删除
+            assert service.store.partitions(session) == ['market_data_2024_01', 'market_data_2024_02']
+        finally:
+            session.close()
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+from src.models.database import DataSyncStatus, MarketData
+from src.services.market_data_service import MarketDataService
+from src.services.sync_scheduler import SyncJob, SyncScheduler
+
+MINUTE_MS = 60000
+
+
+class KlineClient:
+    """按请求范围生成 1m K线，每次请求让出一次事件循环"""
+
+    async def get_klines(self, symbol, interval, limit, startTime, endTime):
+        await asyncio.sleep(0)
+        first = -(-startTime // MINUTE_MS) * MINUTE_MS
+        opens = range(first, min(endTime, first + (limit - 1) * MINUTE_MS) + 1, MINUTE_MS)
+        return [
+            [t, '100', '101', '99', '100.5', '10', t + MINUTE_MS - 1, '1005', 3, '4', '402', '0']
+            for t in opens
+        ]
+
+    async def close(self):
+        pass
+
+
+def test_concurrent_jobs_use_separate_sessions_and_fail_independently(workdir):
+    start = datetime(2024, 9, 1, tzinfo=pytz.UTC)
+    end = datetime(2024, 9, 1, 6, tzinfo=pytz.UTC)
+    sessions = {}
+
+    async def run():
+        service = MarketDataService()
+        service.collector.client = KlineClient()
+        update_rollups = service.resampler.update_rollups
+
+        async def flaky_rollups(symbol, start_time, end_time, intervals=None, session=None):
+            sessions.setdefault(symbol, set()).add(id(session))
+            # 在写入与提交之间切换到另一个任务
+            await asyncio.sleep(0)
+            if symbol == 'ETHUSDT':
+                raise RuntimeError('聚合失败')
+            return await update_rollups(symbol, start_time, end_time, intervals, session=session)
+
+        service.resampler.update_rollups = flaky_rollups
+        scheduler = SyncScheduler(service, max_concurrency=2, on_progress=lambda job: None)
+        scheduler.add_job('BTCUSDT', '1m', start, end)
+        scheduler.add_job('ETHUSDT', '1m', start, end)
+        return service, await scheduler.run()
+
+    service, jobs = asyncio.run(run())
+    status = {job.symbol: job.status for job in jobs}
+
+    assert status == {'BTCUSDT': SyncJob.SUCCESS, 'ETHUSDT': SyncJob.FAILED}
+    # 每个任务一个独立会话，且不是线程共享的 scoped_session
+    assert len(sessions['BTCUSDT']) == 1 and len(sessions['ETHUSDT']) == 1
+    assert sessions['BTCUSDT'] != sessions['ETHUSDT']
+    assert id(service.db.get_session()) not in sessions['BTCUSDT'] | sessions['ETHUSDT']
+
+    # 失败任务的回滚不影响成功任务的K线、聚合结果与覆盖索引
+    session = service.db.get_session()
+    try:
+        def count(symbol, interval):
+            return session.query(MarketData).filter(
+                MarketData.symbol == symbol, MarketData.interval == interval
+            ).count()
+
+        assert count('BTCUSDT', '1m') == 361
+        # 06:00 的 5m 时间桶只有 1 根 1m，已收盘但不完整，不写入
+        assert count('BTCUSDT', '5m') == 72
+        assert count('ETHUSDT', '5m') == 0
+        statuses = dict(session.query(DataSyncStatus.symbol, DataSyncStatus.status).all())
+        assert statuses == {'BTCUSDT': 'success', 'ETHUSDT': 'failed'}
+    finally:
+        session.close()
+
+    naive = pd.Timestamp(end).tz_localize(None).to_pydatetime()
+    assert service.coverage.find_gaps('BTCUSDT', '1m', datetime(2024, 9, 1), naive) == []